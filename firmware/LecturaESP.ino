@@ -3,27 +3,155 @@
 const int PIN_DERIVACION_I = 34;
 const int PIN_DERIVACION_II = 14;
 
+// --- MODO DE TRANSMISIÓN ---
+// 0: ASCII "valor_I,valor_II\n" (compatible con todas las versiones del software).
+// 1: Binario por tramas de 6 bytes (PROTOCOLO = 'binario' en Python):
+//    [0xA5][secuencia][I y II empaquetados en 3 bytes (12 bits c/u)][checksum]
+#define MODO_BINARIO 0
+
+// --- MODO DE MUESTREO ---
+// 0: loop() con delay(3) (la fs real queda POR DEBAJO de 333.33 Hz porque
+//    analogRead() y el envío por serie se suman al retardo).
+// 1: Temporizador hardware cada PERIODO_MUESTREO_US. La interrupción despierta
+//    una tarea de muestreo que llena un doble buffer; loop() solo transmite
+//    el bloque que está completo. La fs es fija aunque el envío se retrase.
+//    Es el único modo en el que la fs se puede elegir (sobremuestreo).
+#define MODO_TIMER 0
+// Periodo de muestreo (MODO_TIMER 1). Debe coincidir con FS_ADQUISICION en Python:
+//   3000 us = 333.33 Hz | 1000 us = 1 kHz | 750 us = 1333.33 Hz | 500 us = 2 kHz
+#define PERIODO_MUESTREO_US 3000
+#define MUESTRAS_POR_BLOQUE 32
+
+// --- VELOCIDAD DEL PUERTO SERIE (igual que BAUD_RATE en Python) ---
+// Cada byte ocupa 10 bits en la línea. A 115200 baudios caben ~1900 muestras/s
+// en binario (6 bytes) y ~1000 en ASCII (hasta 11 bytes): por encima de
+// 333 Hz usa MODO_BINARIO 1 y, desde 1 kHz, 921600 baudios.
+#define BAUDIOS 115200
+
+const uint8_t BYTE_SYNC = 0xA5;
+uint8_t secuencia = 0;  // Contador de muestras (da la vuelta en 255)
+
+// Empaqueta dos valores de 12 bits en una trama y la envía con un solo write.
+void enviarTramaBinaria(int valor_I, int valor_II, uint8_t seq) {
+  uint8_t trama[6];
+  trama[0] = BYTE_SYNC;
+  trama[1] = seq;
+  trama[2] = valor_I & 0xFF;
+  trama[3] = ((valor_I >> 8) & 0x0F) | ((valor_II & 0x0F) << 4);
+  trama[4] = (valor_II >> 4) & 0xFF;
+  trama[5] = (uint8_t)(trama[1] + trama[2] + trama[3] + trama[4]);
+  Serial.write(trama, sizeof(trama));
+}
+
+// Envía una muestra en el formato elegido con MODO_BINARIO.
+// (El número de secuencia solo viaja en modo binario; en ASCII el host
+// estima la fs real pero no puede detectar muestras perdidas).
+void enviarMuestra(int valor_I, int valor_II, uint8_t seq) {
+#if MODO_BINARIO
+  // 6 bytes por muestra en lugar de hasta 11 caracteres ASCII.
+  enviarTramaBinaria(valor_I, valor_II, seq);
+#else
+  // Enviamos los datos a la computadora por el puerto serie.
+  // El formato es clave: "valor1,valor2" seguido de un salto de línea.
+  Serial.print(valor_I);
+  Serial.print(",");
+  Serial.println(valor_II);
+#endif
+}
+
+#if MODO_TIMER
+// --- DOBLE BUFFER: la tarea de muestreo llena una mitad mientras loop() envía la otra ---
+uint16_t bufferI[2][MUESTRAS_POR_BLOQUE];
+uint16_t bufferII[2][MUESTRAS_POR_BLOQUE];
+uint8_t bufferSeq[2][MUESTRAS_POR_BLOQUE];
+volatile int bloqueListo = -1;          // Mitad lista para enviar (-1: ninguna)
+volatile uint32_t bloquesPerdidos = 0;  // loop() no llegó a tiempo (se ve como hueco de secuencia)
+
+hw_timer_t *temporizador = NULL;
+TaskHandle_t tareaMuestreo = NULL;
+
+// La ISR solo despierta a la tarea: analogRead() no debe llamarse dentro de una interrupción.
+void IRAM_ATTR alVencerTemporizador() {
+  BaseType_t despertar = pdFALSE;
+  vTaskNotifyGiveFromISR(tareaMuestreo, &despertar);
+  if (despertar) {
+    portYIELD_FROM_ISR();
+  }
+}
+
+void muestrear(void *parametros) {
+  int mitad = 0;
+  int indice = 0;
+  for (;;) {
+    // pdFALSE: si se acumulan avisos no se pierde ningún periodo
+    ulTaskNotifyTake(pdFALSE, portMAX_DELAY);
+    bufferI[mitad][indice] = analogRead(PIN_DERIVACION_I);
+    bufferII[mitad][indice] = analogRead(PIN_DERIVACION_II);
+    bufferSeq[mitad][indice] = secuencia++;
+    if (++indice == MUESTRAS_POR_BLOQUE) {
+      indice = 0;
+      if (bloqueListo == -1) {
+        bloqueListo = mitad;
+        mitad ^= 1;
+      } else {
+        // La otra mitad aún se está enviando: reescribimos esta
+        bloquesPerdidos++;
+      }
+    }
+  }
+}
+
+void iniciarTemporizador() {
+  // Tarea de alta prioridad en el núcleo 0 (loop() corre en el núcleo 1)
+  xTaskCreatePinnedToCore(muestrear, "muestreo", 4096, NULL, configMAX_PRIORITIES - 1,
+                          &tareaMuestreo, 0);
+#if defined(ESP_ARDUINO_VERSION_MAJOR) && ESP_ARDUINO_VERSION_MAJOR >= 3
+  temporizador = timerBegin(1000000);  // 1 MHz: 1 tick = 1 us
+  timerAttachInterrupt(temporizador, &alVencerTemporizador);
+  timerAlarm(temporizador, PERIODO_MUESTREO_US, true, 0);
+#else
+  temporizador = timerBegin(0, 80, true);  // 80 MHz / 80 = 1 tick por us
+  timerAttachInterrupt(temporizador, &alVencerTemporizador, true);
+  timerAlarmWrite(temporizador, PERIODO_MUESTREO_US, true);
+  timerAlarmEnable(temporizador);
+#endif
+}
+#endif
+
 void setup() {
   // Inicializamos la comunicación serial. 115200 es una velocidad rápida y confiable.
   // Esta velocidad debe coincidir con la del script de Python en tu computadora.
-  Serial.begin(115200);
+  Serial.begin(BAUDIOS);
 
   // Mensaje de inicio para saber que el ESP32 ha arrancado correctamente.
   // Lo verás si abres el "Monitor Serie" del Arduino IDE.
+  // (En modo binario el decodificador de Python lo descarta).
   Serial.println("Iniciando lectura de ECG (Derivaciones I y II)...");
+
+#if MODO_TIMER
+  iniciarTemporizador();
+#endif
 }
 
+#if MODO_TIMER
+void loop() {
+  if (bloqueListo != -1) {
+    int mitad = bloqueListo;
+    for (int i = 0; i < MUESTRAS_POR_BLOQUE; i++) {
+      enviarMuestra(bufferI[mitad][i], bufferII[mitad][i], bufferSeq[mitad][i]);
+    }
+    bloqueListo = -1;  // La tarea de muestreo ya puede entregar la siguiente mitad
+  }
+}
+#else
 void loop() {
   // Leemos el valor analógico de cada pin.
   // El ADC del ESP32 tiene una resolución de 12 bits, por lo que el valor irá de 0 a 4095.
   int valor_I = analogRead(PIN_DERIVACION_I);
   int valor_II = analogRead(PIN_DERIVACION_II);
 
-  // Enviamos los datos a la computadora por el puerto serie.
-  // El formato es clave: "valor1,valor2" seguido de un salto de línea.
-  Serial.print(valor_I);
-  Serial.print(",");
-  Serial.println(valor_II);
+  enviarMuestra(valor_I, valor_II, secuencia++);
 
   delay(3);
-}
\ No newline at end of file
+}
+#endif
\ No newline at end of file
@@ -1,26 +1,37 @@
 import tkinter as tk
 from tkinter import ttk
-from PIL import Image, ImageTk
+from cache_imagenes import CacheImagenes
+from redimension import CoalescedorRedimension
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import os
+import time
 import numpy as np
-import serial
 from scipy import signal
-from collections import deque
-
-# --- CONFIGURACIÓN SERIE (ESP32) ---
-SERIAL_PORT = 'COM4'  # Ajusta según tu sistema
-BAUD_RATE = 115200
-
-try:
-    ser = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=1)
-    print("Conexión exitosa con ESP32")
-except:
-    print("No se pudo abrir el puerto serie, se usarán señales simuladas")
-    ser = None
+from fuentes import abrir_adquisicion  # Hilo dueño de la fuente (serie, TCP o archivo)
+from buffer_circular import BufferCircular
+from grabador import SesionGrabacion, HiloGrabador
+from filtro_sos import FiltroSOS
+from derivaciones import calcular_derivacion
+from render_blit import RenderBlit
+from escala_y import EscalaHisteresis
+from qrs import DetectorQRS
+from planificador import PlanificadorCuadros
+
+# --- ENTRADA (ESP32) ---
+# Descripción para crear_fuente: "serie:COM4:115200" (BAUDIOS del firmware;
+# 921600 para fs >= 1 kHz), "tcp:192.168.4.1:3333", "archivo:captura.bin[:bytes_por_s]"
+# o "simulacion"
+FUENTE = 'serie:COM4:115200'  # Ajusta el puerto según tu sistema
+PROTOCOLO = 'ascii'  # 'binario' si el firmware tiene MODO_BINARIO 1
+SIMULAR_SI_FALLA = True  # False: si la fuente no abre, error en vez de señales simuladas
 
 # --- DISEÑO DEL FILTRO DIGITAL ---
-fs = 333.33
+# Frecuencia de ADQUISICIÓN (firmware) y de visualización/análisis tras decimar.
+# Ej.: firmware a 1333.33 Hz (PERIODO_MUESTREO_US 750) con FACTOR_DECIMACION 4.
+FS_ADQUISICION = 333.33  # Asegúrate que esta sea tu frecuencia de muestreo real
+FACTOR_DECIMACION = 1
+fs = FS_ADQUISICION / FACTOR_DECIMACION  # El filtro y la interfaz trabajan a esta fs
 lowcut = 0.5 
 highcut = 40.0
 order = 4
@@ -32,14 +43,62 @@ current_derivation = None
 img_derivacion_actual = None
 portada_imgtk = None
 MAX_POINTS = 500
+FPS_OBJETIVO = 20  # Cuadros por segundo buscados (la lectura sigue a este ritmo aunque se salten cuadros)
+TOLERANCIA_FS = 0.02  # Avisar si la fs real se desvía más de un 2 % de FS_ADQUISICION
+
+# --- Imágenes de referencia: se decodifican UNA vez al inicio ---
+cache_imagenes = CacheImagenes(capacidad=32)
+for nombre_imagen in ("portada", "I", "II", "III", "aVR", "aVL", "aVF"):
+    cache_imagenes.cargar(nombre_imagen, f"{nombre_imagen}.png")
+RETARDO_REDIMENSION_MS = 150  # Espera tras el último <Configure> antes de aplicar el tamaño
+
+CAPACIDAD_BUFFER = 8192
+
+# Filtro SOS por bloques (I y II) para el modo simulación (con ESP32 el filtro vive en el hilo)
+filtro = FiltroSOS(sos, canales=2)
+
+# --- HILO DE ADQUISICIÓN (dueño de la fuente) ---
+adquisicion = abrir_adquisicion(FUENTE, sos, simular_si_falla=SIMULAR_SI_FALLA,
+                                capacidad=CAPACIDAD_BUFFER, protocolo=PROTOCOLO,
+                                fs=FS_ADQUISICION, decimacion=FACTOR_DECIMACION)
+if adquisicion is not None:
+    filtrados = adquisicion.filtrados
+else:
+    filtrados = BufferCircular(CAPACIDAD_BUFFER, 2)
+
+# --- GRABACIÓN DE LA SESIÓN (crudos + filtrados a un archivo .ecg con np.memmap) ---
+GRABAR = False
+CARPETA_SESIONES = "sesiones"
+grabador = None
+if GRABAR and adquisicion is not None:
+    if FACTOR_DECIMACION != 1:
+        print("Grabación desactivada: con decimación 'crudos' y 'filtrados' van a distinta fs")
+    else:
+        os.makedirs(CARPETA_SESIONES, exist_ok=True)
+        ruta_sesion = os.path.join(CARPETA_SESIONES, time.strftime("ecg_%Y%m%d_%H%M%S.ecg"))
+        grabador = HiloGrabador(SesionGrabacion(ruta_sesion, fs, sos),
+                                adquisicion.crudos, adquisicion.filtrados)
+        print(f"Grabando la sesión en {ruta_sesion}")
 
-zi_I = signal.sosfilt_zi(sos)
-zi_II = signal.sosfilt_zi(sos)
+simulation_counter = 0
+inicio_simulacion = time.perf_counter()
 
-data_I_filt = deque([0.0] * MAX_POINTS, maxlen=MAX_POINTS)
-data_II_filt = deque([0.0] * MAX_POINTS, maxlen=MAX_POINTS)
+# Eje X y derivación calculada preasignados (se reescriben en cada cuadro)
+x_eje = np.arange(MAX_POINTS)
+y_calculada = np.zeros(MAX_POINTS)
 
-simulation_counter = 0
+# Auto-escala del eje Y con histéresis y derivación a la que sigue
+escala = EscalaHisteresis(MAX_POINTS, decaimiento=int(2 * fs))
+derivacion_escala = None
+
+# --- Detector de QRS sobre la derivación II filtrada (frecuencia cardiaca en vivo) ---
+detector_qrs = DetectorQRS(fs)
+
+# Muestras nuevas por tick y muestras perdidas por desborde del lector
+cursor_lectura = 0
+muestras_ultimo_tick = 0
+muestras_sin_dibujar = 0  # Leídas desde el último cuadro (los ticks sin dibujo también leen)
+muestras_perdidas = 0
 
 # --- Función para actualizar la imagen (sin cambios) ---
 def actualizar_imagen(nombre):
@@ -56,9 +115,8 @@ def actualizar_imagen(nombre):
         if total_w <= 1 or total_h <= 1:
             root.after(100, lambda: actualizar_imagen(nombre))
             return
-        img = Image.open(f"{nombre}.png")
-        img.thumbnail((ancho, alto), Image.LANCZOS)
-        img_derivacion_actual = ImageTk.PhotoImage(img)
+        # Reescalado LANCZOS solo la primera vez para este tamaño (caché LRU)
+        img_derivacion_actual = cache_imagenes.obtener(nombre, ancho, alto)
         deriv_label.config(image=img_derivacion_actual, text="")
     except:
         deriv_label.config(text=f"{nombre}.png no encontrada", image="", bg="white")
@@ -74,110 +132,114 @@ def actualizar_portada():
         if total_w <= 1 or total_h <= 1:
             root.after(100, actualizar_portada)
             return
-        img = Image.open("portada.png")
-        img.thumbnail((ancho, alto), Image.LANCZOS)
-        portada_imgtk = ImageTk.PhotoImage(img)
+        portada_imgtk = cache_imagenes.obtener("portada", ancho, alto)
         portada_label.config(image=portada_imgtk, text="")
     except:
         portada_label.config(text="portada.png no encontrada", image="", bg="white")
 
 
-# --- CAMBIO 1: leer_senales AHORA SOLO LEE Y FILTRA I y II ---
+# --- CAMBIO 1: leer_senales AHORA SOLO CONSUME EL BUFFER DEL HILO ---
 def leer_senales():
-    """Lee I y II, filtra muestra a muestra y actualiza las deques globales."""
-    global data_I_filt, data_II_filt, simulation_counter
-    global zi_I, zi_II 
+    """Consume las muestras nuevas de I y II (ya filtradas) del buffer circular."""
+    global simulation_counter, cursor_lectura, muestras_ultimo_tick, muestras_sin_dibujar, muestras_perdidas
     
     # --- Simulación ---
-    if ser is None:
-        simulation_counter += 1
-        ruido_I = np.random.normal(0, 15)
-        ruido_II = np.random.normal(0, 15)
-        linea_base_I = 100 * np.sin(2 * np.pi * simulation_counter / (MAX_POINTS * 5))
-        valor_I = int(2048 + 1000*np.sin(np.pi*simulation_counter/50) + ruido_I + linea_base_I)
-        valor_II = int(2048 + 1000*np.sin(np.pi*simulation_counter/30) + ruido_II)
-    # --- Lectura Real ---
-    else:
-        try:
-            line_data = ser.readline().decode('utf-8').strip()
-            if ',' in line_data:
-                valor_I, valor_II = map(int, line_data.split(','))
-            else:
-                return None # No hay datos nuevos
-        except:
-            return None # Error de lectura
-
-    # --- 1. FILTRAR SOLO LA NUEVA MUESTRA ---
-    y_I, zi_I = signal.sosfilt(sos, [valor_I], zi=zi_I)
-    y_II, zi_II = signal.sosfilt(sos, [valor_II], zi=zi_II)
-    
-    # --- 2. AÑADIR DATOS FILTRADOS A LAS DEQUES ---
-    # (La deque descarta automáticamente el valor más antiguo)
-    data_I_filt.append(y_I[0])
-    data_II_filt.append(y_II[0])
-    
-    return True # Éxito, hay nuevos datos
-
+    # Genera las muestras que tocan a 'fs' desde el inicio, no una por tick
+    # (el detector de QRS cuenta el tiempo en muestras)
+    if adquisicion is None:
+        debidas = int((time.perf_counter() - inicio_simulacion) * fs)
+        contador = np.arange(max(simulation_counter, debidas - CAPACIDAD_BUFFER), debidas) + 1
+        simulation_counter = debidas
+        ruido_I = np.random.normal(0, 15, len(contador))
+        ruido_II = np.random.normal(0, 15, len(contador))
+        linea_base_I = 100 * np.sin(2 * np.pi * contador / (MAX_POINTS * 5))
+        valor_I = (2048 + 1000*np.sin(np.pi*contador/50) + ruido_I + linea_base_I).astype(int)
+        valor_II = (2048 + 1000*np.sin(np.pi*contador/30) + ruido_II).astype(int)
+        if len(contador):
+            filtrados.escribir(filtro.filtrar(np.column_stack((valor_I, valor_II))))
+
+    # --- Lectura Real: el hilo ya leyó y filtró, aquí solo avanzamos el cursor ---
+    nuevas, cursor_lectura, perdidas = filtrados.desde(cursor_lectura)
+    muestras_perdidas += perdidas
+    muestras_ultimo_tick = len(nuevas)
+    muestras_sin_dibujar += muestras_ultimo_tick
+    if muestras_ultimo_tick:
+        detector_qrs.procesar(nuevas[:, 1])  # Picos R sobre la derivación II
+
+
+def actualizar_escala(y, nuevas):
+    """Alimenta la auto-escala con las 'nuevas' muestras del final de y; True si cambian los límites."""
+    global derivacion_escala
+    if derivacion_escala != current_derivation:
+        derivacion_escala = current_derivation
+        return escala.reiniciar(y)
+    return escala.actualizar(y[len(y) - min(nuevas, len(y)):])
+
+
+# --- Texto de estado: adquisición, fs real medida y auto-escala ---
+def texto_estado():
+    p50, p95, p99 = planificador.percentiles()
+    partes = [f"Muestras por tick: {muestras_ultimo_tick}",
+              f"FPS: {planificador.fps():.1f}/{FPS_OBJETIVO} (cuadro p50 {p50:.1f} ms, p95 {p95:.1f} ms, "
+              f"p99 {p99:.1f} ms; saltados {planificador.saltados})",
+              f"Perdidas: {muestras_perdidas}",
+              f"Cambios de escala: {escala.cambios}"]
+    if adquisicion is not None:
+        monitor = adquisicion.monitor
+        partes.append(f"Errores lectura: {adquisicion.errores_lectura}")
+        partes.append(f"Huecos ESP32: {monitor.huecos} ({monitor.muestras_perdidas} muestras)")
+        fs_real = monitor.tasa_real()
+        if fs_real is not None:
+            texto_fs = f"fs real: {fs_real:.1f} Hz (nominal {FS_ADQUISICION} Hz)"
+            if abs(monitor.desviacion()) > TOLERANCIA_FS:
+                bajo, alto = monitor.bordes_reales(lowcut, highcut)
+                texto_fs += f" ¡banda real {bajo:.2f}-{alto:.1f} Hz!"
+            partes.append(texto_fs)
+    if grabador is not None:
+        partes.append(f"Grabadas: {grabador.sesion.muestras}")
+    return " | ".join(partes)
 
 # --- CAMBIO 2: actualizar_grafica AHORA HACE EL CÁLCULO ESPEFÍFICO ---
+# Un cuadro, cuando el planificador decide que toca dibujar (leer_senales va en cada tick)
 def actualizar_grafica():
-    
-    # 1. Llama a leer_senales() para actualizar las colas data_I_filt y data_II_filt
-    nuevos_datos = leer_senales() 
+    global muestras_sin_dibujar
+
+    # 1. Muestras leídas desde el cuadro anterior
+    nuevos_datos = muestras_sin_dibujar
+    muestras_sin_dibujar = 0
+    estado_label.config(text=texto_estado())
+    frecuencia = detector_qrs.frecuencia_cardiaca()
+    fc_label.config(text=f"FC: {frecuencia:.0f} lpm" if frecuencia else "FC: -- lpm")
 
     # 2. Comprueba si hay datos nuevos Y si el usuario ha seleccionado una derivación
     if nuevos_datos and current_derivation:
         
         # --- CÁLCULO "JUST-IN-TIME" ---
-        # Solo ahora, convertimos las deques a arrays de NumPy
-        I_filt = np.array(data_I_filt)
-        II_filt = np.array(data_II_filt)
+        # Vista (sin copia) de las últimas MAX_POINTS muestras del buffer circular
+        ventana = filtrados.ultimos(MAX_POINTS)
         
-        # Y AHORA, calculamos SOLAMENTE la derivación que se está viendo
-        if current_derivation == "I":
-            y = I_filt
-        elif current_derivation == "II":
-            y = II_filt
-        elif current_derivation == "III":
-            y = II_filt - I_filt
-        elif current_derivation == "aVR":
-            y = -(I_filt + II_filt) / 2
-        elif current_derivation == "aVL":
-            y = I_filt - II_filt / 2
-        elif current_derivation == "aVF":
-            y = II_filt - I_filt / 2
-        else:
-            y = I_filt # Un valor por defecto por si acaso
+        # Y AHORA, calculamos SOLAMENTE la derivación que se está viendo:
+        # una fila de la matriz de proyección aplicada a [I, II], escrita
+        # sobre el array preasignado 'y_calculada' (sin crear temporales)
+        y = calcular_derivacion(ventana, current_derivation, out=y_calculada)
 
         # --- 3. Graficar ---
-        x = np.arange(len(y))
-        linea.set_data(x, y)
+        linea.set_data(x_eje, y)
         
-        # Auto-ajuste del eje Y
-        if len(y) > 0:
-            rango = np.max(y) - np.min(y)
-            margen = rango * 0.2
-            if margen == 0: margen = 100
-            ax.set_ylim(np.min(y) - margen, np.max(y) + margen)
-        else:
-            ax.set_ylim(-1000, 1000) 
+        # Auto-ajuste del eje Y con histéresis (solo cambia si la señal sale
+        # de la banda actual o lleva un rato ocupando poco rango)
+        if actualizar_escala(y, nuevos_datos):
+            ax.set_ylim(*escala.limites)
             
-        canvas.draw_idle()
-        
-    # 4. Programar la siguiente actualización
-    root.after(50, actualizar_grafica)
+        render.dibujar() # Blit de la línea (dibujo completo solo si cambió el eje)
 
 
-# --- Redimensionar (sin cambios) ---
-def redimensionar(event=None):
+# --- Redimensionar: se aplica UNA vez, cuando la ventana deja de cambiar ---
+def redimensionar():
+    # Solo el tamaño final paga el reescalado LANCZOS (y queda en la caché)
     actualizar_portada()
     if current_derivation:
         actualizar_imagen(current_derivation)
-    total_w = right_frame.winfo_width()
-    total_h = right_frame.winfo_height()
-    if total_w > 10 and total_h > 10:
-        fig.set_size_inches(total_w/100.0, (total_h*0.65)/100.0)
-        canvas.draw_idle()
 
 # ------------------- INTERFAZ (sin cambios) -------------------
 root = tk.Tk()
@@ -227,6 +289,12 @@ portada_frame.rowconfigure(0, weight=1)
 portada_label = tk.Label(portada_frame, bg='white')
 portada_label.grid(row=0, column=0, sticky="nsew")
 
+fc_label = ttk.Label(left_frame, text="FC: -- lpm", font=("Arial", 18, "bold"))
+fc_label.grid(row=2, column=0, sticky="w", padx=10)
+
+estado_label = ttk.Label(left_frame, text="Muestras por tick: 0", wraplength=350)
+estado_label.grid(row=3, column=0, sticky="w", padx=10, pady=(0, 10))
+
 right_frame = ttk.Frame(root)
 right_frame.grid(row=0, column=1, sticky="nsew")
 right_frame.rowconfigure(0, weight=65)
@@ -246,16 +314,26 @@ ax.set_xlim(0, MAX_POINTS)
 canvas = FigureCanvasTkAgg(fig, master=right_frame)
 canvas.get_tk_widget().grid(row=0, column=0, sticky='nsew', padx=10, pady=10)
 
+render = RenderBlit(canvas, [linea])
+
 deriv_label = tk.Label(right_frame, bg='white')
 deriv_label.grid(row=1, column=0, sticky='nsew', padx=10, pady=10)
 
-root.bind("<Configure>", redimensionar)
+# Agrupa los <Configure> de la raíz (ignora los de los hijos) y los del canvas:
+# la figura se reescala y se redibuja (recapturando el fondo del blit) UNA vez
+redimension = CoalescedorRedimension(root, redimensionar, retardo_ms=RETARDO_REDIMENSION_MS)
+redimension.seguir_widget(canvas.get_tk_widget(), canvas.resize)
 
 actualizar_portada()
-actualizar_grafica()
+if grabador is not None:
+    grabador.start()
+# Lectura en cada tick y cuadros a FPS_OBJETIVO (menos si dibujar se encarece)
+planificador = PlanificadorCuadros(root, leer_senales, actualizar_grafica, fps=FPS_OBJETIVO)
+planificador.iniciar()
 
 root.mainloop()
 
-if ser is not None and ser.is_open:
-    ser.close()
-    print("Puerto serie cerrado.")
\ No newline at end of file
+if adquisicion is not None:
+    adquisicion.detener()
+if grabador is not None:
+    grabador.detener()  # Graba lo pendiente y recorta el archivo
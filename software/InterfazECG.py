@@ -1,26 +1,43 @@
 import tkinter as tk
 from tkinter import ttk
-from PIL import Image, ImageTk
+from cache_imagenes import CacheImagenes
+from redimension import CoalescedorRedimension
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import os
+import time
 import numpy as np
-import serial
 from scipy import signal  # <-- CAMBIO: Importamos signal de scipy
-from collections import deque # <-- CAMBIO: Importamos deque
-
-# --- CONFIGURACIÓN SERIE (ESP32) ---
-SERIAL_PORT = 'COM4'  # Ajusta según tu sistema
-BAUD_RATE = 115200
-
-try:
-    ser = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=1)
-    print("Conexión exitosa con ESP32")
-except:
-    print("No se pudo abrir el puerto serie, se usarán señales simuladas")
-    ser = None
+from fuentes import abrir_adquisicion  # Hilo dueño de la fuente (serie, TCP o archivo)
+from buffer_circular import BufferCircular
+from grabador import SesionGrabacion, HiloGrabador
+from filtro_sos import FiltroSOS
+from derivaciones import ProyectorDerivaciones, INDICE_DERIVACION, NOMBRES_DERIVACIONES
+from render_blit import RenderBarrido
+from escala_y import EscalaHisteresis
+from qrs import DetectorQRS
+from promediado import PromediadorLatidos
+from eje_electrico import EjeElectrico, clasificar_eje
+from vista_hexaxial import VistaHexaxial
+from vista_seis import VistaSeisDerivaciones
+from envolvente import EnvolventeMinMax
+from intervalos import DelineadorLatidos
+from planificador import PlanificadorCuadros
+
+# --- ENTRADA (ESP32) ---
+# Descripción para crear_fuente: "serie:COM4:115200" (BAUDIOS del firmware;
+# 921600 para fs >= 1 kHz), "tcp:192.168.4.1:3333", "archivo:captura.bin[:bytes_por_s]"
+# o "simulacion"
+FUENTE = 'serie:COM4:115200'  # Ajusta el puerto según tu sistema
+PROTOCOLO = 'ascii'  # 'binario' si el firmware tiene MODO_BINARIO 1
+SIMULAR_SI_FALLA = True  # False: si la fuente no abre, error en vez de señales simuladas
 
 # --- CAMBIO: DISEÑO DEL FILTRO DIGITAL (copiado de tu script plotter_ecg.py) ---
-fs = 333.33  # Asegúrate que esta sea tu frecuencia de muestreo real
+# Frecuencia de ADQUISICIÓN (firmware) y de visualización/análisis tras decimar.
+# Ej.: firmware a 1333.33 Hz (PERIODO_MUESTREO_US 750) con FACTOR_DECIMACION 4.
+FS_ADQUISICION = 333.33  # Asegúrate que esta sea tu frecuencia de muestreo real
+FACTOR_DECIMACION = 1
+fs = FS_ADQUISICION / FACTOR_DECIMACION  # El filtro y la interfaz trabajan a esta fs
 lowcut = 0.5 
 highcut = 40.0
 order = 4
@@ -31,18 +48,101 @@ print(f"Diseño de filtro: Pasa-banda Butterworth (SOS) orden {order}, f_corte=[
 current_derivation = None
 img_derivacion_actual = None
 portada_imgtk = None
-MAX_POINTS = 500
-
-# --- CAMBIO: Inicializamos el estado interno del filtro (zi) ---
-zi_I = signal.sosfilt_zi(sos)
-zi_II = signal.sosfilt_zi(sos)
-
-# --- CAMBIO: Usamos deques (colas) para los datos YA FILTRADOS ---
-# maxlen=MAX_POINTS hace que sean deslizantes automáticamente
-data_I_filt = deque([0.0] * MAX_POINTS, maxlen=MAX_POINTS)
-data_II_filt = deque([0.0] * MAX_POINTS, maxlen=MAX_POINTS)
+SEGUNDOS_VENTANA = 10
+MAX_POINTS = int(SEGUNDOS_VENTANA * fs)  # Muestras de la ventana en vivo
+COLUMNAS_VENTANA = 600  # ~Ancho del eje en píxeles: con envolvente, 2 puntos (mín/máx) por columna
+# La envolvente solo compensa con ventanas mucho más largas que el eje: en
+# tests/benchmark_render.py a 10 s (~5.5 muestras por columna) cuesta lo mismo
+# que dibujar la ventana entera y desde ~20 s (> 10 por columna) ya ahorra.
+# También hace falta si la ventana no cabe en el buffer de derivaciones.
+MUESTRAS_POR_COLUMNA_ENVOLVENTE = 10
+HUECO_BARRIDO_S = 0.25  # Modo barrido: tramo borrado delante del cursor
+FPS_OBJETIVO = 20  # Cuadros por segundo buscados (la lectura sigue a este ritmo aunque se salten cuadros)
+TOLERANCIA_FS = 0.02  # Avisar si la fs real se desvía más de un 2 % de FS_ADQUISICION
+
+# --- Imágenes de referencia: se decodifican UNA vez al inicio ---
+cache_imagenes = CacheImagenes(capacidad=32)
+for nombre_imagen in ("portada", "I", "II", "III", "aVR", "aVL", "aVF"):
+    cache_imagenes.cargar(nombre_imagen, f"{nombre_imagen}.png")
+RETARDO_REDIMENSION_MS = 150  # Espera tras el último <Configure> antes de aplicar el tamaño
+
+CAPACIDAD_BUFFER = 8192  # Muestras que guarda el buffer circular (~25 s)
+
+# --- CAMBIO: Inicializamos el filtro SOS por bloques (guarda el 'zi' de I y II) ---
+# (solo se usa en modo simulación; con ESP32 el filtro vive en el hilo)
+filtro = FiltroSOS(sos, canales=2)
+
+# --- HILO DE ADQUISICIÓN ---
+# El hilo lee, parsea y filtra; escribe columnas [I, II] YA FILTRADAS en un
+# buffer circular preasignado que la interfaz lee sin copiar.
+adquisicion = abrir_adquisicion(FUENTE, sos, simular_si_falla=SIMULAR_SI_FALLA,
+                                capacidad=CAPACIDAD_BUFFER, protocolo=PROTOCOLO,
+                                fs=FS_ADQUISICION, decimacion=FACTOR_DECIMACION)
+if adquisicion is not None:
+    filtrados = adquisicion.filtrados
+else:
+    filtrados = BufferCircular(CAPACIDAD_BUFFER, 2)
+
+# --- GRABACIÓN DE LA SESIÓN (crudos + filtrados a un archivo .ecg con np.memmap) ---
+GRABAR = False
+CARPETA_SESIONES = "sesiones"
+grabador = None
+if GRABAR and adquisicion is not None:
+    if FACTOR_DECIMACION != 1:
+        print("Grabación desactivada: con decimación 'crudos' y 'filtrados' van a distinta fs")
+    else:
+        os.makedirs(CARPETA_SESIONES, exist_ok=True)
+        ruta_sesion = os.path.join(CARPETA_SESIONES, time.strftime("ecg_%Y%m%d_%H%M%S.ecg"))
+        grabador = HiloGrabador(SesionGrabacion(ruta_sesion, fs, sos),
+                                adquisicion.crudos, adquisicion.filtrados)
+        print(f"Grabando la sesión en {ruta_sesion}")
 
 simulation_counter = 0
+inicio_simulacion = time.perf_counter()
+
+# --- Derivaciones: matriz de proyección 6x2 aplicada SOLO a las muestras nuevas ---
+# Las 6 derivaciones (I, II, III, aVR, aVL, aVF) viven en un buffer circular de 6 canales
+proyector = ProyectorDerivaciones(CAPACIDAD_BUFFER)
+
+# --- Envolvente mín/máx de la ventana en vivo (6 derivaciones), alimentada con las muestras nuevas ---
+# Con envolvente el coste de dibujo depende de COLUMNAS_VENTANA, no de la duración
+# de la ventana; si la ventana es corta se dibujan sus muestras tal cual (None)
+if MAX_POINTS > MUESTRAS_POR_COLUMNA_ENVOLVENTE * COLUMNAS_VENTANA or MAX_POINTS > CAPACIDAD_BUFFER:
+    envolvente = EnvolventeMinMax(MAX_POINTS, COLUMNAS_VENTANA, canales=6)
+    ANCHO_VENTANA = envolvente.ventana
+else:
+    envolvente = None
+    ANCHO_VENTANA = MAX_POINTS
+x_ventana = np.arange(ANCHO_VENTANA, dtype=float)  # Eje X de la ventana sin envolvente
+
+# --- Auto-escala del eje Y con histéresis (decae tras ~2 s de señal pequeña) ---
+escala = EscalaHisteresis(MAX_POINTS, decaimiento=int(2 * fs))
+derivacion_escala = None  # Derivación que está siguiendo 'escala'
+
+# Vista de 6 derivaciones: una auto-escala por panel, con el mismo criterio
+escalas_seis = [EscalaHisteresis(MAX_POINTS, decaimiento=int(2 * fs)) for _ in NOMBRES_DERIVACIONES]
+vista_escalas_seis = None  # Vista (en vivo / promedio) que están siguiendo 'escalas_seis'
+
+# --- Detector de QRS sobre la derivación II filtrada (frecuencia cardiaca en vivo) ---
+detector_qrs = DetectorQRS(fs)
+
+# --- Latido promedio (plantilla P-QRS-T de las 6 derivaciones, últimos 32 latidos) ---
+promediador = PromediadorLatidos(fs, canales=6)
+plantilla_nueva = False  # True si llegó un latido desde el último cuadro
+
+# --- Eje eléctrico del QRS (I y aVF), actualizado en cada latido ---
+estimador_eje = EjeElectrico(fs)
+eje_nuevo = False
+
+# --- Intervalos PR, QRS, QT y QTc de cada latido (ventana acotada alrededor del R) ---
+delineador = DelineadorLatidos(fs)
+intervalos_nuevos = False
+
+# --- Contadores: muestras nuevas por tick y muestras perdidas por desborde ---
+cursor_lectura = 0
+muestras_ultimo_tick = 0
+muestras_sin_dibujar = 0  # Leídas desde el último cuadro (los ticks sin dibujo también leen)
+muestras_perdidas = 0
 
 # --- Función para actualizar la imagen (sin cambios) ---
 def actualizar_imagen(nombre):
@@ -57,9 +157,8 @@ def actualizar_imagen(nombre):
         if total_w <= 1 or total_h <= 1:
             root.after(100, lambda: actualizar_imagen(nombre))
             return
-        img = Image.open(f"{nombre}.png")
-        img.thumbnail((ancho, alto), Image.LANCZOS)
-        img_derivacion_actual = ImageTk.PhotoImage(img)
+        # Reescalado LANCZOS solo la primera vez para este tamaño (caché LRU)
+        img_derivacion_actual = cache_imagenes.obtener(nombre, ancho, alto)
         deriv_label.config(image=img_derivacion_actual, text="")
     except:
         deriv_label.config(text=f"{nombre}.png no encontrada", image="", bg="white")
@@ -75,9 +174,7 @@ def actualizar_portada():
         if total_w <= 1 or total_h <= 1:
             root.after(100, actualizar_portada)
             return
-        img = Image.open("portada.png")
-        img.thumbnail((ancho, alto), Image.LANCZOS)
-        portada_imgtk = ImageTk.PhotoImage(img)
+        portada_imgtk = cache_imagenes.obtener("portada", ancho, alto)
         portada_label.config(image=portada_imgtk, text="")
     except:
         portada_label.config(text="portada.png no encontrada", image="", bg="white")
@@ -86,103 +183,234 @@ def actualizar_portada():
 # --- CAMBIO: Eliminada la función 'apply_filters', ya no se necesita ---
 
 
-# --- CAMBIO: Lectura de señales (con filtrado "online" y deslizamiento) ---
+# --- Lectura de señales (desde el buffer circular del hilo de adquisición) ---
 def leer_senales():
-    """Lee dos derivaciones, las filtra MUESTRA A MUESTRA, y calcula las demás"""
-    global data_I_filt, data_II_filt, simulation_counter
-    # Hacemos los estados del filtro 'global' para que persistan
-    global zi_I, zi_II 
+    """Toma las muestras nuevas YA filtradas del buffer circular y calcula las 6 derivaciones"""
+    global simulation_counter, cursor_lectura, muestras_ultimo_tick, muestras_sin_dibujar, muestras_perdidas, plantilla_nueva, eje_nuevo, intervalos_nuevos
     
     # --- Simulación si no hay ESP32 ---
-    if ser is None:
-        simulation_counter += 1
-        ruido_I = np.random.normal(0, 15)
-        ruido_II = np.random.normal(0, 15)
-        linea_base_I = 100 * np.sin(2 * np.pi * simulation_counter / (MAX_POINTS * 5)) # Ruido respiración
+    # Genera las muestras que tocan a 'fs' desde el inicio, no una por tick
+    if adquisicion is None:
+        debidas = int((time.perf_counter() - inicio_simulacion) * fs)
+        contador = np.arange(max(simulation_counter, debidas - CAPACIDAD_BUFFER), debidas) + 1
+        simulation_counter = debidas
+        ruido_I = np.random.normal(0, 15, len(contador))
+        ruido_II = np.random.normal(0, 15, len(contador))
+        linea_base_I = 100 * np.sin(2 * np.pi * contador / 2500) # Ruido respiración
         
-        # Obtenemos el valor CRUDO (RAW)
-        valor_I = int(2048 + 1000*np.sin(np.pi*simulation_counter/50) + ruido_I + linea_base_I)
-        valor_II = int(2048 + 1000*np.sin(np.pi*simulation_counter/30) + ruido_II)
+        # Obtenemos los valores CRUDOS (RAW)
+        valor_I = (2048 + 1000*np.sin(np.pi*contador/50) + ruido_I + linea_base_I).astype(int)
+        valor_II = (2048 + 1000*np.sin(np.pi*contador/30) + ruido_II).astype(int)
+
+        # Filtramos el bloque y lo escribimos en el mismo buffer que usaría el hilo
+        if len(contador):
+            filtrados.escribir(filtro.filtrar(np.column_stack((valor_I, valor_II))))
+
+    # --- 1. CONSUMIR LAS MUESTRAS NUEVAS (sin bloquear la interfaz) ---
+    nuevas, cursor_lectura, perdidas = filtrados.desde(cursor_lectura)
+    muestras_perdidas += perdidas
+    muestras_ultimo_tick = len(nuevas)
+    if muestras_ultimo_tick == 0:
+        return None
+
+    # Picos R sobre la derivación II (trabajo O(1) por muestra nueva)
+    indices_r = detector_qrs.procesar(nuevas[:, 1])
+    promediador.agregar(indices_r)
+    estimador_eje.agregar(indices_r)
+    delineador.agregar(indices_r)
+
+    # --- 2. Calcular derivaciones (usando las señales YA filtradas) ---
+    # Una sola matmul (6x2) por bloque nuevo, escrita en el buffer de 6 derivaciones
+    # y acumulada en las columnas de la envolvente y en la ventana del modo barrido
+    derivaciones_nuevas = proyector.proyectar(nuevas)
+    if envolvente is not None:
+        envolvente.agregar(derivaciones_nuevas)
+    render.agregar(derivaciones_nuevas)
+
+    # Los latidos completos (R + 450 ms ya recibidos) entran en la plantilla
+    plantilla_nueva |= promediador.actualizar(proyector.derivaciones)
+    eje_nuevo |= estimador_eje.actualizar(proyector.derivaciones)
+    intervalos_nuevos |= delineador.actualizar(proyector.derivaciones) > 0
+
+    muestras_sin_dibujar += muestras_ultimo_tick
+
+# --- Auto-escala: alimenta solo las muestras nuevas de la derivación visible ---
+def actualizar_escala(y, nuevas):
+    """Devuelve True si hay que cambiar los límites del eje Y"""
+    global derivacion_escala
+    vista = (current_derivation, ver_promedio.get())
+    if derivacion_escala != vista:
+        # Cambió la derivación o la vista: recorremos la ventana completa una sola vez
+        # (y en barrido se repinta la traza entera con la derivación nueva)
+        derivacion_escala = vista
+        render.invalidar()
+        return escala.reiniciar(y)
+    return escala.actualizar(y[len(y) - min(nuevas, len(y)):])
+
+# --- Auto-escala de la vista de 6 derivaciones (aplica los límites que cambien) ---
+def actualizar_escalas_seis(ventana, nuevas):
+    """'ventana' es (muestras, 6). Si cambia algún eje Y, fuerza un dibujo completo."""
+    global vista_escalas_seis
+    reiniciar = vista_escalas_seis != ver_promedio.get()
+    vista_escalas_seis = ver_promedio.get()
+    for k, escala_k in enumerate(escalas_seis):
+        y = ventana[:, k]
+        if reiniciar:
+            cambio = escala_k.reiniciar(y)
+        else:
+            cambio = escala_k.actualizar(y[len(y) - min(nuevas, len(y)):])
+        if cambio:
+            vista_seis.fijar_y(k, *escala_k.limites)
+            render.invalidar()   # Los paneles van en el fondo del blit
+
+# --- Modo barrido: 'render' pasa a las líneas solo el tramo nuevo de su ventana (muestras, 6) ---
+def trazo_ventana(derivaciones):
+    """(x, trazos) de la ventana en vivo: la envolvente mín/máx o, si no hay, las muestras tal cual."""
+    if envolvente is not None:
+        return envolvente.trazo()   # ~2 puntos por columna, sea cual sea la ventana
+    # Lo más nuevo a la derecha, como la envolvente (mientras se llena la ventana)
+    return x_ventana[ANCHO_VENTANA - len(derivaciones):], derivaciones
+
+def trazar_una(x, ventana):
+    if current_derivation:
+        linea.set_data(x, ventana[:, INDICE_DERIVACION[current_derivation]])
+
+# --- Vista: señal en vivo o latido promedio, una derivación o las 6, desplazándose o en barrido ---
+# (cambia el eje X, muestra los ejes que tocan y fuerza un dibujo completo)
+def cambiar_vista():
+    global derivacion_escala, vista_escalas_seis
+    seis = ver_seis.get()
+    barrido = ver_barrido.get() and not ver_promedio.get()
+    ax.set_visible(not seis)
+    vista_seis.mostrar(seis)
+    render.trazar = (vista_seis.actualizar if seis else trazar_una) if barrido else None
+    if ver_promedio.get():
+        limites_x = (promediador.tiempo_ms[0], promediador.tiempo_ms[-1])
+        etiqueta = "Tiempo desde el pico R (ms)"
+    elif barrido:
+        limites_x = (0, render.muestras)
+        etiqueta = "Muestras"
     else:
-        try:
-            line_data = ser.readline().decode('utf-8').strip()
-            if ',' in line_data:
-                # Obtenemos el valor CRUDO (RAW)
-                valor_I, valor_II = map(int, line_data.split(','))
-            else:
-                return None
-        except:
-            return None
-
-    # --- 1. FILTRAR SOLO LA NUEVA MUESTRA (Lógica de plotter_ecg.py) ---
-    # Usamos sosfilt. Devuelve la muestra filtrada (y_I) y el *nuevo* estado (zi_I)
-    y_I, zi_I = signal.sosfilt(sos, [valor_I], zi=zi_I)
-    y_II, zi_II = signal.sosfilt(sos, [valor_II], zi=zi_II)
-    
-    # Extraemos el valor numérico del array de un solo elemento
-    y_I_sample = y_I[0]
-    y_II_sample = y_II[0]
-
-    # --- 2. AÑADIR DATOS FILTRADOS A LAS DEQUES ---
-    # La deque se encarga de sacar el valor más antiguo automáticamente
-    data_I_filt.append(y_I_sample)
-    data_II_filt.append(y_II_sample)
-
-    # --- 3. Calcular derivaciones (usando las señales YA filtradas) ---
-    # Convertimos las deques (que tienen MAX_POINTS) a arrays numpy
-    I_filt = np.array(data_I_filt)
-    II_filt = np.array(data_II_filt)
-    
-    derivaciones = {}
-    derivaciones["I"] = I_filt
-    derivaciones["II"] = II_filt
-    derivaciones["III"] = II_filt - I_filt  # Magia de Numpy
-    derivaciones["aVR"] = -(I_filt + II_filt) / 2
-    derivaciones["aVL"] = I_filt - II_filt / 2
-    derivaciones["aVF"] = II_filt - I_filt / 2
-    
-    return derivaciones
-
-# --- Actualizar gráfica (sin cambios, ya recibe datos filtrados) ---
+        limites_x = (0, ANCHO_VENTANA)
+        etiqueta = "Muestras"
+    if seis:
+        vista_seis.fijar_x(*limites_x, etiqueta)
+    else:
+        ax.set_xlim(*limites_x)
+        ax.set_xlabel(etiqueta)
+    derivacion_escala = vista_escalas_seis = None  # La escala se recalcula con la ventana completa
+    render.invalidar()
+
+# --- Texto de estado: adquisición, fs real medida y auto-escala ---
+def texto_estado():
+    p50, p95, p99 = planificador.percentiles()
+    partes = [f"Muestras por tick: {muestras_ultimo_tick}",
+              f"FPS: {planificador.fps():.1f}/{FPS_OBJETIVO} (cuadro p50 {p50:.1f} ms, p95 {p95:.1f} ms, "
+              f"p99 {p99:.1f} ms; saltados {planificador.saltados})",
+              f"Perdidas: {muestras_perdidas}",
+              f"Cambios de escala: {escala.cambios}",
+              f"Latidos promediados: {promediador.n} (rechazados {promediador.rechazados})",
+              f"Latidos sin delinear (fuera del buffer): {delineador.descartados}"]
+    if adquisicion is not None:
+        monitor = adquisicion.monitor
+        partes.append(f"Errores lectura: {adquisicion.errores_lectura}")
+        partes.append(f"Huecos ESP32: {monitor.huecos} ({monitor.muestras_perdidas} muestras)")
+        fs_real = monitor.tasa_real()
+        if fs_real is not None:
+            texto_fs = f"fs real: {fs_real:.1f} Hz (nominal {FS_ADQUISICION} Hz)"
+            if abs(monitor.desviacion()) > TOLERANCIA_FS:
+                bajo, alto = monitor.bordes_reales(lowcut, highcut)
+                texto_fs += f" ¡banda real {bajo:.2f}-{alto:.1f} Hz!"
+            partes.append(texto_fs)
+    if grabador is not None:
+        partes.append(f"Grabadas: {grabador.sesion.muestras}")
+    return " | ".join(partes)
+
+# --- Intervalos: mediana de los últimos latidos ('--' si no se pudo medir) ---
+def texto_intervalos():
+    medianas = delineador.mediana(8)
+    partes = []
+    for nombre, campo in (("PR", "pr_ms"), ("QRS", "qrs_ms"), ("QT", "qt_ms"), ("QTc", "qtc_ms")):
+        valor = medianas[campo]
+        partes.append(f"{nombre}: {valor:.0f} ms" if np.isfinite(valor) else f"{nombre}: --")
+    return "\n".join(partes)
+
+# --- Actualizar gráfica: un cuadro, cuando el planificador decide que toca dibujar ---
 def actualizar_grafica():
-    # La lógica de filtrado ya NO está aquí, está en leer_senales
-    derivaciones = leer_senales()
-
-    if derivaciones and current_derivation:
-        
-        # 'y' ya viene filtrada desde leer_senales()
-        y = derivaciones[current_derivation]
-        # 'x' siempre tendrá MAX_POINTS
-        x = np.arange(len(y))
-        
-        linea.set_data(x, y)
-        ax.set_xlim(0, MAX_POINTS)
+    global plantilla_nueva, eje_nuevo, intervalos_nuevos, muestras_sin_dibujar
+    # La lectura y el filtrado NO están aquí: leer_senales corre en cada tick
+    nuevas_cuadro = muestras_sin_dibujar
+    muestras_sin_dibujar = 0
+    derivaciones = None
+    if nuevas_cuadro:
+        # VENTANA DESLIZANTE: vista de las últimas muestras (solo para la auto-escala)
+        derivaciones = proyector.derivaciones.ultimos(min(MAX_POINTS, CAPACIDAD_BUFFER))
+    estado_label.config(text=texto_estado())
+    frecuencia = detector_qrs.frecuencia_cardiaca()
+    fc_label.config(text=f"FC: {frecuencia:.0f} lpm" if frecuencia else "FC: -- lpm")
+    if eje_nuevo:
+        # Solo en cada latido: mover la flecha es un coords() del canvas de Tk
+        eje_nuevo = False
+        hexaxial.mostrar(estimador_eje.eje)
+        eje_label.config(text=f"Eje: {estimador_eje.eje:.0f}° ({clasificar_eje(estimador_eje.eje)})")
+    if intervalos_nuevos:
+        intervalos_nuevos = False
+        intervalos_label.config(text=texto_intervalos())
+
+    if derivaciones is not None and ver_seis.get():
+        # Las 6 derivaciones salen del mismo buffer del proyector: sin cálculo extra
+        if ver_promedio.get():
+            ventana = promediador.plantilla.T
+            nuevas = len(ventana) if plantilla_nueva else 0
+            x = promediador.tiempo_ms
+            trazos = ventana
+        else:
+            ventana = derivaciones
+            nuevas = nuevas_cuadro
+            trazos = None   # En barrido 'render' pinta solo el tramo nuevo
+            if render.trazar is None:
+                x, trazos = trazo_ventana(derivaciones)
+        plantilla_nueva = False
+        actualizar_escalas_seis(ventana, nuevas)
+        if trazos is not None:
+            vista_seis.actualizar(x, trazos)
+
+        # Un solo blit para los 6 paneles (dibujo completo solo si cambió algún eje Y)
+        render.dibujar()
+
+    elif derivaciones is not None and current_derivation:
         
-        # Mantenemos el auto-ajuste del eje Y
-        if len(y) > 0:
-            rango = np.max(y) - np.min(y)
-            margen = rango * 0.2
-            if margen == 0: margen = 100 # Evitar margen de 0
-            
-            ax.set_ylim(np.min(y) - margen, np.max(y) + margen)
+        indice = INDICE_DERIVACION[current_derivation]
+        if ver_promedio.get():
+            # Latido promedio de la derivación elegida: cambia solo al entrar un latido
+            y = promediador.plantilla[indice]
+            nuevas = len(y) if plantilla_nueva else 0
+            linea.set_data(promediador.tiempo_ms, y)
         else:
-            ax.set_ylim(-1000, 1000) 
-            
-        canvas.draw_idle()
+            # 'y' ya viene filtrada desde leer_senales() (columna de la derivación elegida)
+            y = derivaciones[:, indice]
+            nuevas = nuevas_cuadro
+            if render.trazar is None:
+                # Envolvente mín/máx en ventanas largas (los picos R no se pierden al reducir)
+                x, trazos = trazo_ventana(derivaciones)
+                linea.set_data(x, trazos[:, indice])
+        plantilla_nueva = False
         
-    root.after(50, actualizar_grafica) # Mantenemos 50ms (20 FPS)
+        # Auto-ajuste del eje Y con histéresis: solo cambia (y fuerza un dibujo
+        # completo) si la señal sale de los límites o lleva un rato muy pequeña
+        if actualizar_escala(y, nuevas):
+            ax.set_ylim(*escala.limites)
+            
+        # Blit de la línea sobre el fondo guardado (dibujo completo solo si cambió el eje Y)
+        render.dibujar()
 
 
-# --- Redimensionar (sin cambios) ---
-def redimensionar(event=None):
+# --- Redimensionar: se aplica UNA vez, cuando la ventana deja de cambiar ---
+def redimensionar():
+    # Solo el tamaño final paga el reescalado LANCZOS (y queda en la caché)
     actualizar_portada()
     if current_derivation:
         actualizar_imagen(current_derivation)
-    total_w = right_frame.winfo_width()
-    total_h = right_frame.winfo_height()
-    if total_w > 10 and total_h > 10:
-        fig.set_size_inches(total_w/100.0, (total_h*0.65)/100.0)
-        canvas.draw_idle()
 
 # ------------------- INTERFAZ (sin cambios) -------------------
 root = tk.Tk()
@@ -209,7 +437,7 @@ left_frame.columnconfigure(0, weight=1)
 buttons_frame = ttk.Frame(left_frame)
 buttons_frame.grid(row=0, column=0, sticky="nsew", padx=10, pady=10)
 buttons_frame.columnconfigure((0,1), weight=1)
-buttons_frame.rowconfigure((0,1,2), weight=1)
+buttons_frame.rowconfigure((0,1,2,3,4), weight=1)
 
 botones = [
     ("Derivación I", "I"),
@@ -224,6 +452,21 @@ for i, (texto, nombre) in enumerate(botones):
     btn = ttk.Button(buttons_frame, text=texto, command=lambda n=nombre: actualizar_imagen(n))
     btn.grid(row=i//2, column=i%2, padx=8, pady=8, sticky="nsew")
 
+# Alterna entre la señal en vivo y el latido promedio de la derivación elegida
+ver_promedio = tk.BooleanVar(value=False)
+ttk.Checkbutton(buttons_frame, text="Latido promedio", variable=ver_promedio,
+                command=cambiar_vista).grid(row=3, column=0, padx=8, sticky="w")
+
+# Alterna entre la derivación elegida y las 6 a la vez
+ver_seis = tk.BooleanVar(value=False)
+ttk.Checkbutton(buttons_frame, text="6 derivaciones", variable=ver_seis,
+                command=cambiar_vista).grid(row=3, column=1, padx=8, sticky="w")
+
+# Señal en vivo desplazándose o en barrido (cursor que reescribe de izquierda a derecha)
+ver_barrido = tk.BooleanVar(value=False)
+ttk.Checkbutton(buttons_frame, text="Barrido", variable=ver_barrido,
+                command=cambiar_vista).grid(row=4, column=0, padx=8, sticky="w")
+
 portada_frame = ttk.Frame(left_frame)
 portada_frame.grid(row=1, column=0, sticky="nsew", padx=10, pady=10)
 portada_frame.columnconfigure(0, weight=1)
@@ -232,6 +475,22 @@ portada_frame.rowconfigure(0, weight=1)
 portada_label = tk.Label(portada_frame, bg='white')
 portada_label.grid(row=0, column=0, sticky="nsew")
 
+# Métricas por latido: frecuencia cardiaca (QRS en la derivación II), eje eléctrico e intervalos
+metricas_frame = ttk.Frame(left_frame)
+metricas_frame.grid(row=2, column=0, sticky="ew", padx=10)
+fc_label = ttk.Label(metricas_frame, text="FC: -- lpm", font=("Arial", 18, "bold"))
+fc_label.grid(row=0, column=0, sticky="w")
+eje_label = ttk.Label(metricas_frame, text="Eje: --")
+eje_label.grid(row=1, column=0, sticky="nw")
+intervalos_label = ttk.Label(metricas_frame, text=texto_intervalos())
+intervalos_label.grid(row=2, column=0, sticky="nw")
+hexaxial = VistaHexaxial(metricas_frame, tam=140)
+hexaxial.canvas.grid(row=0, column=1, rowspan=3, padx=(20, 0))
+
+# Estado de la adquisición (muestras consumidas en cada tick)
+estado_label = ttk.Label(left_frame, text="Muestras por tick: 0", wraplength=350)
+estado_label.grid(row=3, column=0, sticky="w", padx=10, pady=(0, 10))
+
 right_frame = ttk.Frame(root)
 right_frame.grid(row=0, column=1, sticky="nsew")
 right_frame.rowconfigure(0, weight=65)
@@ -245,22 +504,46 @@ ax.set_title("Señal ECG Filtrada (Online SOS)") # Título actualizado
 ax.set_xlabel("Muestras")
 ax.set_ylabel("Amplitud (centrada en 0)")
 ax.grid(True, color='gray', alpha=0.3)
-linea, = ax.plot([], [], color='red')
-ax.set_xlim(0, MAX_POINTS)
+# Uniones en bisel (y simplificación de 1 px en el render, más abajo): Agg pinta
+# menos vértices y más rápido (la diferencia no se ve en pantalla)
+linea, = ax.plot([], [], color='red', solid_joinstyle='bevel')
+ax.set_xlim(0, ANCHO_VENTANA)
+
+# Vista de 6 derivaciones (como tests/DerivacionesSimuladas.py, pero en vivo) sobre el
+# mismo lienzo: 6 paneles y una sola línea para las 6 trazas; oculta hasta activarla
+vista_seis = VistaSeisDerivaciones(fig, ANCHO_VENTANA, titulo="Derivaciones I, II, III, aVR, aVL y aVF (en vivo)",
+                                   color='red', linewidth=0.8, solid_joinstyle='bevel')
+vista_seis.mostrar(False)
 
 canvas = FigureCanvasTkAgg(fig, master=right_frame)
 canvas.get_tk_widget().grid(row=0, column=0, sticky='nsew', padx=10, pady=10)
 
+# Render con blitting: el título, la rejilla y las etiquetas se guardan como fondo
+# (las líneas de la vista oculta no se pintan). En modo barrido guarda la ventana
+# en vivo de las 6 derivaciones y solo repinta y copia a Tk la franja nueva.
+# Las líneas se pintan simplificadas con tolerancia de 1 px (sin tocar rcParams)
+render = RenderBarrido(canvas, [linea, vista_seis.linea], MAX_POINTS, canales=6,
+                       hueco=int(HUECO_BARRIDO_S * fs), simplificacion=1.0)
+
 deriv_label = tk.Label(right_frame, bg='white')
 deriv_label.grid(row=1, column=0, sticky='nsew', padx=10, pady=10)
 
-root.bind("<Configure>", redimensionar)
+# Agrupa los <Configure> de la raíz (ignora los de los hijos) y los del canvas:
+# la figura se reescala y se redibuja (recapturando el fondo del blit) UNA vez
+redimension = CoalescedorRedimension(root, redimensionar, retardo_ms=RETARDO_REDIMENSION_MS)
+redimension.seguir_widget(canvas.get_tk_widget(), canvas.resize)
 
 actualizar_portada()
-actualizar_grafica()
+if grabador is not None:
+    grabador.start()
+# Lectura en cada tick y cuadros a FPS_OBJETIVO (menos si dibujar se encarece)
+planificador = PlanificadorCuadros(root, leer_senales, actualizar_grafica, fps=FPS_OBJETIVO)
+planificador.iniciar()
 
 root.mainloop()
 
-if ser is not None and ser.is_open:
-    ser.close()
-    print("Puerto serie cerrado.")
\ No newline at end of file
+# El hilo cierra la fuente dentro de su propio bucle de eventos
+if adquisicion is not None:
+    adquisicion.detener()
+if grabador is not None:
+    grabador.detener()  # Graba lo pendiente y recorta el archivo
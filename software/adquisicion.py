@@ -0,0 +1,226 @@
+# adquisicion.py - Lectura por bloques del puerto serie (ESP32)
+import threading
+import time
+import numpy as np
+
+from buffer_circular import BufferCircular
+from decimacion import Decimador
+from filtro_sos import FiltroSOS
+from protocolo import decodificar_tramas
+from tasa_muestreo import MonitorTasa
+
+# Array vacío reutilizable cuando no hay líneas completas
+_VACIO = np.empty(0, dtype=np.int32)
+_CIFRAS = b"0123456789+-"
+
+
+def _un_par_por_linea(completas):
+    """
+    True si, quitando las cifras, cada línea es exactamente "," + fin de línea:
+    solo entonces separar por espacios da los dos campos de cada línea (si no,
+    "1,2 3,4" pasaría por dos muestras).
+    """
+    lineas = completas.count(b"\n")
+    esqueleto = completas.translate(None, _CIFRAS)
+    return esqueleto == b",\r\n" * lineas or esqueleto == b",\n" * lineas
+
+
+def parsear_bloque(datos, residuo=b""):
+    """
+    Convierte un bloque de bytes "valor_I,valor_II\\r\\n" en dos arrays de enteros.
+    Devuelve (valores_I, valores_II, residuo), donde 'residuo' es la última
+    línea incompleta, que debe anteponerse al siguiente bloque.
+    """
+    buffer = residuo + datos
+    corte = buffer.rfind(b"\n")
+    if corte < 0:
+        return _VACIO, _VACIO, buffer
+
+    completas = buffer[:corte + 1]
+    residuo = buffer[corte + 1:]
+
+    # --- Camino rápido: todas las líneas son "int,int" (un par por línea) ---
+    if _un_par_por_linea(completas):
+        campos = completas.replace(b",", b" ").split()
+        if len(campos) == 2 * completas.count(b"\n"):
+            try:
+                pares = np.array(campos).astype(np.int32).reshape(-1, 2)
+                return pares[:, 0], pares[:, 1], residuo
+            except ValueError:
+                pass
+
+    # --- Camino lento: hay líneas inválidas (ej. mensaje de arranque) ---
+    valores_I = []
+    valores_II = []
+    for linea in completas.split(b"\n"):
+        partes = linea.strip().split(b",")
+        if len(partes) != 2:
+            continue
+        try:
+            v_I, v_II = int(partes[0]), int(partes[1])
+        except ValueError:
+            continue
+        valores_I.append(v_I)
+        valores_II.append(v_II)
+    return (np.array(valores_I, dtype=np.int32),
+            np.array(valores_II, dtype=np.int32),
+            residuo)
+
+
+def leer_bloque(ser, residuo=b""):
+    """
+    Lee TODO lo pendiente en el buffer del puerto (ser.in_waiting) sin bloquear
+    y lo convierte con parsear_bloque(). Devuelve (valores_I, valores_II, residuo).
+    """
+    pendientes = ser.in_waiting
+    if pendientes <= 0:
+        return _VACIO, _VACIO, residuo
+    return parsear_bloque(ser.read(pendientes), residuo)
+
+
+def leer_agrupado(ser, bytes_minimos=1024, rebanada_s=0.02, detener=None):
+    """
+    Espera (hasta el 'timeout' del puerto) el primer byte y sigue juntando lo
+    que llegue durante 'rebanada_s' o hasta 'bytes_minimos'. Leer solo
+    in_waiting da lecturas de pocos bytes en las que domina el coste fijo de
+    decodificar (en binario, más que el de parsear ASCII).
+    'detener' (threading.Event) corta la espera al cerrar.
+    """
+    datos = ser.read(max(1, ser.in_waiting))
+    limite = time.perf_counter() + rebanada_s
+    while len(datos) < bytes_minimos and not (detener is not None and detener.is_set()):
+        espera = limite - time.perf_counter()
+        if espera <= 0:
+            break
+        pendientes = ser.in_waiting
+        if pendientes:
+            datos += ser.read(min(pendientes, bytes_minimos - len(datos)))
+        else:
+            time.sleep(min(espera, 0.002))
+    return datos
+
+
+class FlujoBytes:
+    """
+    Sustituto en memoria de serial.Serial (in_waiting, read, is_open) para
+    probar el parser ASCII o el decodificador binario sin un ESP32 conectado.
+    Si no hay datos, read() espera 'timeout' segundos como haría el puerto.
+    """
+
+    def __init__(self, datos=b"", timeout=0.01):
+        self._datos = bytearray(datos)
+        self.timeout = timeout
+        self.is_open = True
+
+    def escribir(self, datos):
+        self._datos += datos
+
+    @property
+    def in_waiting(self):
+        return len(self._datos)
+
+    def read(self, n=1):
+        if not self._datos:
+            time.sleep(self.timeout)
+        leidos = bytes(self._datos[:n])
+        del self._datos[:n]
+        return leidos
+
+    def close(self):
+        self.is_open = False
+
+
+class Decodificador:
+    """
+    Convierte bytes del ESP32 en muestras según 'protocolo' ("ascii" o
+    "binario"), guardando entre llamadas el residuo (línea o trama incompleta).
+    Lo comparten HiloAdquisicion y el lector asíncrono de fuentes.py.
+    """
+
+    def __init__(self, protocolo="ascii"):
+        if protocolo not in ("ascii", "binario"):
+            raise ValueError(f"Protocolo desconocido: {protocolo}")
+        self.protocolo = protocolo
+        self.bytes_descartados = 0  # Modo binario: bytes fuera de tramas válidas
+        self._residuo = b""
+
+    def decodificar(self, datos):
+        """Devuelve (valores_I, valores_II, secuencias); 'secuencias' es None en ASCII."""
+        if self.protocolo == "binario":
+            valores_I, valores_II, secuencias, self._residuo, descartados = \
+                decodificar_tramas(datos, self._residuo)
+            self.bytes_descartados += descartados
+            return valores_I, valores_II, secuencias
+        valores_I, valores_II, self._residuo = parsear_bloque(datos, self._residuo)
+        return valores_I, valores_II, None
+
+
+class HiloAdquisicion(threading.Thread):
+    """
+    Hilo dedicado que es DUEÑO del puerto serie: lee, parsea y filtra (SOS)
+    las derivaciones I y II y escribe el resultado en dos BufferCircular
+    preasignados ('crudos' y 'filtrados', columnas [I, II]).
+    La interfaz solo lee de esos buffers, nunca toca 'ser'.
+    'protocolo' es "ascii" (por defecto) o "binario" (firmware con MODO_BINARIO 1).
+    Si se da 'fs' (nominal), 'monitor' mide la fs real, el jitter y, en modo
+    binario, las muestras perdidas según los números de secuencia.
+    Con 'decimacion' > 1, 'fs' es la frecuencia de ADQUISICIÓN: 'crudos' la
+    conserva y 'filtrados' queda a fs / decimacion (el 'sos' debe estar
+    diseñado para esa frecuencia reducida).
+    Cada lectura junta hasta 'rebanada_s' de datos (ver leer_agrupado).
+    """
+
+    def __init__(self, ser, sos, capacidad=8192, protocolo="ascii", fs=None, decimacion=1,
+                 rebanada_s=0.02):
+        super().__init__(daemon=True)
+        self.decodificador = Decodificador(protocolo)
+        self.ser = ser
+        self.sos = sos
+        self.protocolo = protocolo
+        self.decimador = Decimador(decimacion, canales=2)
+        self.filtro = FiltroSOS(sos, canales=2)
+        # 'crudos' cubre el mismo tiempo que 'filtrados' a la fs de adquisición
+        self.crudos = BufferCircular(capacidad * self.decimador.factor, 2, dtype=np.int32)
+        self.filtrados = BufferCircular(capacidad, 2)
+        self.errores_lectura = 0   # Excepciones del puerto o de decodificación
+        self.monitor = MonitorTasa(fs) if fs else None
+        self.rebanada_s = rebanada_s
+        self._detener = threading.Event()
+
+    def run(self):
+        while not self._detener.is_set():
+            try:
+                # Bloquea hasta 'timeout' esperando al menos un byte (fuera de Tk)
+                # y junta lo que llegue en 'rebanada_s'
+                datos = leer_agrupado(self.ser, rebanada_s=self.rebanada_s, detener=self._detener)
+                valores_I, valores_II, secuencias = self.decodificador.decodificar(datos)
+            except Exception:
+                self.errores_lectura += 1
+                if not self.ser.is_open:
+                    break
+                continue
+
+            if len(valores_I) == 0:
+                continue
+            self._procesar(np.column_stack((valores_I, valores_II)), secuencias)
+
+    def _procesar(self, bloque, secuencias, t=None):
+        """Un bloque (N, 2) [I, II] decodificado: monitor, crudos, decimación y filtro."""
+        if self.monitor is not None:
+            self.monitor.registrar(len(bloque), secuencias, t=t)
+        self.crudos.escribir(bloque)
+        # Anti-alias + decimación y un solo sosfilt para las dos derivaciones
+        bloque = self.decimador.decimar(bloque)
+        if len(bloque):
+            self.filtrados.escribir(self.filtro.filtrar(bloque))
+
+    @property
+    def bytes_descartados(self):
+        """Modo binario: bytes fuera de tramas válidas."""
+        return self.decodificador.bytes_descartados
+
+    def detener(self, espera=2.0):
+        """Pide al hilo que termine y espera a que suelte el puerto."""
+        self._detener.set()
+        if self.is_alive():
+            self.join(espera)
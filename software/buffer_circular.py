@@ -0,0 +1,74 @@
+# buffer_circular.py - Buffer circular de NumPy (un escritor, un lector, sin locks)
+import numpy as np
+
+
+class BufferCircular:
+    """
+    Buffer circular preasignado de forma (capacidad, canales).
+
+    Cada muestra se escribe DOS veces (en i y en i + capacidad), así cualquier
+    ventana de hasta 'capacidad' muestras es un slice contiguo: las lecturas
+    devuelven vistas sin copiar. Pensado para un solo hilo escritor y un solo
+    lector: el escritor actualiza 'escritas' DESPUÉS de copiar los datos.
+    """
+
+    def __init__(self, capacidad, canales=2, dtype=np.float64):
+        self.capacidad = capacidad
+        self.canales = canales
+        self._datos = np.zeros((2 * capacidad, canales), dtype=dtype)
+        self.escritas = 0        # Total de muestras escritas (monotónico)
+        self.descartadas = 0     # Muestras de bloques que no cabían en el buffer
+
+    def escribir(self, bloque):
+        """Añade un bloque (n, canales). Si n > capacidad solo se guarda el final."""
+        n = len(bloque)
+        if n == 0:
+            return
+        cap = self.capacidad
+        if n > cap:
+            self.descartadas += n - cap
+            bloque = bloque[n - cap:]
+            inicio_total = self.escritas + n - cap
+            n = cap
+        else:
+            inicio_total = self.escritas
+
+        pos = inicio_total % cap
+        k = min(n, cap - pos)
+        self._datos[pos:pos + k] = bloque[:k]
+        self._datos[pos + cap:pos + cap + k] = bloque[:k]
+        if k < n:
+            self._datos[:n - k] = bloque[k:]
+            self._datos[cap:cap + n - k] = bloque[k:]
+
+        # Publicamos las muestras solo cuando ya están copiadas
+        self.escritas = inicio_total + n
+
+    def _ventana(self, escritas, n):
+        fin = self.capacidad + escritas % self.capacidad
+        return self._datos[fin - n:fin]
+
+    def ultimos(self, n):
+        """Vista (sin copia) de las últimas n muestras, de la más antigua a la más nueva."""
+        return self._ventana(self.escritas, n)
+
+    def entre(self, inicio, fin):
+        """
+        Vista de las muestras [inicio, fin) en índices absolutos (los de 'escritas').
+        Solo es válida si fin - inicio <= capacidad y el escritor no las sobrescribió.
+        """
+        return self._ventana(fin, fin - inicio)
+
+    def desde(self, cursor):
+        """
+        Devuelve (vista, nuevo_cursor, perdidas) con las muestras escritas desde
+        'cursor'. 'perdidas' cuenta las muestras que el escritor ya sobrescribió
+        antes de que el lector llegara a leerlas (desborde del lector).
+        """
+        escritas = self.escritas
+        pendientes = escritas - cursor
+        perdidas = 0
+        if pendientes > self.capacidad:
+            perdidas = pendientes - self.capacidad
+            pendientes = self.capacidad
+        return self._ventana(escritas, pendientes), escritas, perdidas
@@ -0,0 +1,50 @@
+# cache_imagenes.py - Imágenes de referencia decodificadas una vez y reescaladas con caché LRU
+from collections import OrderedDict
+
+from PIL import Image, ImageTk
+
+
+class CacheImagenes:
+    """
+    Guarda las imágenes fuente ya decodificadas (se leen del disco UNA vez) y
+    las versiones reescaladas como ImageTk.PhotoImage, con clave
+    (nombre, ancho, alto) y desalojo LRU cuando se supera 'capacidad'.
+    """
+
+    def __init__(self, capacidad=32):
+        self.capacidad = capacidad
+        self._fuentes = {}
+        self._reescaladas = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def cargar(self, nombre, ruta):
+        """Decodifica 'ruta' y la guarda como fuente 'nombre'. Devuelve False si no existe."""
+        try:
+            with Image.open(ruta) as img:
+                img.load()
+                self._fuentes[nombre] = img.copy()
+            return True
+        except (FileNotFoundError, OSError):
+            return False
+
+    def obtener(self, nombre, ancho, alto):
+        """
+        PhotoImage de 'nombre' reescalada (manteniendo proporción) para caber en
+        ancho x alto. Lanza KeyError si la fuente no se pudo cargar.
+        """
+        clave = (nombre, ancho, alto)
+        foto = self._reescaladas.get(clave)
+        if foto is not None:
+            self._reescaladas.move_to_end(clave)
+            self.aciertos += 1
+            return foto
+
+        self.fallos += 1
+        img = self._fuentes[nombre].copy()
+        img.thumbnail((ancho, alto), Image.LANCZOS)
+        foto = ImageTk.PhotoImage(img)
+        self._reescaladas[clave] = foto
+        if len(self._reescaladas) > self.capacidad:
+            self._reescaladas.popitem(last=False)
+        return foto
@@ -1,24 +1,24 @@
 import tkinter as tk
 from tkinter import ttk
 import numpy as np
-import serial
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from scipy import signal  # <--- IMPORTANTE: Añadido Scipy
-
-# --- CONFIGURACIÓN SERIE (ESP32) ---
-SERIAL_PORT = 'COM4'  # Ajusta según tu sistema (ej. 'COM3' en Windows)
-BAUD_RATE = 115200
-
-try:
-    ser = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=1)
-    print("Conexión exitosa con ESP32")
-except Exception as e:
-    print(f"Error: {e}")
-    print("No se pudo abrir el puerto serie, se usarán señales simuladas")
-    ser = None
+from fuentes import abrir_adquisicion
+from filtro_sos import FiltroSOS
+from buffer_circular import BufferCircular
+from derivaciones import calcular_derivaciones, INDICE_DERIVACION
+from render_blit import RenderBlit
+from escala_y import EscalaHisteresis
+from planificador import PlanificadorCuadros
+
+# --- ENTRADA (ESP32) ---
+# "serie:COM4:115200", "tcp:192.168.4.1:3333", "archivo:captura.bin[:bytes_por_s]" o "simulacion"
+FUENTE = 'serie:COM4:115200'  # Ajusta el puerto según tu sistema (ej. 'COM3' en Windows)
+SIMULAR_SI_FALLA = True  # False: si la fuente no abre, error en vez de señales simuladas
 
 MAX_POINTS = 500  # Puntos a mostrar
+FPS_OBJETIVO = 30  # Cuadros por segundo buscados (la lectura del puerto no se salta)
 
 fs = 333.33 
 lowcut = 0.5 
@@ -28,159 +28,157 @@ order = 4
 sos = signal.butter(order, [lowcut, highcut], btype='band', fs=fs, output='sos')
 print(f"Filtro: Pasa-banda Butterworth (SOS) orden {order}, f_corte=[{lowcut}, {highcut}] Hz")
 
-# --- VARIABLES GLOBALES ---
-# Listas para datos CRUDOS (para gráficas 1 y 2)
-data_I_raw = []   
-data_II_raw = []  
-
-# Listas para datos FILTRADOS (para cálculos y gráfica 3)
-data_I_filt = []
-data_II_filt = []
+# --- HILO DE ADQUISICIÓN (lee, parsea y filtra fuera de Tk) ---
+adquisicion = abrir_adquisicion(FUENTE, sos, simular_si_falla=SIMULAR_SI_FALLA, capacidad=4 * MAX_POINTS)
 
-# Estado interno del filtro (para filtrado online)
-zi_I = signal.sosfilt_zi(sos)
-zi_II = signal.sosfilt_zi(sos)
+# --- VARIABLES GLOBALES ---
+# Buffers circulares [I, II] (sustituyen a las listas con pop(0), que era O(n));
+# con ESP32 son los del hilo
+if adquisicion is not None:
+    crudos = adquisicion.crudos        # Datos CRUDOS (gráficas 1 y 2)
+    filtrados = adquisicion.filtrados  # Datos FILTRADOS (cálculos y gráfica 3)
+else:
+    crudos = BufferCircular(MAX_POINTS, 2)
+    filtrados = BufferCircular(MAX_POINTS, 2)
+cursor_lectura = 0  # Muestras del hilo ya contadas
+
+# Eje X y derivaciones calculadas (6, MAX_POINTS), preasignados (se reescriben en cada cuadro)
+x_axis = np.arange(MAX_POINTS)
+derivaciones = np.zeros((6, MAX_POINTS))
+
+# Nombre del botón -> fila de 'derivaciones'
+FILA_SENAL = {"I (Filt)": INDICE_DERIVACION["I"], "II (Filt)": INDICE_DERIVACION["II"],
+              "III": INDICE_DERIVACION["III"], "aVR": INDICE_DERIVACION["aVR"],
+              "aVL": INDICE_DERIVACION["aVL"], "aVF": INDICE_DERIVACION["aVF"]}
+
+# Filtro online por bloques para la simulación: guarda el estado interno (zi) de I y II
+filtro = FiltroSOS(sos, canales=2)
+
+# Auto-escala con histéresis de cada gráfica (sustituye a relim/autoscale_view)
+escala1 = EscalaHisteresis(MAX_POINTS, decaimiento=int(2 * fs))
+escala2 = EscalaHisteresis(MAX_POINTS, decaimiento=int(2 * fs))
+escala3 = EscalaHisteresis(MAX_POINTS, decaimiento=int(2 * fs))
+senal_escala3 = None  # Señal que está siguiendo escala3
 
 running = True  # Bandera para el bucle principal
+muestras_sin_dibujar = 0  # Leídas desde el último cuadro
 plot3_signal_name = "III"  # Qué mostrar en la gráfica 3 por defecto
 
 # --- FUNCIONES DE PROCESAMIENTO ---
 
 def leer_y_filtrar_senales():
     """
-    Lee I y II del puerto serie.
-    1. Almacena los datos crudos en data_I_raw, data_II_raw.
-    2. Filtra los datos y almacena el resultado en data_I_filt, data_II_filt.
+    Con ESP32 el hilo ya leyó y filtró: solo se cuentan las muestras nuevas.
+    En simulación genera una muestra, la filtra y la guarda en 'crudos' y
+    'filtrados'. Devuelve el número de muestras nuevas.
     """
-    global data_I_raw, data_II_raw, data_I_filt, data_II_filt, zi_I, zi_II
-    
-    if ser is None:
-        # --- Simulación si no hay ESP32 ---
-        t = len(data_I_raw) * 0.05
-        valor_I_raw = int(2048 + 1000 * np.sin(t) + np.random.uniform(-50, 50))
-        valor_II_raw = int(2048 + 800 * np.sin(t - 0.5) + np.random.uniform(-50, 50))
-    else:
-        try:
-            line_data = ser.readline().decode('utf-8').strip()
-            if ',' in line_data:
-                valor_I_raw, valor_II_raw = map(int, line_data.split(','))
-            else:
-                return  # Ignorar línea si no es válida
-        except Exception as e:
-            print(f"Error leyendo serial: {e}")
-            return
-
-    # --- 1. FILTRAR LA NUEVA MUESTRA (ONLINE) ---
-    y_I, zi_I = signal.sosfilt(sos, [valor_I_raw], zi=zi_I)
-    y_II, zi_II = signal.sosfilt(sos, [valor_II_raw], zi=zi_II)
-    
-    valor_I_filt = y_I[0]
-    valor_II_filt = y_II[0]
-
-    # --- 2. AÑADIR DATOS A LAS LISTAS (CRUDOS Y FILTRADOS) ---
-    data_I_raw.append(valor_I_raw)
-    data_II_raw.append(valor_II_raw)
-    data_I_filt.append(valor_I_filt)
-    data_II_filt.append(valor_II_filt)
-
-    # --- 3. MANTENER EL TAMAÑO DE LAS LISTAS ---
-    if len(data_I_raw) > MAX_POINTS:
-        data_I_raw.pop(0)
-        data_II_raw.pop(0)
-        data_I_filt.pop(0)
-        data_II_filt.pop(0)
-
-def calcular_derivaciones():
-    """
-    Calcula todas las derivaciones a partir de las listas
-    de datos YA FILTRADOS (data_I_filt, data_II_filt).
-    """
-    # Convertimos a arrays de numpy para cálculo vectorial
-    filt_I = np.array(data_I_filt)
-    filt_II = np.array(data_II_filt)
-    
-    derivaciones = {}
-    
-    # Añadimos las propias I y II filtradas para poder verlas
-    derivaciones["I (Filt)"] = filt_I
-    derivaciones["II (Filt)"] = filt_II
-    
-    # Triángulo de Einthoven
-    derivaciones["III"] = filt_II - filt_I
-    
-    # Leyes de Goldberger
-    derivaciones["aVR"] = -(filt_I + filt_II) / 2
-    derivaciones["aVL"] = filt_I - (filt_II / 2)
-    derivaciones["aVF"] = filt_II - (filt_I / 2)
-    
-    return derivaciones
+    global cursor_lectura
+
+    if adquisicion is not None:
+        nuevas, cursor_lectura, _ = crudos.desde(cursor_lectura)
+        return len(nuevas)
+
+    # --- Simulación si no hay ESP32 ---
+    t = min(crudos.escritas, MAX_POINTS) * 0.05
+    valor_I_raw = int(2048 + 1000 * np.sin(t) + np.random.uniform(-50, 50))
+    valor_II_raw = int(2048 + 800 * np.sin(t - 0.5) + np.random.uniform(-50, 50))
+    bloque = np.array([[valor_I_raw, valor_II_raw]])
+
+    # --- 1. FILTRAR EL BLOQUE NUEVO (ONLINE) ---
+    filtradas = filtro.filtrar(bloque)
+
+    # --- 2. AÑADIR DATOS A LOS BUFFERS (CRUDOS Y FILTRADOS) ---
+    # El buffer circular descarta lo más antiguo, ya no hay que recortar listas
+    crudos.escribir(bloque)
+    filtrados.escribir(filtradas)
+    return len(bloque)
 
 # --- FUNCIONES DE LA INTERFAZ ---
 
+def leer_tick():
+    """Cada tick del planificador: cuenta lo leído aunque no toque dibujar."""
+    global muestras_sin_dibujar
+    muestras_sin_dibujar += leer_y_filtrar_senales()
+
 def actualizar_grafica():
-    """Bucle principal que lee, procesa y dibuja."""
+    """Un cuadro con lo leído desde el anterior (lo llama el planificador cuando toca)."""
+    global senal_escala3, muestras_sin_dibujar
     if not running:
         return
 
-    leer_y_filtrar_senales()
+    nuevas = muestras_sin_dibujar
+    muestras_sin_dibujar = 0
     
-    if len(data_I_raw) < 2:
+    # Mientras el buffer se llena mostramos solo las muestras ya recibidas
+    n = min(crudos.escritas, MAX_POINTS)
+    if n < 2:
         # Esperar a tener al menos algunos datos
-        root.after(20, actualizar_grafica)
         return
 
-    # 1. Preparar datos crudos
-    x_axis = np.arange(len(data_I_raw))
+    # 1. Preparar datos crudos (vistas del buffer circular)
+    x = x_axis[:n]
+    ventana_cruda = crudos.ultimos(n)
     
-    # 2. Calcular derivaciones (usa datos filtrados internamente)
-    derivaciones = calcular_derivaciones()
+    # 2. Calcular las 6 derivaciones de la ventana filtrada (una sola matmul)
+    senales = calcular_derivaciones(filtrados.ultimos(n), out=derivaciones[:, :n])
 
     # 3. Actualizar líneas de las gráficas
     try:
         # Gráfica 1: RAW I
-        linea1.set_data(x_axis, data_I_raw)
+        linea1.set_data(x, ventana_cruda[:, 0])
         
         # Gráfica 2: RAW II
-        linea2.set_data(x_axis, data_II_raw)
+        linea2.set_data(x, ventana_cruda[:, 1])
         
         # Gráfica 3: Señal seleccionada (calculada a partir de datos filtrados)
-        if plot3_signal_name in derivaciones:
-            y3 = derivaciones[plot3_signal_name]
-            if len(y3) == len(x_axis): # Asegurar que las longitudes coincidan
-                linea3.set_data(x_axis, y3)
+        y3 = senales[FILA_SENAL.get(plot3_signal_name, FILA_SENAL["III"])]
+        if len(y3) == len(x): # Asegurar que las longitudes coincidan
+            linea3.set_data(x, y3)
         
-        # 4. Autorango (Ajuste automático del eje Y)
+        # 4. Autorango con histéresis (solo recorre las muestras nuevas)
         # Nota: El autorango en datos crudos puede ser muy "ruidoso"
-        ax1.relim()
-        ax1.autoscale_view(scalex=False, scaley=True)
+        k = n - min(nuevas, n)
+        if escala1.actualizar(ventana_cruda[k:, 0]):
+            ax1.set_ylim(*escala1.limites)
         
-        ax2.relim()
-        ax2.autoscale_view(scalex=False, scaley=True)
+        if escala2.actualizar(ventana_cruda[k:, 1]):
+            ax2.set_ylim(*escala2.limites)
         
-        ax3.relim()
-        ax3.autoscale_view(scalex=False, scaley=True)
+        if senal_escala3 != plot3_signal_name:
+            # Cambió la señal de la gráfica 3: recorremos su ventana completa
+            senal_escala3 = plot3_signal_name
+            cambio3 = escala3.reiniciar(y3)
+        else:
+            cambio3 = escala3.actualizar(y3[k:])
+        if cambio3:
+            ax3.set_ylim(*escala3.limites)
         
-        canvas.draw_idle()
+        # Blit de las 3 líneas; dibujo completo solo si algún eje cambió de límites
+        render.dibujar()
     
     except Exception as e:
         print(f"Error al dibujar: {e}") # Errores durante el ploteo
 
-    # 5. Reprogramar
-    root.after(30, actualizar_grafica) # Ajusta el 'after' según sea necesario
+    # 5. Rendimiento del dibujo (fps lograda y tiempo por cuadro)
+    p50, p95, p99 = planificador.percentiles()
+    fps_label.config(text=f"FPS {planificador.fps():.1f}/{FPS_OBJETIVO} | cuadro p50 {p50:.1f} ms, "
+                          f"p95 {p95:.1f} ms, p99 {p99:.1f} ms | saltados {planificador.saltados}")
 
 def set_plot3(nombre):
     """Función llamada por los botones."""
     global plot3_signal_name
     plot3_signal_name = nombre
     ax3.set_title(f"Señal Calculada (Desde Filtro): {nombre}")
+    render.invalidar()  # El título es parte del fondo guardado
 
 def on_closing():
     """Maneja el cierre limpio de la app."""
     global running
     print("Cerrando aplicación...")
     running = False
-    if ser:
-        ser.close()
+    planificador.detener()
+    if adquisicion is not None:
+        adquisicion.detener()  # Cierra la fuente en el bucle del hilo
     root.destroy()
 
 # ------------------- INTERFAZ (GUI) -------------------
@@ -222,6 +220,9 @@ ax3.set_xlim(0, MAX_POINTS)
 canvas = FigureCanvasTkAgg(fig, master=plot_frame)
 canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
 
+# Render con blitting de las 3 líneas sobre el fondo estático
+render = RenderBlit(canvas, [linea1, linea2, linea3])
+
 # --- Frame de Controles (Abajo) ---
 control_frame = ttk.Frame(root)
 control_frame.pack(fill=tk.X, side=tk.BOTTOM, pady=10)
@@ -233,7 +234,12 @@ for nombre in botones:
                      command=lambda n=nombre: set_plot3(n))
     btn.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
 
+fps_label = ttk.Label(control_frame, text="FPS --")
+fps_label.pack(side=tk.RIGHT, padx=5)
+
 # --- INICIO ---
 root.protocol("WM_DELETE_WINDOW", on_closing)
-root.after(100, actualizar_grafica)  # Inicia el bucle
+# Lectura en cada tick y cuadros a FPS_OBJETIVO (menos si dibujar se encarece)
+planificador = PlanificadorCuadros(root, leer_tick, actualizar_grafica, fps=FPS_OBJETIVO)
+root.after(100, planificador.iniciar)  # Inicia el bucle
 root.mainloop()
\ No newline at end of file
@@ -0,0 +1,63 @@
+# decimacion.py - Filtro anti-alias + decimación polifásica por bloques (antes del SOS)
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy import signal
+
+
+class Decimador:
+    """
+    Reduce la frecuencia de muestreo en un factor entero 'factor' con un FIR
+    anti-alias (firwin, corte en 'corte' x la nueva Nyquist) y estado persistente.
+
+    Solo se calculan las salidas que se conservan (una de cada 'factor'),
+    que es lo que hace una implementación polifásica: el coste por muestra
+    de entrada es taps / factor multiplicaciones. Por bloques da el mismo
+    resultado que signal.lfilter(taps, 1, x)[::factor] sobre toda la señal.
+    Retardo de grupo: (len(taps) - 1) / 2 muestras de ENTRADA.
+    Con factor 1 los bloques pasan sin tocar.
+    """
+
+    def __init__(self, factor, canales=2, taps_por_fase=16, corte=0.8):
+        factor = int(factor)
+        if factor < 1:
+            raise ValueError(f"Factor de decimación inválido: {factor}")
+        self.factor = factor
+        self.canales = canales
+        if factor == 1:
+            self.taps = np.ones(1)
+        else:
+            self.taps = signal.firwin(taps_por_fase * factor + 1, corte / factor)
+        # Producto con la ventana [x(n-L+1) ... x(n)]: taps invertidos
+        self._taps_invertidos = self.taps[::-1].copy()
+        self._historia = np.zeros((len(self.taps) - 1, canales))
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Historia a cero; la siguiente muestra de entrada produce una salida."""
+        self._historia[:] = 0
+        self._fase = len(self.taps) - 1  # Índice (en historia + bloque) de la próxima salida
+
+    def decimar(self, bloque):
+        """Decima un bloque (muestras, canales). Devuelve (muestras // factor aprox., canales)."""
+        if self.factor == 1:
+            return bloque
+        bloque = np.asarray(bloque, dtype=np.float64)
+        if len(bloque) == 0:
+            return np.empty((0, self.canales))
+
+        largo = len(self.taps)
+        x = np.concatenate((self._historia, bloque))
+        primera = self._fase - (largo - 1)
+        if primera > len(x) - largo:
+            # El bloque no llega a la próxima salida: solo se acumula historia
+            salida = np.empty((0, self.canales))
+            n_salidas = 0
+        else:
+            # Ventanas (salidas, canales, taps) con paso 'factor': vista sin copia
+            ventanas = sliding_window_view(x, largo, axis=0)[primera::self.factor]
+            salida = ventanas @ self._taps_invertidos
+            n_salidas = len(salida)
+
+        self._fase += n_salidas * self.factor - (len(x) - (largo - 1))
+        self._historia[:] = x[len(x) - (largo - 1):]
+        return salida
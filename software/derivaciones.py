@@ -0,0 +1,56 @@
+# derivaciones.py - Las 6 derivaciones frontales a partir de I y II (una matmul)
+import numpy as np
+
+from buffer_circular import BufferCircular
+
+NOMBRES_DERIVACIONES = ("I", "II", "III", "aVR", "aVL", "aVF")
+INDICE_DERIVACION = {nombre: i for i, nombre in enumerate(NOMBRES_DERIVACIONES)}
+
+# Matriz de proyección 6x2: cada fila da una derivación a partir de [I, II]
+MATRIZ_DERIVACIONES = np.array([
+    [ 1.0,  0.0],   # I
+    [ 0.0,  1.0],   # II
+    [-1.0,  1.0],   # III = II - I            (Einthoven)
+    [-0.5, -0.5],   # aVR = -(I + II) / 2     (Goldberger)
+    [ 1.0, -0.5],   # aVL = I - II / 2
+    [-0.5,  1.0],   # aVF = II - I / 2
+])
+MATRIZ_DERIVACIONES.flags.writeable = False
+
+
+def calcular_derivaciones(bloque, out=None):
+    """
+    Calcula las 6 derivaciones de un bloque (N, 2) con columnas [I, II].
+    Devuelve un array (6, N); si se da 'out' (preasignado) se escribe ahí.
+    """
+    bloque = np.asarray(bloque, dtype=np.float64)
+    if out is None:
+        out = np.empty((len(NOMBRES_DERIVACIONES), len(bloque)))
+    return np.matmul(MATRIZ_DERIVACIONES, bloque.T, out=out)
+
+
+def calcular_derivacion(bloque, nombre, out=None):
+    """Calcula SOLO la derivación 'nombre' de un bloque (N, 2). Devuelve (N,)."""
+    bloque = np.asarray(bloque, dtype=np.float64)
+    return np.matmul(bloque, MATRIZ_DERIVACIONES[INDICE_DERIVACION[nombre]], out=out)
+
+
+class ProyectorDerivaciones:
+    """
+    Modo incremental: proyecta solo las muestras NUEVAS de [I, II] y las añade
+    a un buffer circular de 6 canales ('derivaciones', columnas en el orden de
+    NOMBRES_DERIVACIONES). El trabajo por cuadro es proporcional a lo nuevo.
+    """
+
+    def __init__(self, capacidad):
+        self.derivaciones = BufferCircular(capacidad, len(NOMBRES_DERIVACIONES))
+        self._bloque = np.empty((capacidad, len(NOMBRES_DERIVACIONES)))
+
+    def proyectar(self, nuevas):
+        """Añade las derivaciones de un bloque (n, 2) de muestras nuevas [I, II]."""
+        if len(nuevas) > len(self._bloque):
+            nuevas = nuevas[-len(self._bloque):]
+        salida = self._bloque[:len(nuevas)]
+        np.matmul(nuevas, MATRIZ_DERIVACIONES.T, out=salida)
+        self.derivaciones.escribir(salida)
+        return salida
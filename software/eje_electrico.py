@@ -0,0 +1,90 @@
+# eje_electrico.py - Eje eléctrico del QRS en el plano frontal (derivaciones I y aVF), latido a latido
+import numpy as np
+
+from derivaciones import INDICE_DERIVACION
+
+# En el triángulo de Einthoven: I = E cos(θ), aVF = (√3 / 2) E sin(θ)
+FACTOR_AVF = 2.0 / np.sqrt(3.0)
+
+
+def amplitud_neta(segmentos, n_base):
+    """
+    Amplitud neta del QRS (máximo + mínimo respecto a la línea de base) de uno
+    o varios segmentos (..., muestras). Las primeras 'n_base' muestras
+    (segmento PR) dan la línea de base; el resto es el QRS.
+    """
+    base = segmentos[..., :n_base].mean(axis=-1, keepdims=True)
+    qrs = segmentos[..., n_base:] - base
+    return qrs.max(axis=-1) + qrs.min(axis=-1)
+
+
+def eje_qrs(segmentos_I, segmentos_aVF, n_base):
+    """Eje en grados (-180, 180] de uno o varios latidos a la vez (vectorizado sobre los ejes previos)."""
+    return np.degrees(np.arctan2(FACTOR_AVF * amplitud_neta(segmentos_aVF, n_base),
+                                 amplitud_neta(segmentos_I, n_base)))
+
+
+def clasificar_eje(grados):
+    """Interpretación clásica del eje frontal."""
+    if grados is None:
+        return "--"
+    if -30 <= grados <= 90:
+        return "Normal"
+    if -90 <= grados < -30:
+        return "Desviación izquierda"
+    if 90 < grados <= 180:
+        return "Desviación derecha"
+    return "Eje extremo"
+
+
+class EjeElectrico:
+    """
+    Estimador incremental del eje del QRS. Por cada pico R recorta del buffer
+    de 6 derivaciones solo I y aVF en [R - 100 ms, R + 60 ms] (40 ms de línea
+    de base + QRS) y calcula el eje de ese latido ('eje_ultimo').
+    'eje' es el promedio circular con olvido exponencial ('alfa') de los
+    vectores unitarios de cada latido: memoria constante, coste O(ventana)
+    por latido.
+    """
+
+    def __init__(self, fs, alfa=0.2, base_s=0.04, antes_s=0.06, despues_s=0.06):
+        self.alfa = alfa
+        self.n_base = max(1, int(round(base_s * fs)))
+        self.antes = self.n_base + int(round(antes_s * fs))
+        self.despues = int(round(despues_s * fs))
+        self._columnas = [INDICE_DERIVACION["I"], INDICE_DERIVACION["aVF"]]
+        self._pendientes = []
+        self._vector = None   # Promedio de (cos, sin)
+        self.eje_ultimo = None
+        self.eje = None
+        self.latidos = 0
+
+    def agregar(self, indices_r):
+        """Anota picos R (mismos índices absolutos que el buffer de derivaciones)."""
+        self._pendientes.extend(indices_r)
+
+    def actualizar(self, derivaciones):
+        """Procesa los latidos cuyo QRS ya está completo. Devuelve True si el eje cambió."""
+        escritas = derivaciones.escritas
+        cambio = False
+        while self._pendientes and self._pendientes[0] + self.despues <= escritas:
+            r = self._pendientes.pop(0)
+            inicio = r - self.antes
+            if inicio < 0 or inicio < escritas - derivaciones.capacidad:
+                continue
+            segmento = derivaciones.entre(inicio, r + self.despues)[:, self._columnas].T
+            self.registrar(float(eje_qrs(segmento[0], segmento[1], self.n_base)))
+            cambio = True
+        return cambio
+
+    def registrar(self, grados):
+        """Incorpora el eje de un latido ya calculado (ej. en lote por eje_qrs)."""
+        radianes = np.radians(grados)
+        unitario = np.array([np.cos(radianes), np.sin(radianes)])
+        if self._vector is None:
+            self._vector = unitario
+        else:
+            self._vector = (1.0 - self.alfa) * self._vector + self.alfa * unitario
+        self.eje_ultimo = grados
+        self.eje = float(np.degrees(np.arctan2(self._vector[1], self._vector[0])))
+        self.latidos += 1
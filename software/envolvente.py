@@ -0,0 +1,131 @@
+# envolvente.py - Envolvente mín/máx para dibujar ventanas largas con ~2 puntos por columna de píxeles
+import numpy as np
+
+
+class EnvolventeMinMax:
+    """
+    Reduce una ventana deslizante de 'ventana' muestras a 'columnas' columnas
+    de 'paso' muestras. De cada columna se guardan el mínimo y el máximo de
+    cada canal y se dibujan en el orden en que ocurrieron: un pico de una sola
+    muestra (el R) nunca desaparece, como pasaría al diezmar sin más.
+
+    Las columnas viven en un anillo preasignado y solo se actualizan con las
+    muestras nuevas (agregar), así el coste por cuadro es O(nuevas + columnas)
+    y no depende de la duración de la ventana (10 s, 60 s...). La columna en
+    curso también se dibuja (pegada al borde derecho) para que lo último
+    recibido aparezca ya.
+    Si la ventana cabe en las columnas (paso 1) se dibuja cada muestra una vez.
+    """
+
+    def __init__(self, ventana, columnas, canales=1):
+        self.paso = max(1, -(-ventana // columnas))
+        self.columnas = -(-ventana // self.paso)
+        self.ventana = self.columnas * self.paso   # Ancho del eje X, en muestras
+        self.canales = canales
+        n = self.columnas + 1                      # + la columna en curso
+        self._minimo = np.zeros((n, canales))
+        self._maximo = np.zeros((n, canales))
+        self._i_minimo = np.zeros((n, canales), dtype=np.int64)   # Índices absolutos (para el orden)
+        self._i_maximo = np.zeros((n, canales), dtype=np.int64)
+        self._inicio = np.zeros(n, dtype=np.int64)                # Primera muestra de cada columna
+        self._pos = 0          # Columna en curso
+        self._llenado = 0      # Muestras que ya tiene la columna en curso
+        self._completas = 0    # Columnas cerradas en el anillo (<= columnas)
+        self.muestras = 0      # Total de muestras recibidas
+
+    def reiniciar(self):
+        self._pos = 0
+        self._llenado = 0
+        self._completas = 0
+        self.muestras = 0
+
+    def agregar(self, bloque):
+        """Añade muestras nuevas (n, canales) o (n,) si hay un solo canal."""
+        bloque = np.asarray(bloque).reshape(len(bloque), self.canales)
+        n = len(bloque)
+        i = 0
+
+        # --- 1. Completar la columna en curso ---
+        if self._llenado:
+            k = min(n, self.paso - self._llenado)
+            self._combinar(bloque[:k])
+            i = k
+
+        # --- 2. Columnas enteras de una vez (solo las que siguen en la ventana) ---
+        m = (n - i) // self.paso
+        if m:
+            saltar = max(0, m - self.columnas)
+            self._pos = (self._pos + saltar) % len(self._inicio)
+            self.muestras += saltar * self.paso
+            i += saltar * self.paso
+            m -= saltar
+            trozo = bloque[i:i + m * self.paso].reshape(m, self.paso, self.canales)
+            i_minimo = trozo.argmin(axis=1)
+            i_maximo = trozo.argmax(axis=1)
+            ranuras = (self._pos + np.arange(m)) % len(self._inicio)
+            inicios = self.muestras + self.paso * np.arange(m)
+            self._minimo[ranuras] = np.take_along_axis(trozo, i_minimo[:, np.newaxis], axis=1)[:, 0]
+            self._maximo[ranuras] = np.take_along_axis(trozo, i_maximo[:, np.newaxis], axis=1)[:, 0]
+            self._i_minimo[ranuras] = inicios[:, np.newaxis] + i_minimo
+            self._i_maximo[ranuras] = inicios[:, np.newaxis] + i_maximo
+            self._inicio[ranuras] = inicios
+            self._pos = (self._pos + m) % len(self._inicio)
+            self._completas = min(self.columnas, self._completas + m)
+            self.muestras += m * self.paso
+            i += m * self.paso
+
+        # --- 3. El resto abre la columna en curso ---
+        if i < n:
+            self._combinar(bloque[i:])
+
+    def _combinar(self, trozo):
+        """Mete 'trozo' (menos de una columna) en la columna en curso y la cierra si se llena."""
+        p = self._pos
+        i_minimo = trozo.argmin(axis=0)
+        i_maximo = trozo.argmax(axis=0)
+        canales = np.arange(self.canales)
+        minimo = trozo[i_minimo, canales]
+        maximo = trozo[i_maximo, canales]
+        if self._llenado == 0:
+            self._inicio[p] = self.muestras
+            self._minimo[p] = minimo
+            self._maximo[p] = maximo
+            self._i_minimo[p] = self.muestras + i_minimo
+            self._i_maximo[p] = self.muestras + i_maximo
+        else:
+            menor = minimo < self._minimo[p]
+            mayor = maximo > self._maximo[p]
+            self._minimo[p] = np.where(menor, minimo, self._minimo[p])
+            self._i_minimo[p] = np.where(menor, self.muestras + i_minimo, self._i_minimo[p])
+            self._maximo[p] = np.where(mayor, maximo, self._maximo[p])
+            self._i_maximo[p] = np.where(mayor, self.muestras + i_maximo, self._i_maximo[p])
+        self._llenado += len(trozo)
+        self.muestras += len(trozo)
+        if self._llenado == self.paso:
+            self._pos = (self._pos + 1) % len(self._inicio)
+            self._completas = min(self.columnas, self._completas + 1)
+            self._llenado = 0
+
+    def trazo(self):
+        """
+        (x, y) para set_data: x en muestras dentro de [0, ventana) (la columna
+        más nueva a la derecha) e y de forma (puntos, canales).
+
+        x va anclado a los bordes de columna: la más nueva (completa o en
+        curso) empieza siempre en ventana - paso, así el trazo avanza de
+        columna en columna sin temblar y nunca sale por la izquierda.
+        """
+        en_curso = 1 if self._llenado else 0
+        n_columnas = min(self.columnas, self._completas + en_curso)
+        ultima = self._pos - 1 + en_curso
+        ranuras = (ultima - n_columnas + 1 + np.arange(n_columnas)) % len(self._inicio)
+        origen = self._inicio[ultima % len(self._inicio)] - (self.ventana - self.paso)
+        x = (self._inicio[ranuras] - origen).astype(float)
+        if self.paso == 1:
+            return x, self._minimo[ranuras]
+        # Dos puntos por columna, en el orden en que ocurrieron en cada canal
+        minimo_antes = self._i_minimo[ranuras] <= self._i_maximo[ranuras]
+        y = np.empty((2 * n_columnas, self.canales))
+        y[0::2] = np.where(minimo_antes, self._minimo[ranuras], self._maximo[ranuras])
+        y[1::2] = np.where(minimo_antes, self._maximo[ranuras], self._minimo[ranuras])
+        return np.repeat(x, 2), y
@@ -0,0 +1,94 @@
+# escala_y.py - Auto-escala del eje Y con histéresis (evita redibujar cada cuadro)
+import numpy as np
+
+
+class EscalaHisteresis:
+    """
+    Controla los límites del eje Y de una ventana deslizante de 'ventana' muestras.
+
+    El mínimo y el máximo se siguen de forma incremental por bloques de
+    'tam_bloque' muestras (solo se recorren las muestras nuevas). Los límites
+    solo cambian cuando:
+      * la señal SALE de los límites actuales (se amplían de inmediato), o
+      * la señal ocupa menos de 'fraccion_minima' del rango visible durante
+        'decaimiento' muestras seguidas (se reducen).
+    'cambios' cuenta cuántas veces cambiaron los límites (= redibujados completos).
+    """
+
+    def __init__(self, ventana, tam_bloque=32, margen=0.2, margen_minimo=100,
+                 fraccion_minima=0.5, decaimiento=1000):
+        self.tam_bloque = tam_bloque
+        self.margen = margen
+        self.margen_minimo = margen_minimo
+        self.fraccion_minima = fraccion_minima
+        self.decaimiento = decaimiento
+
+        n_bloques = -(-ventana // tam_bloque) + 1
+        self._minimos = np.full(n_bloques, np.inf)
+        self._maximos = np.full(n_bloques, -np.inf)
+        self._pos = 0
+        self._llenado = 0
+        self._muestras_pequena = 0
+
+        self.limites = None
+        self.cambios = 0
+
+    def reiniciar(self, ventana):
+        """Olvida la historia, recorre la ventana completa y recalcula los límites."""
+        self._minimos[:] = np.inf
+        self._maximos[:] = -np.inf
+        self._pos = 0
+        self._llenado = 0
+        self._muestras_pequena = 0
+        self.limites = None
+        return self.actualizar(ventana)
+
+    def _acumular(self, nuevas):
+        i = 0
+        n = len(nuevas)
+        while i < n:
+            k = min(n - i, self.tam_bloque - self._llenado)
+            trozo = nuevas[i:i + k]
+            self._minimos[self._pos] = min(self._minimos[self._pos], trozo.min())
+            self._maximos[self._pos] = max(self._maximos[self._pos], trozo.max())
+            self._llenado += k
+            i += k
+            if self._llenado == self.tam_bloque:
+                # Bloque completo: el siguiente (el más antiguo) se recicla
+                self._pos = (self._pos + 1) % len(self._minimos)
+                self._minimos[self._pos] = np.inf
+                self._maximos[self._pos] = -np.inf
+                self._llenado = 0
+
+    def _calcular_limites(self, minimo, maximo):
+        margen = (maximo - minimo) * self.margen
+        if margen == 0:
+            margen = self.margen_minimo  # Evitar margen de 0
+        return (minimo - margen, maximo + margen)
+
+    def actualizar(self, nuevas):
+        """
+        Añade las muestras nuevas. Devuelve True si los límites cambiaron
+        (y por lo tanto hay que aplicar ax.set_ylim(*limites)).
+        """
+        if len(nuevas) == 0:
+            return False
+        self._acumular(nuevas)
+        minimo = self._minimos.min()
+        maximo = self._maximos.max()
+
+        if self.limites is not None:
+            inferior, superior = self.limites
+            if minimo >= inferior and maximo <= superior:
+                # Dentro de la banda: solo reducimos si lleva tiempo siendo pequeña
+                if (maximo - minimo) < self.fraccion_minima * (superior - inferior):
+                    self._muestras_pequena += len(nuevas)
+                else:
+                    self._muestras_pequena = 0
+                if self._muestras_pequena < self.decaimiento:
+                    return False
+
+        self.limites = self._calcular_limites(minimo, maximo)
+        self._muestras_pequena = 0
+        self.cambios += 1
+        return True
@@ -0,0 +1,42 @@
+# filtro_sos.py - Filtro SOS "online" para varios canales, por bloques
+import numpy as np
+from scipy import signal
+
+
+class FiltroSOS:
+    """
+    Filtro IIR en secciones de segundo orden (SOS) con estado persistente.
+
+    Guarda el estado 'zi' de TODOS los canales en un solo array de forma
+    (n_secciones, canales, 2) y filtra bloques (muestras, canales) de cualquier
+    longitud en una sola llamada a sosfilt. Filtrar por bloques da el mismo
+    resultado que el camino anterior muestra a muestra con sosfilt_zi(sos).
+    """
+
+    def __init__(self, sos, canales=2):
+        self.sos = np.asarray(sos, dtype=np.float64)
+        self.canales = canales
+        self._zi_inicial = signal.sosfilt_zi(self.sos)
+        self.zi = np.empty((len(self.sos), canales, 2))
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Vuelve al estado inicial (el mismo que daba signal.sosfilt_zi(sos))."""
+        self.zi[:] = self._zi_inicial[:, np.newaxis, :]
+
+    def filtrar(self, bloque, canales=None):
+        """
+        Filtra un bloque (muestras, canales) y devuelve la salida con la misma forma.
+        'canales' (un slice o índices) filtra solo esas columnas del estado, ej. un
+        dispositivo dentro de un filtro compartido por varios.
+        """
+        bloque = np.asarray(bloque, dtype=np.float64)
+        if len(bloque) == 0:
+            return np.empty((0, bloque.shape[1] if bloque.ndim == 2 else self.canales))
+        # sosfilt trabaja sobre el último eje: (canales, muestras) con zi (n_sec, canales, 2)
+        if canales is None:
+            y, self.zi = signal.sosfilt(self.sos, bloque.T, axis=-1, zi=self.zi)
+        else:
+            y, self.zi[:, canales] = signal.sosfilt(self.sos, bloque.T, axis=-1,
+                                                    zi=self.zi[:, canales])
+        return y.T
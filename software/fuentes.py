@@ -0,0 +1,334 @@
+# fuentes.py - Fuentes de bytes asíncronas (serie, TCP, archivo, loopback) y lector compartido
+import asyncio
+import threading
+import time
+import numpy as np
+
+from adquisicion import Decodificador, HiloAdquisicion, leer_agrupado
+
+
+# --- FUENTES (TRANSPORTES) ---
+# Todas tienen la misma interfaz: await abrir(), await leer() -> bytes
+# (b"" = fin del flujo) y await cerrar(). Ninguna bloquea el bucle de eventos.
+
+class FuenteSerie:
+    """
+    Puerto serie (pyserial). Se abre en abrir(), no al importar; las lecturas
+    van a un hilo del executor y juntan hasta 'rebanada_s' de datos.
+    """
+
+    def __init__(self, puerto, baudios=115200, timeout=0.05, rebanada_s=0.02):
+        self.puerto = puerto
+        self.baudios = baudios
+        self.timeout = timeout
+        self.rebanada_s = rebanada_s
+        self.ser = None
+
+    async def abrir(self):
+        import serial
+        loop = asyncio.get_running_loop()
+        self.ser = await loop.run_in_executor(
+            None, lambda: serial.Serial(self.puerto, self.baudios, timeout=self.timeout))
+
+    async def leer(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            datos = await loop.run_in_executor(
+                None, lambda: leer_agrupado(self.ser, rebanada_s=self.rebanada_s))
+            if datos:
+                return datos
+            if not self.ser.is_open:
+                return b""
+
+    async def cerrar(self):
+        if self.ser is not None:
+            self.ser.close()
+
+
+class FuenteTCP:
+    """Socket TCP (ej. un ESP32 por WiFi o un puente serie-red)."""
+
+    def __init__(self, host, puerto, tam_lectura=4096):
+        self.host = host
+        self.puerto = puerto
+        self.tam_lectura = tam_lectura
+        self._lector = None
+        self._escritor = None
+
+    async def abrir(self):
+        self._lector, self._escritor = await asyncio.open_connection(self.host, self.puerto)
+
+    async def leer(self):
+        return await self._lector.read(self.tam_lectura)
+
+    async def cerrar(self):
+        if self._escritor is not None:
+            self._escritor.close()
+            await self._escritor.wait_closed()
+
+
+class FuenteArchivo:
+    """
+    Reproduce una captura de bytes crudos del ESP32 a 'bytes_por_segundo'
+    (None = lo más rápido posible), en trozos de 'tam_lectura' bytes.
+    """
+
+    def __init__(self, ruta, bytes_por_segundo=None, tam_lectura=1024):
+        self.ruta = ruta
+        self.bytes_por_segundo = bytes_por_segundo
+        self.tam_lectura = tam_lectura
+        self._archivo = None
+        self._inicio = None
+        self._enviados = 0
+
+    async def abrir(self):
+        self._archivo = open(self.ruta, "rb")
+        self._inicio = time.perf_counter()
+        self._enviados = 0
+
+    async def leer(self):
+        datos = self._archivo.read(self.tam_lectura)
+        if datos and self.bytes_por_segundo:
+            # Espera hasta el instante en que el puerto real habría entregado estos bytes
+            self._enviados += len(datos)
+            espera = self._inicio + self._enviados / self.bytes_por_segundo - time.perf_counter()
+            if espera > 0:
+                await asyncio.sleep(espera)
+        else:
+            await asyncio.sleep(0)
+        return datos
+
+    async def cerrar(self):
+        if self._archivo is not None:
+            self._archivo.close()
+
+
+class FuenteLoopback:
+    """
+    Fuente en memoria dentro del mismo proceso: lo que se pasa a enviar()
+    sale por leer(). Sirve para pruebas y para medir latencia sin ESP32.
+    """
+
+    def __init__(self):
+        self._cola = asyncio.Queue()
+
+    async def abrir(self):
+        pass
+
+    def enviar(self, datos):
+        self._cola.put_nowait(bytes(datos))
+
+    def terminar(self):
+        """Marca el fin del flujo: leer() devolverá b""."""
+        self._cola.put_nowait(b"")
+
+    async def leer(self):
+        datos = await self._cola.get()
+        # Junta lo que ya esté en cola en una sola lectura (como in_waiting)
+        while datos and not self._cola.empty():
+            siguiente = self._cola.get_nowait()
+            if not siguiente:
+                self._cola.put_nowait(b"")
+                break
+            datos += siguiente
+        return datos
+
+    async def cerrar(self):
+        pass
+
+
+def crear_fuente(descripcion):
+    """
+    Crea una fuente a partir de un texto de configuración:
+      "serie:COM4[:115200]", "tcp:192.168.4.1:3333",
+      "archivo:captura.bin[:bytes_por_segundo]" o "loopback".
+    """
+    tipo, _, resto = descripcion.partition(":")
+    # El último campo numérico es opcional (la ruta puede llevar ':' en Windows)
+    cuerpo, _, numero = resto.rpartition(":")
+    if not numero.isdigit():
+        cuerpo, numero = resto, ""
+    if tipo == "serie" and cuerpo:
+        return FuenteSerie(cuerpo, int(numero) if numero else 115200)
+    if tipo == "tcp" and cuerpo and numero:
+        return FuenteTCP(cuerpo, int(numero))
+    if tipo == "archivo" and cuerpo:
+        return FuenteArchivo(cuerpo, int(numero) if numero else None)
+    if tipo == "loopback":
+        return FuenteLoopback()
+    raise ValueError(f"Fuente desconocida: {descripcion}")
+
+
+# --- LECTOR COMPARTIDO ---
+
+class BloqueMuestras:
+    """Bloque decodificado: 'muestras' (N, 2) int32 [I, II], 'secuencias' (o None) y hora de llegada."""
+
+    __slots__ = ("muestras", "secuencias", "t_llegada")
+
+    def __init__(self, muestras, secuencias, t_llegada):
+        self.muestras = muestras
+        self.secuencias = secuencias
+        self.t_llegada = t_llegada
+
+
+class Suscripcion:
+    """Cola de bloques de UN consumidor. Se recorre con 'async for bloque in suscripcion'."""
+
+    def __init__(self, maximo):
+        self.cola = asyncio.Queue(maximo)
+        self.bloques_descartados = 0  # El consumidor no llegó a tiempo
+
+    def _entregar(self, bloque):
+        if self.cola.full():
+            # Se descarta el bloque MÁS ANTIGUO: un consumidor lento no frena a los demás
+            self.cola.get_nowait()
+            self.bloques_descartados += 1
+        self.cola.put_nowait(bloque)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        bloque = await self.cola.get()
+        if bloque is None:
+            raise StopAsyncIteration
+        return bloque
+
+
+class LectorAsincrono:
+    """
+    Un solo lector por fuente: lee, decodifica ("ascii" o "binario") y reparte
+    cada bloque a todas las suscripciones sin bloquear. El bloque es el mismo
+    objeto para todos los consumidores: no debe modificarse.
+    """
+
+    def __init__(self, fuente, protocolo="ascii"):
+        self.fuente = fuente
+        self.decodificador = Decodificador(protocolo)
+        self.suscripciones = []
+        self.muestras_leidas = 0
+        self.errores_lectura = 0
+
+    def suscribir(self, maximo=64):
+        suscripcion = Suscripcion(maximo)
+        self.suscripciones.append(suscripcion)
+        return suscripcion
+
+    async def ejecutar(self, abrir=True):
+        """Bucle principal: termina al acabarse la fuente (o al cancelar la tarea).
+        abrir=False si la fuente ya se abrió fuera."""
+        if abrir:
+            await self.fuente.abrir()
+        try:
+            while True:
+                datos = await self.fuente.leer()
+                if not datos:
+                    break
+                t_llegada = time.perf_counter()
+                try:
+                    valores_I, valores_II, secuencias = self.decodificador.decodificar(datos)
+                except Exception:
+                    self.errores_lectura += 1
+                    continue
+                if len(valores_I) == 0:
+                    continue
+                bloque = BloqueMuestras(np.column_stack((valores_I, valores_II)),
+                                        secuencias, t_llegada)
+                self.muestras_leidas += len(valores_I)
+                for suscripcion in self.suscripciones:
+                    suscripcion._entregar(bloque)
+        finally:
+            await self.fuente.cerrar()
+            for suscripcion in self.suscripciones:
+                suscripcion._entregar(None)  # Fin del flujo para cada consumidor
+
+
+# --- ENTRADA DE LAS INTERFACES ---
+
+class HiloFuente(HiloAdquisicion):
+    """
+    HiloAdquisicion para cualquier fuente de crear_fuente(): corre su
+    LectorAsincrono en un bucle asyncio propio, fuera del hilo de Tk (como
+    HiloMultidispositivo), y cada bloque sigue la misma cadena (monitor con
+    la hora de llegada, crudos, decimación y filtro).
+    iniciar() arranca el hilo y espera a que la fuente abra; devuelve False
+    (y deja el motivo en 'error') si no se pudo.
+    """
+
+    def __init__(self, fuente, sos, capacidad=8192, protocolo="ascii", fs=None, decimacion=1):
+        super().__init__(None, sos, capacidad=capacidad, protocolo=protocolo, fs=fs,
+                         decimacion=decimacion)
+        self.fuente = fuente
+        self.lector = LectorAsincrono(fuente, protocolo)
+        self.decodificador = self.lector.decodificador   # Para bytes_descartados
+        self.error = None
+        self._abierta = threading.Event()
+        self._loop = None
+        self._tarea = None
+
+    def iniciar(self, espera=5.0):
+        self.start()
+        if not self._abierta.wait(espera):
+            self.error = TimeoutError(f"la fuente no abrió en {espera:.0f} s")
+        return self.error is None
+
+    async def _ejecutar(self):
+        try:
+            await self.fuente.abrir()
+        except Exception as error:
+            self.error = error
+            return
+        finally:
+            self._abierta.set()
+        suscripcion = self.lector.suscribir(maximo=256)
+        lectura = asyncio.create_task(self.lector.ejecutar(abrir=False))
+        try:
+            async for bloque in suscripcion:
+                self.errores_lectura = self.lector.errores_lectura
+                self._procesar(bloque.muestras, bloque.secuencias, t=bloque.t_llegada)
+            await lectura   # Propaga el error si la fuente se cayó
+        finally:
+            lectura.cancel()
+            await asyncio.gather(lectura, return_exceptions=True)   # Deja que cierre la fuente
+
+    def run(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._tarea = self._loop.create_task(self._ejecutar())
+            self._loop.run_until_complete(self._tarea)
+        except asyncio.CancelledError:
+            pass
+        except Exception as error:
+            self.error = error
+            print(f"Adquisición detenida: {error}")
+        finally:
+            self._loop.close()
+
+    def detener(self, espera=2.0):
+        """Cancela la lectura (la fuente se cierra en el propio hilo) y espera al hilo."""
+        if self._loop is not None and self._tarea is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._tarea.cancel)
+        if self.is_alive():
+            self.join(espera)
+
+
+def abrir_adquisicion(descripcion, sos, simular_si_falla=True, **opciones):
+    """
+    Entrada de las interfaces: crea la fuente 'descripcion' (ver crear_fuente)
+    y arranca su HiloFuente ('opciones' van a HiloFuente). Devuelve el hilo,
+    o None si hay que simular: con "simulacion", o si la fuente no abre y
+    'simular_si_falla' (si no, lanza el error). La decisión queda en el log.
+    """
+    if descripcion == "simulacion":
+        print("Fuente 'simulacion': se usarán señales simuladas")
+        return None
+    hilo = HiloFuente(crear_fuente(descripcion), sos, **opciones)
+    if hilo.iniciar():
+        print(f"Conectado a '{descripcion}'")
+        return hilo
+    hilo.detener()
+    if not simular_si_falla:
+        raise RuntimeError(f"No se pudo abrir '{descripcion}': {hilo.error}")
+    print(f"No se pudo abrir '{descripcion}' ({hilo.error}); simular_si_falla: se usarán señales simuladas")
+    return None
@@ -0,0 +1,154 @@
+# grabador.py - Grabación continua de la sesión en un archivo binario mapeado en memoria (np.memmap)
+import json
+import threading
+import time
+import numpy as np
+
+# --- FORMATO DEL ARCHIVO ---
+#   [0:8]    MAGICO
+#   [8:16]   uint64: muestras grabadas (se actualiza tras cada escritura)
+#   [16:20]  uint32: longitud de la cabecera JSON
+#   [20:...] cabecera JSON (fs, sos, inicio, canales, formato), con relleno hasta TAM_CABECERA
+#   [TAM_CABECERA:] registros DTYPE_REGISTRO, uno por muestra
+MAGICO = b"ECGSES01"
+TAM_CABECERA = 4096
+DTYPE_REGISTRO = np.dtype([("crudo", "<i2", (2,)), ("filtrado", "<f4", (2,))])
+
+
+class SesionGrabacion:
+    """
+    Archivo de sesión que crece por segmentos preasignados de
+    'registros_por_segmento' muestras. Solo el segmento actual está mapeado
+    (np.memmap), así que la memoria no crece con la duración de la sesión;
+    al llenarse se vacía a disco y se mapea el siguiente.
+    escribir() copia bloques en el mapa: no crea objetos por muestra.
+    """
+
+    def __init__(self, ruta, fs, sos, registros_por_segmento=2 ** 18, inicio=None):
+        self.ruta = ruta
+        self.registros_por_segmento = registros_por_segmento
+        self.muestras = 0
+        cabecera = {
+            "fs": fs,
+            "sos": np.asarray(sos).tolist(),
+            "inicio": time.time() if inicio is None else inicio,
+            "canales": ["I", "II"],
+            "formato": DTYPE_REGISTRO.descr,
+        }
+        texto = json.dumps(cabecera).encode()
+        if 20 + len(texto) > TAM_CABECERA:
+            raise ValueError("La cabecera de la sesión no cabe en TAM_CABECERA")
+
+        with open(ruta, "wb") as archivo:
+            archivo.write(MAGICO)
+            archivo.write(np.uint64(0).tobytes())
+            archivo.write(np.uint32(len(texto)).tobytes())
+            archivo.write(texto)
+            archivo.truncate(TAM_CABECERA)
+        self._contador = np.memmap(ruta, dtype="<u8", mode="r+", offset=8, shape=(1,))
+        self._segmento = None
+        self._inicio_segmento = 0
+        self._mapear_segmento(0)
+
+    def _mapear_segmento(self, inicio):
+        """Preasigna y mapea el segmento que empieza en el registro 'inicio'."""
+        if self._segmento is not None:
+            self._segmento.flush()
+        self._segmento = None
+        fin_bytes = TAM_CABECERA + (inicio + self.registros_por_segmento) * DTYPE_REGISTRO.itemsize
+        with open(self.ruta, "r+b") as archivo:
+            archivo.truncate(fin_bytes)
+        self._segmento = np.memmap(self.ruta, dtype=DTYPE_REGISTRO, mode="r+",
+                                   offset=TAM_CABECERA + inicio * DTYPE_REGISTRO.itemsize,
+                                   shape=(self.registros_por_segmento,))
+        self._inicio_segmento = inicio
+
+    def escribir(self, crudos, filtrados):
+        """Añade un bloque: 'crudos' (n, 2) enteros del ADC y 'filtrados' (n, 2)."""
+        n = len(crudos)
+        hecho = 0
+        while hecho < n:
+            pos = self.muestras - self._inicio_segmento
+            if pos == self.registros_por_segmento:
+                self._mapear_segmento(self.muestras)
+                pos = 0
+            k = min(n - hecho, self.registros_por_segmento - pos)
+            self._segmento["crudo"][pos:pos + k] = crudos[hecho:hecho + k]
+            self._segmento["filtrado"][pos:pos + k] = filtrados[hecho:hecho + k]
+            hecho += k
+            self.muestras += k
+        # El contador se publica después de copiar: un lector nunca ve registros a medias
+        self._contador[0] = self.muestras
+
+    def cerrar(self):
+        """Vuelca a disco y recorta el archivo a las muestras grabadas."""
+        if self._segmento is None:
+            return
+        self._segmento.flush()
+        self._contador.flush()
+        self._segmento = None
+        self._contador = None
+        with open(self.ruta, "r+b") as archivo:
+            archivo.truncate(TAM_CABECERA + self.muestras * DTYPE_REGISTRO.itemsize)
+
+
+def abrir_sesion(ruta):
+    """
+    Abre una sesión grabada (solo lectura). Devuelve (cabecera, registros):
+    'registros' es un np.memmap con los campos "crudo" y "filtrado".
+    Funciona también con sesiones no cerradas (usa el contador de la cabecera).
+    """
+    with open(ruta, "rb") as archivo:
+        if archivo.read(8) != MAGICO:
+            raise ValueError(f"{ruta} no es una sesión de ECG")
+        muestras = int(np.frombuffer(archivo.read(8), dtype="<u8")[0])
+        largo = int(np.frombuffer(archivo.read(4), dtype="<u4")[0])
+        cabecera = json.loads(archivo.read(largo))
+    cabecera["muestras"] = muestras
+    if muestras == 0:
+        return cabecera, np.empty(0, dtype=DTYPE_REGISTRO)
+    registros = np.memmap(ruta, dtype=DTYPE_REGISTRO, mode="r", offset=TAM_CABECERA,
+                          shape=(muestras,))
+    return cabecera, registros
+
+
+class HiloGrabador(threading.Thread):
+    """
+    Hilo que cada 'periodo_s' copia a la sesión lo nuevo de los buffers
+    'crudos' y 'filtrados' (los de HiloAdquisicion). Ni el hilo de adquisición
+    ni la interfaz esperan nunca al disco. Ambos buffers deben ir a la misma fs.
+    """
+
+    def __init__(self, sesion, crudos, filtrados, periodo_s=0.5):
+        super().__init__(daemon=True)
+        self.sesion = sesion
+        self.crudos = crudos
+        self.filtrados = filtrados
+        self.periodo_s = periodo_s
+        self.cursor = min(crudos.escritas, filtrados.escritas)
+        self.perdidas = 0   # Muestras que se sobrescribieron antes de grabarlas
+        self._detener = threading.Event()
+
+    def _volcar(self):
+        fin = min(self.crudos.escritas, self.filtrados.escritas)
+        pendientes = fin - self.cursor
+        limite = min(self.crudos.capacidad, self.filtrados.capacidad)
+        if pendientes > limite:
+            self.perdidas += pendientes - limite
+            pendientes = limite
+        if pendientes > 0:
+            self.sesion.escribir(self.crudos.entre(fin - pendientes, fin),
+                                 self.filtrados.entre(fin - pendientes, fin))
+        self.cursor = fin
+
+    def run(self):
+        while not self._detener.wait(self.periodo_s):
+            self._volcar()
+        self._volcar()
+        self.sesion.cerrar()
+
+    def detener(self, espera=2.0):
+        """Graba lo que quede pendiente, cierra la sesión y espera al hilo."""
+        self._detener.set()
+        if self.is_alive():
+            self.join(espera)
@@ -0,0 +1,252 @@
+# intervalos.py - Delineación por latido: PR, QRS, QT y QTc en tiempo real
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.ndimage import uniform_filter1d
+
+from derivaciones import INDICE_DERIVACION
+from eje_electrico import FACTOR_AVF
+
+# Un registro por latido (ms; NaN si no se pudo medir, ej. sin onda P)
+DTYPE_INTERVALOS = np.dtype([
+    ("r", "<i8"),          # Índice absoluto del pico R
+    ("rr_ms", "<f4"),
+    ("pr_ms", "<f4"),
+    ("qrs_ms", "<f4"),
+    ("qt_ms", "<f4"),
+    ("qtc_ms", "<f4"),     # Bazett: QT / sqrt(RR en s)
+])
+
+
+def _primero(condicion, ultimo=False):
+    """Índice del primer (o último) True por fila; -1 si no hay ninguno."""
+    hay = condicion.any(axis=1)
+    if ultimo:
+        indice = condicion.shape[1] - 1 - np.argmax(condicion[:, ::-1], axis=1)
+    else:
+        indice = np.argmax(condicion, axis=1)
+    return np.where(hay, indice, -1)
+
+
+def _argmax_en(valores, mascara):
+    return np.argmax(np.where(mascara, valores, -np.inf), axis=1)
+
+
+def _argmin_en(valores, mascara):
+    return np.argmin(np.where(mascara, valores, np.inf), axis=1)
+
+
+def _onda(vector, mascara, ancho, eje=None):
+    """
+    Localiza la onda más grande de cada latido dentro de 'mascara' (P o T).
+    Al vector se le resta su media móvil de 'ancho' muestras: las ondas de
+    ese ancho resaltan y la cola de la onda anterior o el rebote lento del
+    pasa-altos tras el QRS no se confunden con ellas. Con 'eje' (2, latidos)
+    solo cuentan los puntos que apuntan a su lado (onda concordante con él).
+    Devuelve el índice del pico, su amplitud y la proyección de todo el
+    segmento sobre la dirección del vector en ese pico (onda con signo,
+    positiva en el pico).
+    """
+    filas = np.arange(vector.shape[1])
+    centrado = vector - uniform_filter1d(vector, size=ancho, axis=-1)
+    energia = np.sum(centrado ** 2, axis=0)
+    if eje is not None:
+        energia = np.where(np.einsum("cl,clm->lm", eje, centrado) > 0, energia, 0.0)
+    pico = _argmax_en(energia, mascara)
+    amplitud = np.sqrt(energia[filas, pico])
+    direccion = centrado[:, filas, pico] / np.maximum(amplitud, 1e-12)
+    return pico, amplitud, np.einsum("cl,clm->lm", direccion, vector)
+
+
+def _sin_estela(pendiente, referencia):
+    """
+    Resta a la pendiente de cada latido la de la estela del pasa-altos
+    (el rebote lento que deja el QRS), medida en 'referencia', ya fuera de
+    la onda. Solo si sube: es lo que hace que la pendiente de la onda no
+    baje nunca del umbral.
+    """
+    estela = pendiente[np.arange(len(pendiente)), referencia]
+    return pendiente - np.maximum(estela, 0.0)[:, np.newaxis]
+
+
+def delinear(segmentos_I, segmentos_aVF, antes, fs, rr=None, umbral_qrs=0.015, piso_qrs=1.5, plano_ms=12,
+             umbral_onda=0.12, amplitud_minima=0.02):
+    """
+    Delinea varios latidos a la vez (vectorizado, sin bucles por latido).
+    'segmentos_*' son (latidos, muestras) con el R en la columna 'antes';
+    'rr' (muestras, opcional) acota la búsqueda de P y T en frecuencias altas.
+    Se trabaja con el vector frontal (I, 2/√3 aVF), que no depende de la
+    derivación elegida:
+      * QRS: inicio/fin donde la velocidad espacial, de media en 'plano_ms',
+        queda por debajo de 'umbral_qrs' veces su máximo, o de 'piso_qrs'
+        veces su cuartil inferior si el ruido es mayor (así Q y S pequeñas
+        cuentan, y los vértices de Q, R y S, donde la velocidad también es
+        ~0, no).
+      * Fin de T / inicio de P: donde la pendiente, tras la bajada más
+        rápida de la T (o antes de la subida más rápida de la P), cae bajo
+        'umbral_onda' veces esa pendiente, descontada la de la estela del
+        pasa-altos. La P es la onda mayor concordante con el QRS (la estela
+        de la T anterior va en sentido contrario) y su inicio puede caer
+        sobre la cola de esa T.
+    'amplitud_minima' (fracción del QRS) separa una onda de su ausencia.
+    Devuelve (inicio_p, inicio_qrs, fin_qrs, fin_t) en muestras del segmento (float, NaN si falla).
+    """
+    ms = fs / 1000.0
+    n_latidos, largo = segmentos_I.shape
+    filas = np.arange(n_latidos)
+    indices = np.arange(largo)[np.newaxis, :]
+    vector = np.stack((segmentos_I, FACTOR_AVF * segmentos_aVF))      # (2, latidos, muestras)
+
+    # --- QRS: tramos lentos sostenidos de la velocidad espacial (solo R +- 150 ms) ---
+    k = max(2, int(round(plano_ms * ms)))
+    a, b = max(0, antes - int(150 * ms) - k), min(largo, antes + int(150 * ms) + k + 1)
+    qrs = vector[:, :, a:b]
+    velocidad = np.sqrt(np.sum(np.gradient(uniform_filter1d(qrs, size=max(1, int(round(8 * ms))), axis=-1),
+                                           axis=-1) ** 2, axis=0))
+    cerca_r = slice(antes - a - int(60 * ms), antes - a + int(60 * ms) + 1)
+    cuartil = velocidad.shape[1] // 4
+    umbral = np.maximum(umbral_qrs * velocidad[:, cerca_r].max(axis=1, keepdims=True),
+                        piso_qrs * np.partition(velocidad, cuartil, axis=1)[:, cuartil:cuartil + 1])
+    lento = sliding_window_view(velocidad, k, axis=1).mean(axis=-1) < umbral   # lento[j]: j..j+k-1
+    j = a + np.arange(lento.shape[1])[np.newaxis, :]
+    inicio_qrs = _primero(lento & (j + k - 1 >= antes - 150 * ms) & (j + k - 1 <= antes), ultimo=True)
+    inicio_qrs = np.where(inicio_qrs >= 0, a + inicio_qrs + k - 1, -1)
+    fin_qrs = _primero(lento & (j >= antes) & (j <= antes + 150 * ms))
+    fin_qrs = np.where(fin_qrs >= 0, a + fin_qrs, -1)
+    amplitud_qrs = np.sqrt(np.sum(np.ptp(qrs[:, :, cerca_r], axis=-1) ** 2, axis=0))
+
+    # P y T se buscan con el QRS aplanado (congelado en su inicio o su fin) para
+    # que la media móvil de _onda() no lo arrastre dentro de sus ventanas.
+    # La T, más ancha, se suaviza el doble: su pendiente final es pequeña.
+    suave_p = uniform_filter1d(vector, size=max(1, int(round(20 * ms))), axis=-1)
+    suave_t = uniform_filter1d(vector, size=max(1, int(round(40 * ms))), axis=-1)
+    inicio_qrs_0, fin_qrs_0 = np.maximum(inicio_qrs, 0), np.maximum(fin_qrs, 0)
+    sin_qrs_t = np.where(indices < fin_qrs_0[:, np.newaxis], suave_t[:, filas, fin_qrs_0][:, :, np.newaxis], suave_t)
+    sin_qrs_p = np.where(indices > inicio_qrs_0[:, np.newaxis], suave_p[:, filas, inicio_qrs_0][:, :, np.newaxis], suave_p)
+    rr = np.full(n_latidos, np.inf) if rr is None else np.where(np.isfinite(rr), rr, np.inf)
+
+    # --- Fin de T ---
+    fin_ventana_t = np.minimum(largo, antes + 0.6 * rr)
+    ventana_t = (indices >= fin_qrs[:, np.newaxis] + 80 * ms) \
+        & (indices < fin_ventana_t[:, np.newaxis]) & (fin_qrs[:, np.newaxis] >= 0)
+    pico_t, amplitud_t, onda_t = _onda(sin_qrs_t, ventana_t, int(round(240 * ms)))
+    pendiente_t = np.gradient(onda_t, axis=-1)
+    bajada = _argmin_en(pendiente_t, (indices >= pico_t[:, np.newaxis])
+                        & (indices <= pico_t[:, np.newaxis] + 150 * ms))
+    # Estela: tres veces más allá de la bajada de lo que esta queda del pico
+    pendiente_t = _sin_estela(pendiente_t, np.minimum(fin_ventana_t.astype(int) - 1,
+                                                      bajada + 3 * (bajada - pico_t)))
+    fin_t = _primero((indices > bajada[:, np.newaxis])
+                     & (pendiente_t > umbral_onda * pendiente_t[filas, bajada][:, np.newaxis]))
+
+    # --- Inicio de P: pico sin llegar a la T anterior; el inicio puede caer en su cola ---
+    inicio_ventana = antes - np.minimum(300 * ms, 0.5 * rr)
+    ventana_p = (indices >= inicio_ventana[:, np.newaxis]) & (indices <= inicio_qrs[:, np.newaxis] - 20 * ms) \
+        & (inicio_qrs[:, np.newaxis] >= 0)
+    pico_p, amplitud_p, onda_p = _onda(sin_qrs_p, ventana_p, int(round(120 * ms)), eje=vector[:, :, antes])
+    pendiente_p = np.gradient(onda_p, axis=-1)
+    subida = _argmax_en(pendiente_p, ventana_p & (indices <= pico_p[:, np.newaxis]))
+    pendiente_p = _sin_estela(pendiente_p, np.maximum(0, subida - 3 * (pico_p - subida)))
+    busqueda_p = indices >= (antes - np.minimum(400 * ms, 0.75 * rr))[:, np.newaxis]
+    inicio_p = _primero(busqueda_p & (indices < subida[:, np.newaxis])
+                        & (pendiente_p < umbral_onda * pendiente_p[filas, subida][:, np.newaxis]),
+                        ultimo=True)
+
+    # --- Validación: sin ventana, sin onda clara o fuera de rango -> NaN ---
+    sin_t = ~ventana_t.any(axis=1) | (amplitud_t < amplitud_minima * amplitud_qrs)
+    sin_p = ~ventana_p.any(axis=1) | (amplitud_p < amplitud_minima * amplitud_qrs)
+    inicio_p = np.where(sin_p | (inicio_p < 0), np.nan, inicio_p)
+    fin_t = np.where(sin_t | (fin_t < 0) | (fin_t >= antes + 0.8 * rr), np.nan, fin_t)
+    inicio_qrs = np.where(inicio_qrs >= 0, inicio_qrs, np.nan)
+    fin_qrs = np.where(fin_qrs >= 0, fin_qrs, np.nan)
+    return inicio_p, inicio_qrs, fin_qrs, fin_t
+
+
+class DelineadorLatidos:
+    """
+    Mide PR, QRS, QT y QTc de cada latido detectado. Cada latido usa solo la
+    ventana [R - antes_s, R + despues_s] del buffer de 6 derivaciones (I y
+    aVF). Por defecto los latidos que se completan en un tick se delinean en
+    ese mismo tick (todos en una llamada a delinear()).
+    delinear() cuesta casi lo mismo con un latido que con decenas: fuera de
+    la interfaz (análisis offline, benchmarks) 'lote' > 1 los junta entre
+    llamadas y los delinea al reunir 'lote' o cuando el más antiguo lleva
+    'espera_s' esperando (forzar=True vacía la cola). Un latido que ya no
+    está entero en el buffer (espera + ventana más largas que el buffer) no
+    se mide y se cuenta en 'descartados'.
+    Los resultados van a 'registros', un anillo preasignado de 'capacidad'
+    latidos con dtype DTYPE_INTERVALOS; ultimos(n) los devuelve en orden.
+    """
+
+    def __init__(self, fs, capacidad=4096, antes_s=0.4, despues_s=0.6, lote=1, espera_s=0.0):
+        self.fs = fs
+        self.antes = int(round(antes_s * fs))
+        self.despues = int(round(despues_s * fs))
+        self.lote = lote
+        self.espera = int(round(espera_s * fs))
+        self._columnas = [INDICE_DERIVACION["I"], INDICE_DERIVACION["aVF"]]
+        self.registros = np.zeros(capacidad, dtype=DTYPE_INTERVALOS)
+        self.latidos = 0
+        self.descartados = 0       # Ya no estaban enteros en el buffer al delinearlos
+        self._pendientes = []
+        self._listos = []          # Ventana completa, esperando a completar el lote
+        self._ultimo_r = None
+
+    def agregar(self, indices_r):
+        """Anota picos R (mismos índices absolutos que el buffer de derivaciones)."""
+        self._pendientes.extend(indices_r)
+
+    def actualizar(self, derivaciones, forzar=False):
+        """Delinea los latidos listos si toca (lote o espera). Devuelve cuántos se añadieron."""
+        escritas = derivaciones.escritas
+        while self._pendientes and self._pendientes[0] + self.despues <= escritas:
+            self._listos.append(self._pendientes.pop(0))
+        if not self._listos:
+            return 0
+        if not forzar and len(self._listos) < self.lote \
+                and escritas - (self._listos[0] + self.despues) < self.espera:
+            return 0
+        listos, self._listos = self._listos, []
+        r = np.array(listos)
+        anteriores = np.concatenate(([-1 if self._ultimo_r is None else self._ultimo_r], r[:-1]))
+        rr = np.where(anteriores >= 0, r - anteriores, np.nan)
+        self._ultimo_r = listos[-1]
+
+        # Solo los que todavía están enteros en el buffer
+        dentro = r - self.antes >= max(0, escritas - derivaciones.capacidad)
+        self.descartados += int(np.count_nonzero(~dentro))
+        r, rr = r[dentro], rr[dentro]
+        if len(r) == 0:
+            return 0
+        segmentos = np.stack([derivaciones.entre(i - self.antes, i + self.despues)[:, self._columnas]
+                              for i in r])                            # (latidos, muestras, 2)
+        inicio_p, inicio_qrs, fin_qrs, fin_t = delinear(segmentos[:, :, 0], segmentos[:, :, 1],
+                                                        self.antes, self.fs, rr)
+
+        a_ms = 1000.0 / self.fs
+        nuevos = np.empty(len(r), dtype=DTYPE_INTERVALOS)
+        nuevos["r"] = r
+        nuevos["rr_ms"] = rr * a_ms
+        nuevos["pr_ms"] = (inicio_qrs - inicio_p) * a_ms
+        nuevos["qrs_ms"] = (fin_qrs - inicio_qrs) * a_ms
+        nuevos["qt_ms"] = (fin_t - inicio_qrs) * a_ms
+        nuevos["qtc_ms"] = nuevos["qt_ms"] / np.sqrt(nuevos["rr_ms"] / 1000.0)
+
+        posiciones = (self.latidos + np.arange(len(nuevos))) % len(self.registros)
+        self.registros[posiciones] = nuevos
+        self.latidos += len(nuevos)
+        return len(nuevos)
+
+    def ultimos(self, n):
+        """Los últimos n registros (como mucho 'capacidad'), del más antiguo al más nuevo."""
+        n = min(n, self.latidos, len(self.registros))
+        posiciones = (self.latidos - n + np.arange(n)) % len(self.registros)
+        return self.registros[posiciones]
+
+    def mediana(self, n=16):
+        """Mediana de cada intervalo en los últimos n latidos (ignora NaN): dict campo -> ms."""
+        ultimos = self.ultimos(n)
+        medianas = {}
+        for campo in DTYPE_INTERVALOS.names[1:]:
+            validos = ultimos[campo][np.isfinite(ultimos[campo])]
+            medianas[campo] = float(np.median(validos)) if len(validos) else np.nan
+        return medianas
@@ -0,0 +1,209 @@
+# multidispositivo.py - Varias placas ESP32 en un solo proceso, filtradas en lote
+# Uso: python multidispositivo.py serie:COM4:115200 tcp:192.168.4.2:3333 ...
+import argparse
+import asyncio
+import sys
+import threading
+import time
+import numpy as np
+from scipy import signal
+
+from buffer_circular import BufferCircular
+from filtro_sos import FiltroSOS
+from fuentes import LectorAsincrono, crear_fuente
+from tasa_muestreo import MonitorTasa
+
+
+class AgregadorDispositivos:
+    """
+    Abre N fuentes a la vez (cada una con su LectorAsincrono) y filtra los N
+    dispositivos JUNTOS: un único FiltroSOS de 2N canales [I_0, II_0, I_1, ...]
+    guarda el 'zi' de todos y, en cada tick, una sola llamada a sosfilt procesa
+    las muestras que TODOS tienen pendientes (matriz (k, 2N)).
+
+    Lo que un dispositivo lleva de más se queda pendiente hasta el siguiente
+    tick; si supera 'max_retraso' muestras (otra placa se ha parado) se filtra
+    por separado con su porción del estado, así que una placa caída no frena
+    a las demás (su error queda en 'errores[d]'). Cada dispositivo tiene sus
+    propios 'crudos' y 'filtrados'.
+    """
+
+    def __init__(self, fuentes, sos, protocolo="ascii", capacidad=8192, fs=None,
+                 periodo_s=0.02, max_retraso=64, por_lotes=True):
+        self.n = len(fuentes)
+        self.periodo_s = periodo_s
+        self.max_retraso = max_retraso
+        self.por_lotes = por_lotes
+        self.lectores = [LectorAsincrono(fuente, protocolo) for fuente in fuentes]
+        self.filtro = FiltroSOS(sos, canales=2 * self.n)
+        self.crudos = [BufferCircular(capacidad, 2, dtype=np.int32) for _ in range(self.n)]
+        self.filtrados = [BufferCircular(capacidad, 2) for _ in range(self.n)]
+        self.monitores = [MonitorTasa(fs) for _ in range(self.n)] if fs else None
+        self._pendientes = [[] for _ in range(self.n)]
+        self.errores = [None] * self.n  # Excepción de la fuente que se cayó (o no abrió)
+        self.llamadas_lote = 0        # sosfilt sobre los N dispositivos a la vez
+        self.llamadas_individuales = 0
+
+    def _canales(self, d):
+        return slice(2 * d, 2 * d + 2)
+
+    async def _recibir(self, d, suscripcion):
+        async for bloque in suscripcion:
+            self.crudos[d].escribir(bloque.muestras)
+            self._pendientes[d].append(bloque.muestras)
+            if self.monitores is not None:
+                self.monitores[d].registrar(len(bloque.muestras), bloque.secuencias,
+                                            t=bloque.t_llegada)
+
+    async def _leer(self, d):
+        lector = self.lectores[d]
+        try:
+            await lector.ejecutar()
+        except Exception as e:
+            self.errores[d] = e
+            for suscripcion in lector.suscripciones:
+                suscripcion._entregar(None)  # Si no llegó a abrir, nadie cerró el flujo
+
+    def procesar(self, forzar=False):
+        """Filtra lo pendiente. Con 'forzar' no deja nada pendiente (fin de la sesión)."""
+        pendientes = [np.concatenate(p) if len(p) > 1 else (p[0] if p else None)
+                      for p in self._pendientes]
+        vacio = np.empty((0, 2), dtype=np.int32)
+        pendientes = [vacio if p is None else p for p in pendientes]
+
+        # Las placas caídas ya no llegan: el lote sigue con las demás
+        vivos = [d for d in range(self.n) if self.errores[d] is None]
+        comunes = min(len(pendientes[d]) for d in vivos) if self.por_lotes and vivos else 0
+        if comunes:
+            lote = np.concatenate([pendientes[d][:comunes] for d in vivos], axis=1)
+            canales = None if len(vivos) == self.n else \
+                np.concatenate([np.arange(2 * d, 2 * d + 2) for d in vivos])
+            salida = self.filtro.filtrar(lote, canales=canales)
+            self.llamadas_lote += 1
+            for i, d in enumerate(vivos):
+                self.filtrados[d].escribir(salida[:, self._canales(i)])
+
+        for d, p in enumerate(pendientes):
+            caida = self.errores[d] is not None
+            resto = p if caida else p[comunes:]
+            if len(resto) and (forzar or caida or not self.por_lotes or len(resto) > self.max_retraso):
+                self.filtrados[d].escribir(self.filtro.filtrar(resto, canales=self._canales(d)))
+                self.llamadas_individuales += 1
+                resto = resto[:0]
+            self._pendientes[d] = [resto] if len(resto) else []
+
+    async def _ticks(self, lectores):
+        while not all(tarea.done() for tarea in lectores):
+            await asyncio.sleep(self.periodo_s)
+            self.procesar()
+
+    async def ejecutar(self):
+        """Corre hasta que se acaban todas las fuentes (o se cancela la tarea)."""
+        suscripciones = [lector.suscribir(maximo=1024) for lector in self.lectores]
+        lectores = [asyncio.create_task(self._leer(d)) for d in range(self.n)]
+        receptores = [asyncio.create_task(self._recibir(d, s)) for d, s in enumerate(suscripciones)]
+        try:
+            await asyncio.gather(self._ticks(lectores), *lectores, *receptores)
+        finally:
+            for tarea in lectores + receptores:
+                tarea.cancel()
+        self.procesar(forzar=True)
+
+
+class HiloMultidispositivo(threading.Thread):
+    """Corre el bucle asyncio del agregador fuera del hilo de Tk (igual que HiloAdquisicion)."""
+
+    def __init__(self, agregador):
+        super().__init__(daemon=True)
+        self.agregador = agregador
+        self._loop = None
+        self._tarea = None
+        self.error = None
+
+    def run(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._tarea = self._loop.create_task(self.agregador.ejecutar())
+            self._loop.run_until_complete(self._tarea)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self.error = e
+        finally:
+            self._loop.close()
+
+    def detener(self, espera=2.0):
+        """Cancela la adquisición de todas las placas y espera al hilo."""
+        if self._loop is not None and self._tarea is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._tarea.cancel)
+        if self.is_alive():
+            self.join(espera)
+
+
+# --- PUNTO DE ENTRADA: N placas desde la línea de comandos ---
+
+def informar(agregador, descripciones):
+    """Una línea por placa: muestras filtradas, fs real, huecos y errores."""
+    for d, descripcion in enumerate(descripciones):
+        texto = f"  [{d}] {descripcion}: {agregador.filtrados[d].escritas} muestras"
+        if agregador.monitores is not None:
+            monitor = agregador.monitores[d]
+            fs_real = monitor.tasa_real()
+            if fs_real is not None:
+                texto += f", fs real {fs_real:.1f} Hz"
+            texto += f", huecos {monitor.huecos} ({monitor.muestras_perdidas} muestras)"
+        texto += f", errores de lectura {agregador.lectores[d].errores_lectura}"
+        if agregador.errores[d] is not None:
+            texto += f", CAÍDA: {agregador.errores[d]}"
+        print(texto)
+    print(f"  sosfilt lote/individual: {agregador.llamadas_lote}/{agregador.llamadas_individuales}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Adquisición de varias placas ESP32 filtradas en lote")
+    parser.add_argument("fuentes", nargs="+",
+                        help='Descripciones para crear_fuente: "serie:COM4:115200", '
+                             '"tcp:192.168.4.1:3333", "archivo:captura.bin[:bytes_por_s]"...')
+    parser.add_argument("--protocolo", choices=("ascii", "binario"), default="ascii")
+    parser.add_argument("--fs", type=float, default=333.33, help="fs nominal del firmware (Hz)")
+    parser.add_argument("--banda", type=float, nargs=2, default=(0.5, 40.0), metavar=("BAJO", "ALTO"),
+                        help="Pasa-banda Butterworth en Hz")
+    parser.add_argument("--orden", type=int, default=4)
+    parser.add_argument("--segundos", type=float, default=0.0,
+                        help="Duración (0 = hasta Ctrl+C o hasta que se acaben las fuentes)")
+    parser.add_argument("--intervalo", type=float, default=1.0, help="Segundos entre informes")
+    args = parser.parse_args()
+
+    try:
+        fuentes = [crear_fuente(descripcion) for descripcion in args.fuentes]
+    except ValueError as e:
+        parser.error(str(e))
+    sos = signal.butter(args.orden, args.banda, btype='band', fs=args.fs, output='sos')
+    agregador = AgregadorDispositivos(fuentes, sos, protocolo=args.protocolo, fs=args.fs)
+    hilo = HiloMultidispositivo(agregador)
+
+    inicio = time.perf_counter()
+    hilo.start()
+    try:
+        while hilo.is_alive():
+            restante = args.segundos - (time.perf_counter() - inicio) if args.segundos else args.intervalo
+            if restante <= 0:
+                break
+            hilo.join(min(args.intervalo, restante))
+            print(f"t = {time.perf_counter() - inicio:.1f} s")
+            informar(agregador, args.fuentes)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        hilo.detener()
+
+    print(f"Fin tras {time.perf_counter() - inicio:.1f} s")
+    informar(agregador, args.fuentes)
+    if hilo.error is not None:
+        print(f"Adquisición detenida: {hilo.error}")
+        return 1
+    return 1 if all(error is not None for error in agregador.errores) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+# planificador.py - Cuadros de la interfaz a una fps objetivo, sin frenar la lectura de datos
+import time
+import numpy as np
+
+
+class PlanificadorCuadros:
+    """
+    Sustituye al root.after(50, actualizar_grafica) fijo de las interfaces.
+
+    Cada tick (1 / fps) llama a leer(): consumir las muestras nuevas no se
+    salta nunca, así buffers y detectores siguen el ritmo de la adquisición.
+    dibujar() solo se llama cuando toca cuadro:
+      * el intervalo entre cuadros se estira (en ticks enteros) para que
+        dibujar() no ocupe más de 'carga_maxima' del tiempo (según la media
+        móvil de lo que tarda), y
+      * un tick que llega más de un periodo tarde (Tk estuvo ocupado) no
+        dibuja: los ticks se recolocan en vez de acumularse.
+    Los ticks sin dibujo cuentan como cuadros 'saltados'.
+
+    Publica la fps lograda (fps()), los percentiles del tiempo por cuadro
+    (lo que tarda dibujar(), en ms) y 'coste' (media móvil en s).
+    """
+
+    def __init__(self, root, leer, dibujar, fps=20, carga_maxima=0.5, historia=256):
+        self.root = root
+        self.leer = leer
+        self.dibujar = dibujar
+        self.fps_objetivo = fps
+        self.periodo = 1.0 / fps
+        self.carga_maxima = carga_maxima
+        self._instantes = np.zeros(historia)    # Fin de los últimos cuadros (perf_counter)
+        self._duraciones = np.zeros(historia)   # Lo que tardó dibujar() en cada uno
+        self.cuadros = 0
+        self.saltados = 0
+        self.coste = 0.0
+        self._proximo_tick = None
+        self._proximo_cuadro = 0.0
+        self._id = None
+
+    def iniciar(self):
+        self._proximo_tick = time.perf_counter()
+        self._tick()
+
+    def detener(self):
+        if self._id is not None:
+            self.root.after_cancel(self._id)
+            self._id = None
+
+    def _tick(self):
+        ahora = time.perf_counter()
+        tarde = ahora - self._proximo_tick > self.periodo
+        self.leer()
+
+        if tarde or ahora < self._proximo_cuadro:
+            self.saltados += 1
+        else:
+            inicio = time.perf_counter()
+            self.dibujar()
+            fin = time.perf_counter()
+            self._registrar(fin, fin - inicio)
+            # Se dibuja cada 'ticks' ticks (medio periodo de margen contra el jitter de 'after')
+            ticks = max(1, int(np.ceil(self.coste / self.carga_maxima / self.periodo)))
+            self._proximo_cuadro = inicio + (ticks - 0.5) * self.periodo
+
+        # Plazos absolutos: el tiempo de leer y dibujar no se suma al periodo
+        self._proximo_tick += self.periodo
+        ahora = time.perf_counter()
+        if tarde:
+            self._proximo_tick = ahora + self.periodo
+        self._id = self.root.after(max(1, int(1000 * (self._proximo_tick - ahora))), self._tick)
+
+    def _registrar(self, instante, duracion):
+        i = self.cuadros % len(self._instantes)
+        self._instantes[i] = instante
+        self._duraciones[i] = duracion
+        self.coste = duracion if self.cuadros == 0 else self.coste + 0.1 * (duracion - self.coste)
+        self.cuadros += 1
+
+    def fps(self, ventana_s=2.0):
+        """Cuadros por segundo dibujados en los últimos 'ventana_s' segundos."""
+        instantes = self._instantes[:min(self.cuadros, len(self._instantes))]
+        if len(instantes) < 2:
+            return 0.0
+        recientes = instantes[instantes >= instantes.max() - ventana_s]
+        if len(recientes) < 2:
+            return 0.0
+        return (len(recientes) - 1) / (recientes.max() - recientes.min())
+
+    def percentiles(self, q=(50, 95, 99)):
+        """Percentiles del tiempo por cuadro (ms) de los últimos cuadros."""
+        duraciones = self._duraciones[:min(self.cuadros, len(self._duraciones))]
+        if len(duraciones) == 0:
+            return tuple(np.nan for _ in q)
+        return tuple(1000 * np.percentile(duraciones, q))
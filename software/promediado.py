@@ -0,0 +1,84 @@
+# promediado.py - Promediado sincronizado con el latido (plantilla P-QRS-T de las 6 derivaciones)
+import numpy as np
+
+
+class PromediadorLatidos:
+    """
+    Plantilla promedio móvil de los últimos 'capacidad' latidos para cada
+    derivación. Los latidos se recortan alrededor de cada R ('antes_s' antes,
+    'despues_s' después) y se guardan en una matriz preasignada
+    (capacidad, canales, largo) usada como anillo.
+
+    La suma de los latidos del anillo se mantiene al día: cada latido nuevo
+    suma el suyo y resta el que sale, así el coste por latido es O(ventana)
+    (canales x largo), sin importar cuántos latidos se hayan visto. Cada
+    'capacidad' latidos la suma se recalcula desde la matriz para que el
+    error de redondeo no se acumule en sesiones de horas.
+
+    Con 'correlacion_minima' se descartan los latidos cuya derivación
+    'canal_referencia' no se parece a la plantilla actual (extrasístoles,
+    artefactos); solo se aplica cuando ya hay 'latidos_minimos' promediados.
+    """
+
+    def __init__(self, fs, canales=6, antes_s=0.25, despues_s=0.45, capacidad=32,
+                 correlacion_minima=0.8, canal_referencia=1, latidos_minimos=4):
+        self.antes = int(round(antes_s * fs))
+        self.despues = int(round(despues_s * fs))
+        self.largo = self.antes + self.despues
+        self.capacidad = capacidad
+        self.correlacion_minima = correlacion_minima
+        self.canal_referencia = canal_referencia
+        self.latidos_minimos = latidos_minimos
+
+        self._latidos = np.zeros((capacidad, canales, self.largo))
+        self._suma = np.zeros((canales, self.largo))
+        self.plantilla = np.zeros((canales, self.largo))
+        self.tiempo_ms = (np.arange(self.largo) - self.antes) * 1000.0 / fs  # 0 = pico R
+        self._pendientes = []
+        self._pos = 0
+        self.n = 0             # Latidos dentro del promedio (<= capacidad)
+        self.latidos = 0       # Latidos aceptados en total
+        self.rechazados = 0    # Por baja correlación o porque ya no estaban en el buffer
+
+    def agregar(self, indices_r):
+        """Anota picos R (índices absolutos); se recortan cuando llegue la parte posterior."""
+        self._pendientes.extend(indices_r)
+
+    def actualizar(self, derivaciones):
+        """
+        Recorta los latidos pendientes que ya están completos en 'derivaciones'
+        (BufferCircular (muestras, canales) con los mismos índices que los R).
+        Devuelve True si la plantilla cambió.
+        """
+        escritas = derivaciones.escritas
+        cambio = False
+        while self._pendientes and self._pendientes[0] + self.despues <= escritas:
+            r = self._pendientes.pop(0)
+            inicio = r - self.antes
+            if inicio < 0 or inicio < escritas - derivaciones.capacidad:
+                self.rechazados += 1
+                continue
+            cambio |= self._sumar(derivaciones.entre(inicio, r + self.despues).T)
+        return cambio
+
+    def _sumar(self, latido):
+        if self.n >= self.latidos_minimos and self.correlacion_minima is not None:
+            c = np.corrcoef(latido[self.canal_referencia], self.plantilla[self.canal_referencia])[0, 1]
+            if not c >= self.correlacion_minima:
+                self.rechazados += 1
+                return False
+
+        ranura = self._latidos[self._pos]
+        if self.n == self.capacidad:
+            self._suma -= ranura          # Sale el latido más antiguo
+        else:
+            self.n += 1
+        ranura[:] = latido
+        self._suma += ranura
+        self._pos = (self._pos + 1) % self.capacidad
+        self.latidos += 1
+
+        if self.latidos % self.capacidad == 0:
+            np.sum(self._latidos[:self.n], axis=0, out=self._suma)
+        np.divide(self._suma, self.n, out=self.plantilla)
+        return True
@@ -0,0 +1,104 @@
+# protocolo.py - Protocolo binario por tramas entre LecturaESP.ino y el software
+import numpy as np
+
+# Trama de 6 bytes (firmware con MODO_BINARIO 1):
+#   [0] BYTE_SYNC (0xA5)
+#   [1] secuencia (uint8, da la vuelta en 255)
+#   [2] I[7:0]
+#   [3] I[11:8] | II[3:0] << 4
+#   [4] II[11:4]
+#   [5] checksum = (secuencia + b2 + b3 + b4) & 0xFF
+BYTE_SYNC = 0xA5
+TAM_TRAMA = 6
+
+_DESPLAZAMIENTOS = np.arange(TAM_TRAMA)
+_SYNC = bytes([BYTE_SYNC])
+_CHECKSUM = np.array([0, 1, 1, 1, 1, -1], dtype=np.int32)  # tramas @ _CHECKSUM es múltiplo de 256 si es válida
+_TRAMAS_PYTHON = 16  # Hasta aquí un bucle de Python gana a numpy (coste fijo por llamada)
+_VACIO = np.empty(0, dtype=np.int32)
+
+
+def codificar_tramas(valores_I, valores_II, secuencia_inicial=0):
+    """Empaqueta pares de 12 bits en tramas (lo mismo que hace el firmware). Devuelve bytes."""
+    valores_I = np.asarray(valores_I, dtype=np.int32) & 0x0FFF
+    valores_II = np.asarray(valores_II, dtype=np.int32) & 0x0FFF
+    tramas = np.empty((len(valores_I), TAM_TRAMA), dtype=np.int32)
+    tramas[:, 0] = BYTE_SYNC
+    tramas[:, 1] = (secuencia_inicial + np.arange(len(valores_I))) & 0xFF
+    tramas[:, 2] = valores_I & 0xFF
+    tramas[:, 3] = (valores_I >> 8) | ((valores_II & 0x0F) << 4)
+    tramas[:, 4] = valores_II >> 4
+    tramas[:, 5] = tramas[:, 1:5].sum(axis=1) & 0xFF
+    return tramas.astype(np.uint8).tobytes()
+
+
+def decodificar_tramas(datos, residuo=b""):
+    """
+    Decodifica TODAS las tramas completas de un bloque de bytes con np.frombuffer.
+    Devuelve (valores_I, valores_II, secuencias, residuo, descartados):
+    'residuo' son los últimos bytes que aún pueden ser el inicio de una trama
+    y 'descartados' los bytes que no pertenecían a ninguna trama válida
+    (ruido, mensajes de texto del arranque, tramas corruptas).
+    """
+    buffer = residuo + datos
+    n = len(buffer)
+    if n < TAM_TRAMA:
+        return _VACIO, _VACIO, _VACIO, buffer, 0
+    bytes_ = np.frombuffer(buffer, dtype=np.uint8)
+
+    # --- 0. Caso normal: el bloque empieza en una trama y todas son válidas ---
+    # (sin búsqueda de sincronía: en lecturas pequeñas es casi todo el coste)
+    m = n // TAM_TRAMA
+    if m <= _TRAMAS_PYTHON:
+        alineadas = _alineadas_python(buffer, m)
+        if alineadas is not None:
+            return alineadas + (buffer[m * TAM_TRAMA:], 0)
+    elif buffer[0:m * TAM_TRAMA:TAM_TRAMA] == _SYNC * m:
+        alineadas = bytes_[:m * TAM_TRAMA].reshape(m, TAM_TRAMA).astype(np.int32)
+        if not ((alineadas @ _CHECKSUM) & 0xFF).any():
+            return _desempaquetar(alineadas) + (buffer[m * TAM_TRAMA:], 0)
+
+    # --- 1. Candidatas: posiciones con byte de sincronía y checksum correcto ---
+    candidatas = np.flatnonzero(bytes_[:n - TAM_TRAMA + 1] == BYTE_SYNC)
+    tramas = bytes_[candidatas[:, np.newaxis] + _DESPLAZAMIENTOS].astype(np.int32)
+    validas = tramas[:, 1:5].sum(axis=1) & 0xFF == tramas[:, 5]
+    posiciones = candidatas[validas]
+    tramas = tramas[validas]
+
+    # --- 2. Falsos positivos (0xA5 dentro de los datos): quitamos solapes ---
+    if len(posiciones) > 1 and np.any(np.diff(posiciones) < TAM_TRAMA):
+        elegidas = []
+        siguiente_libre = 0
+        for i, pos in enumerate(posiciones.tolist()):
+            if pos >= siguiente_libre:
+                elegidas.append(i)
+                siguiente_libre = pos + TAM_TRAMA
+        posiciones = posiciones[elegidas]
+        tramas = tramas[elegidas]
+
+    # --- 3. Desempaquetar los pares de 12 bits ---
+    fin = int(posiciones[-1]) + TAM_TRAMA if len(posiciones) else 0
+    inicio_residuo = max(fin, n - TAM_TRAMA + 1)
+    descartados = inicio_residuo - TAM_TRAMA * len(posiciones)
+    return _desempaquetar(tramas) + (buffer[inicio_residuo:], descartados)
+
+
+def _alineadas_python(buffer, m):
+    """Paso 0 con pocas tramas, sin numpy. None si alguna no empieza en sincronía o falla el checksum."""
+    valores_I, valores_II, secuencias = [], [], []
+    for k in range(0, m * TAM_TRAMA, TAM_TRAMA):
+        sync, secuencia, b2, b3, b4, checksum = buffer[k:k + TAM_TRAMA]
+        if sync != BYTE_SYNC or (secuencia + b2 + b3 + b4) & 0xFF != checksum:
+            return None
+        valores_I.append(b2 | ((b3 & 0x0F) << 8))
+        valores_II.append((b3 >> 4) | (b4 << 4))
+        secuencias.append(secuencia)
+    return (np.array(valores_I, dtype=np.int32), np.array(valores_II, dtype=np.int32),
+            np.array(secuencias, dtype=np.int32))
+
+
+def _desempaquetar(tramas):
+    """(valores_I, valores_II, secuencias) de tramas (m, TAM_TRAMA) en int32."""
+    valores_I = tramas[:, 2] | ((tramas[:, 3] & 0x0F) << 8)
+    valores_II = (tramas[:, 3] >> 4) | (tramas[:, 4] << 4)
+    return valores_I, valores_II, tramas[:, 1]
@@ -0,0 +1,187 @@
+# qrs.py - Detector de picos R en tiempo real (estilo Pan-Tompkins) y frecuencia cardiaca
+from collections import deque
+import numpy as np
+from scipy import signal
+
+from buffer_circular import BufferCircular
+from filtro_sos import FiltroSOS
+
+
+class DetectorQRS:
+    """
+    Detector incremental de complejos QRS sobre la derivación II ya filtrada
+    (0.5-40 Hz). Cada bloque pasa por la cadena de Pan-Tompkins:
+
+        pasa-banda 5-15 Hz -> derivada de 5 puntos -> cuadrado ->
+        integración en ventana móvil (150 ms) -> umbrales adaptativos
+
+    Todo el estado (zi de los filtros, cola de la integración, umbrales)
+    persiste entre bloques como el 'zi' de FiltroSOS, y el trabajo por muestra
+    es O(1): la integración usa sumas acumuladas, no una ventana completa.
+    Solo los máximos locales de la señal integrada (pocos por latido) se
+    recorren en Python para aplicar los umbrales.
+
+    procesar(bloque) devuelve los índices (absolutos, contando desde la primera
+    muestra recibida) de los picos R nuevos, ya ubicados en el máximo de la
+    propia derivación II.
+    """
+
+    def __init__(self, fs, aprendizaje_s=2.0, refractario_s=0.2, ventana_s=0.15, latidos_fc=8):
+        self.fs = fs
+        self.refractario = int(refractario_s * fs)
+        self.aprendizaje = int(aprendizaje_s * fs)
+        self.ventana = max(1, int(round(ventana_s * fs)))
+
+        # Etapas lineales con estado
+        self.pasabanda = FiltroSOS(signal.butter(2, [5.0, 15.0], btype='band', fs=fs, output='sos'),
+                                   canales=1)
+        self._b_derivada = np.array([2.0, 1.0, 0.0, -1.0, -2.0]) * (fs / 8.0)
+        self._zi_derivada = np.zeros(len(self._b_derivada) - 1)
+        self._cola_cuadrado = np.zeros(self.ventana)    # Últimos 'ventana' cuadrados
+
+        # Retardo del pico integrado respecto al R (muestras) y la derivación II reciente
+        self._retardo = self.ventana + int(0.1 * fs)
+        self._maximo_bloque = max(1, int(fs))
+        self._historia = BufferCircular(self._retardo + self.ventana + self._maximo_bloque, canales=1)
+        self._previas = np.zeros(2)                      # Dos últimas muestras integradas
+        self.muestras = 0
+
+        # Umbrales adaptativos (picos de señal y de ruido de la señal integrada)
+        self._maximo_aprendizaje = 0.0
+        self._suma_aprendizaje = 0.0
+        self.spki = None
+        self.npki = 0.0
+        self._candidatos = []            # (índice integrado, valor) de ruido desde el último R
+        self._ultimo_r_integrado = None  # Índice del último R en la señal integrada
+        self._valor_ultimo_r = 0.0
+
+        self.picos_r = deque(maxlen=latidos_fc + 1)
+        self.latidos = 0
+
+    # --- Etapas lineales (vectorizadas por bloque) ---
+    def _integrar(self, bloque):
+        banda = self.pasabanda.filtrar(bloque[:, np.newaxis])[:, 0]
+        derivada, self._zi_derivada = signal.lfilter(self._b_derivada, 1.0, banda,
+                                                     zi=self._zi_derivada)
+        cuadrado = derivada * derivada
+        # Ventana móvil con sumas acumuladas: O(1) por muestra
+        z = np.concatenate((self._cola_cuadrado, cuadrado))
+        acumulada = np.concatenate(([0.0], np.cumsum(z)))
+        n = len(bloque)
+        integrada = (acumulada[self.ventana + 1:self.ventana + 1 + n] - acumulada[1:n + 1]) / self.ventana
+        self._cola_cuadrado = z[-self.ventana:]
+        return integrada
+
+    @property
+    def umbral(self):
+        if self.spki is None:
+            return None
+        return self.npki + 0.25 * (self.spki - self.npki)
+
+    def procesar(self, bloque):
+        """Procesa un bloque 1-D de la derivación II filtrada. Devuelve los índices de los R nuevos."""
+        bloque = np.asarray(bloque, dtype=np.float64)
+        n = len(bloque)
+        if n == 0:
+            return []
+        if n > self._maximo_bloque:
+            # La historia de II solo cubre ~1 s: bloques mayores se parten para ubicar bien cada R
+            nuevos = []
+            for i in range(0, n, self._maximo_bloque):
+                nuevos += self.procesar(bloque[i:i + self._maximo_bloque])
+            return nuevos
+        inicio = self.muestras
+        integrada = self._integrar(bloque)
+        self._historia.escribir(bloque[:, np.newaxis])
+        self.muestras += n
+
+        # --- Fase de aprendizaje: umbrales iniciales con los primeros segundos ---
+        # Termina en la muestra exacta: el resto del bloque ya pasa por la detección
+        if self.spki is None:
+            k = max(0, min(n, self.aprendizaje - inicio))
+            if k:
+                self._maximo_aprendizaje = max(self._maximo_aprendizaje, integrada[:k].max())
+                self._suma_aprendizaje += integrada[:k].sum()
+                self._previas = np.concatenate((self._previas, integrada[:k]))[-2:]
+            if inicio + k < self.aprendizaje:
+                return []
+            self.spki = self._maximo_aprendizaje / 3.0
+            self.npki = 0.5 * self._suma_aprendizaje / max(1, inicio + k)
+            integrada = integrada[k:]
+            inicio += k
+            if len(integrada) == 0:
+                return []
+
+        # --- Máximos locales de la señal integrada (el último se decide en el siguiente bloque) ---
+        extendida = np.concatenate((self._previas, integrada))
+        centro = extendida[1:-1]
+        es_maximo = (centro > extendida[:-2]) & (centro >= extendida[2:])
+        posiciones = np.flatnonzero(es_maximo)   # Índice en 'centro' = muestra inicio - 1 + pos
+        self._previas = extendida[-2:]
+
+        nuevos = []
+        for pos in posiciones.tolist():
+            indice = inicio - 1 + pos
+            self._clasificar(indice, centro[pos], nuevos)
+        self._buscar_hacia_atras(self.muestras - 1, nuevos)
+        return nuevos
+
+    def _clasificar(self, indice, valor, nuevos):
+        ultimo = self._ultimo_r_integrado
+        if ultimo is not None and indice - ultimo < self.refractario:
+            # Dentro del periodo refractario: solo puede corregir el R si es mayor
+            if valor > self._valor_ultimo_r and nuevos:
+                nuevos.pop()
+                self.picos_r.pop()
+                self.latidos -= 1
+                self._aceptar(indice, valor, nuevos, 0.125)
+            return
+        if valor > self.umbral:
+            self._aceptar(indice, valor, nuevos, 0.125)
+        else:
+            self.npki = 0.125 * valor + 0.875 * self.npki
+            self._candidatos.append((indice, valor))
+
+    def _aceptar(self, indice, valor, nuevos, peso):
+        self.spki = peso * valor + (1.0 - peso) * self.spki
+        self._ultimo_r_integrado = indice
+        self._valor_ultimo_r = valor
+        self._candidatos = []
+        r = self._ubicar_r(indice)
+        self.picos_r.append(r)
+        self.latidos += 1
+        nuevos.append(r)
+
+    def _buscar_hacia_atras(self, indice_actual, nuevos):
+        """Si pasa 1.66 RR sin latido, acepta el mayor candidato por encima de la mitad del umbral."""
+        rr = self.rr_medio()
+        if rr is None or self._ultimo_r_integrado is None or not self._candidatos:
+            return
+        if indice_actual - self._ultimo_r_integrado < 1.66 * rr:
+            return
+        indice, valor = max(self._candidatos, key=lambda c: c[1])
+        if valor > 0.5 * self.umbral and indice - self._ultimo_r_integrado >= self.refractario:
+            self._aceptar(indice, valor, nuevos, 0.25)
+
+    def _ubicar_r(self, indice_integrado):
+        """Posición del R: máximo de |II| en la ventana que precede al pico integrado."""
+        fin = min(indice_integrado + 1, self.muestras)
+        desde = max(fin - self._retardo, self.muestras - self._historia.capacidad, 0)
+        if fin <= desde:
+            return indice_integrado
+        tramo = self._historia.entre(desde, fin)[:, 0]
+        return desde + int(np.argmax(np.abs(tramo - np.median(tramo))))
+
+    # --- Frecuencia cardiaca ---
+    def rr_medio(self):
+        """RR medio (muestras) de los últimos latidos, o None."""
+        if len(self.picos_r) < 2:
+            return None
+        return float(np.mean(np.diff(self.picos_r)))
+
+    def frecuencia_cardiaca(self, maximo_sin_latido_s=3.0):
+        """Latidos por minuto, o None si no hay latidos recientes."""
+        rr = self.rr_medio()
+        if rr is None or self.muestras - self.picos_r[-1] > maximo_sin_latido_s * self.fs:
+            return None
+        return 60.0 * self.fs / rr
@@ -0,0 +1,58 @@
+# redimension.py - Agrupa las ráfagas de <Configure> y aplica solo la última geometría
+class CoalescedorRedimension:
+    """
+    Sustituye al root.bind("<Configure>", redimensionar) de las interfaces.
+
+    * Ignora los <Configure> de los widgets hijos que llegan a la raíz (el
+      binding de 'root' los recibe todos) y los que no cambian el tamaño.
+    * Espera 'retardo_ms' sin eventos y entonces llama UNA vez a aplicar().
+    * seguir_widget() hace lo mismo con el <Configure> propio de un widget
+      (por ejemplo el canvas de Matplotlib, que en cada evento reescala la
+      figura y la redibuja entera): solo se le pasa el último evento.
+    """
+
+    def __init__(self, root, aplicar, retardo_ms=150):
+        self.root = root
+        self.aplicar = aplicar
+        self.retardo_ms = retardo_ms
+        self._id = None
+        self._tamano_root = None
+        self._tamano_aplicado = None
+        self._widgets = {}
+        self.eventos = 0          # <Configure> reales de la raíz recibidos
+        self.aplicaciones = 0     # Veces que se aplicó la geometría
+        root.bind("<Configure>", self._al_configurar_root)
+
+    def seguir_widget(self, widget, al_aplicar):
+        """Reemplaza el <Configure> de 'widget'; al_aplicar(evento) se llama con el último evento."""
+        self._widgets[widget] = [al_aplicar, None, None]  # (callback, último evento, tamaño aplicado)
+        widget.bind("<Configure>", lambda evento, w=widget: self._al_configurar_widget(w, evento))
+
+    def _al_configurar_root(self, evento):
+        if evento.widget is not self.root:
+            return
+        self.eventos += 1
+        self._tamano_root = (evento.width, evento.height)
+        self._programar()
+
+    def _al_configurar_widget(self, widget, evento):
+        self._widgets[widget][1] = evento
+        self._programar()
+
+    def _programar(self):
+        if self._id is not None:
+            self.root.after_cancel(self._id)
+        self._id = self.root.after(self.retardo_ms, self._aplicar_pendiente)
+
+    def _aplicar_pendiente(self):
+        self._id = None
+        for datos in self._widgets.values():
+            al_aplicar, evento, tamano = datos
+            if evento is not None and (evento.width, evento.height) != tamano:
+                datos[1] = None
+                datos[2] = (evento.width, evento.height)
+                al_aplicar(evento)
+        if self._tamano_root != self._tamano_aplicado:
+            self._tamano_aplicado = self._tamano_root
+            self.aplicaciones += 1
+            self.aplicar()
@@ -0,0 +1,118 @@
+# registros.py - Lectura por bloques de registros largos (.mat v5/v7.3, binario crudo, sesiones .ecg)
+import numpy as np
+from scipy import io, signal
+
+from grabador import MAGICO, abrir_sesion
+
+
+class Registro:
+    """
+    Acceso por ventanas a un registro sin cargarlo entero en memoria.
+    '_datos' es cualquier objeto (muestras, canales) que se pueda recortar por
+    filas: un dataset de h5py, un np.memmap o un array ya cargado (.mat v5).
+    leer(inicio, fin) devuelve (canales, n) en float64, como mat['val'].
+    """
+
+    def __init__(self, datos, fs=None, archivo=None):
+        self._datos = datos
+        self._archivo = archivo
+        self.fs = fs
+        self.n_muestras, self.n_canales = datos.shape
+
+    def leer(self, inicio, fin):
+        return np.asarray(self._datos[inicio:fin], dtype=np.float64).T
+
+    def cerrar(self):
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+
+
+def _leer_fs(valor):
+    try:
+        return float(np.asarray(valor).ravel()[0])
+    except (IndexError, TypeError, ValueError):
+        return None
+
+
+def abrir_registro(ruta, variable="val", canales=None, dtype=np.int16, fs=None, campo="filtrado"):
+    """
+    Abre 'ruta' según su tipo:
+      * .mat v7.3 (HDF5, requiere h5py): la variable se lee por bloques del disco.
+      * .mat v5: scipy.io.loadmat (ese formato no permite leer por partes).
+      * sesión .ecg de grabador.py: columnas I y II de 'campo' ("filtrado" o "crudo").
+      * cualquier otro: binario crudo intercalado (muestras, canales) de 'dtype';
+        hace falta dar 'canales'.
+    'fs' se toma de la variable fs/Fs del .mat o de la cabecera .ecg si existe.
+    """
+    with open(ruta, "rb") as archivo:
+        inicio = archivo.read(128)
+
+    if inicio.startswith(MAGICO):
+        cabecera, registros = abrir_sesion(ruta)
+        datos = registros[campo] if len(registros) else np.empty((0, 2))
+        return Registro(datos, fs=cabecera["fs"] if fs is None else fs)
+
+    if inicio.startswith(b"MATLAB 7.3"):
+        import h5py
+        archivo = h5py.File(ruta, "r")
+        for nombre in ("fs", "Fs"):
+            if fs is None and nombre in archivo:
+                fs = _leer_fs(archivo[nombre][()])
+        # MATLAB guarda en orden de columnas: la matriz (canales, N) aparece como (N, canales)
+        return Registro(archivo[variable], fs=fs, archivo=archivo)
+
+    if inicio.startswith(b"MATLAB"):
+        mat = io.loadmat(ruta)
+        for nombre in ("fs", "Fs"):
+            if fs is None and nombre in mat:
+                fs = _leer_fs(mat[nombre])
+        return Registro(mat[variable].T, fs=fs)
+
+    if canales is None:
+        raise ValueError(f"{ruta}: para un binario crudo hay que indicar 'canales'")
+    datos = np.memmap(ruta, dtype=dtype, mode="r")
+    return Registro(datos[:len(datos) // canales * canales].reshape(-1, canales), fs=fs)
+
+
+def bloques(registro, tam_bloque=2 ** 16):
+    """Recorre el registro en ventanas consecutivas: genera (inicio, bloque (canales, n))."""
+    for inicio in range(0, registro.n_muestras, tam_bloque):
+        yield inicio, registro.leer(inicio, min(inicio + tam_bloque, registro.n_muestras))
+
+
+def solape_necesario(sos, tolerancia=1e-6, maximo=2 ** 22):
+    """
+    Muestras tras las cuales la respuesta al impulso del filtro cae por debajo
+    de 'tolerancia' (relativa a su pico): lo que un corte de bloque contamina.
+    """
+    largo = 4096
+    while True:
+        impulso = np.zeros(largo)
+        impulso[0] = 1.0
+        h = np.abs(signal.sosfilt(sos, impulso))
+        significativas = np.flatnonzero(h > tolerancia * h.max())
+        ultima = int(significativas[-1]) + 1
+        if ultima < largo // 2 or largo >= maximo:
+            return ultima
+        largo *= 2
+
+
+def filtrar_por_bloques(registro, sos, tam_bloque=2 ** 16, solape=None):
+    """
+    Filtrado de fase cero (sosfiltfilt) por bloques con memoria acotada.
+    Cada bloque se filtra con 'solape' muestras extra a cada lado, que se
+    descartan: así el resultado coincide con sosfiltfilt sobre el registro
+    entero (hasta la tolerancia de solape_necesario). Los extremos REALES del
+    registro usan el mismo relleno que sosfiltfilt.
+    Genera (inicio, bloque_filtrado (canales, n)).
+    """
+    if solape is None:
+        solape = solape_necesario(sos)
+    n = registro.n_muestras
+    for inicio in range(0, n, tam_bloque):
+        fin = min(inicio + tam_bloque, n)
+        desde = max(0, inicio - solape)
+        hasta = min(n, fin + solape)
+        filtrado = signal.sosfiltfilt(sos, registro.leer(desde, hasta), axis=1)
+        yield inicio, filtrado[:, inicio - desde:fin - desde]
@@ -0,0 +1,187 @@
+# render_blit.py - Dibujo con "blitting" para FigureCanvasTkAgg
+import numpy as np
+from matplotlib import rc_context
+from matplotlib.transforms import Bbox
+
+
+class RenderBlit:
+    """
+    Guarda el fondo estático de la figura (título, rejilla, etiquetas de los
+    ejes) y en cada cuadro solo vuelve a dibujar las líneas (Line2D).
+
+    Solo se hace un dibujo COMPLETO cuando cambian los límites de algún eje,
+    cuando cambia el tamaño de la figura o cuando se llama a invalidar()
+    (por ejemplo, después de cambiar un título).
+
+    'simplificacion' (px) es el path.simplify_threshold con el que se pintan
+    SOLO estas líneas (Agg pinta menos vértices); el resto de figuras del
+    proceso sigue con el valor global.
+    """
+
+    def __init__(self, canvas, lineas, simplificacion=None):
+        self.canvas = canvas
+        self.figura = canvas.figure
+        self.lineas = list(lineas)
+        # Matplotlib crea el Path de la línea al pintarla (tras set_data): el umbral tiene que
+        # estar activo entonces. Las que ya tienen Path (ax.plot) lo rehacen aquí
+        self._rc = {} if simplificacion is None else {"path.simplify_threshold": simplificacion}
+        with rc_context(self._rc):
+            for linea in self.lineas:
+                linea.recache_always()
+        self.ejes = []
+        for linea in self.lineas:
+            linea.set_animated(True)   # El dibujo normal ya no las pinta
+            if linea.axes not in self.ejes:
+                self.ejes.append(linea.axes)
+
+        self._fondo = None
+        self._estado = None
+        self.redibujados_completos = 0
+        self.cuadros_blit = 0
+
+        # Cualquier dibujo completo (nuestro, de Tk al redimensionar, etc.)
+        # vuelve a capturar el fondo
+        self.canvas.mpl_connect("draw_event", self._al_dibujar)
+
+    def _estado_actual(self):
+        """Límites de todos los ejes y tamaño de la figura: si cambian, el fondo ya no sirve."""
+        return (tuple(self.figura.bbox.bounds),
+                tuple(ax.get_xlim() + ax.get_ylim() for ax in self.ejes))
+
+    def _al_dibujar(self, evento):
+        self.redibujados_completos += 1
+        self._fondo = self.canvas.copy_from_bbox(self.figura.bbox)
+        self._estado = self._estado_actual()
+        self._dibujar_lineas()
+
+    def _dibujar_lineas(self):
+        with rc_context(self._rc):
+            for linea in self.lineas:
+                if linea.axes.get_visible():   # Las de una vista oculta no se pintan
+                    linea.axes.draw_artist(linea)
+
+    def invalidar(self):
+        """Obliga a que el siguiente cuadro sea un dibujo completo."""
+        self._fondo = None
+
+    def dibujar(self):
+        """Dibuja un cuadro: blit de las líneas o, si hace falta, dibujo completo."""
+        if self._fondo is None or self._estado_actual() != self._estado:
+            # Pedimos UN dibujo completo: Tk junta varias peticiones seguidas
+            # en una sola, y su 'draw_event' vuelve a capturar el fondo
+            self._fondo = None
+            self.canvas.draw_idle()
+            return
+
+        self.canvas.restore_region(self._fondo)
+        self._dibujar_lineas()
+        self.canvas.blit(self.figura.bbox)
+        self.cuadros_blit += 1
+
+
+class RenderBarrido(RenderBlit):
+    """
+    Modo "barrido" de monitor de cabecera: un cursor escribe la traza de
+    izquierda a derecha sobre la anterior, con un hueco borrado de 'hueco'
+    muestras delante, y al llegar al final vuelve a la izquierda.
+
+    El lienzo conserva lo ya pintado: en cada cuadro solo se restaura el fondo
+    en la franja nueva (más el hueco), se pinta el tramo escrito desde el
+    cuadro anterior y se copia a Tk solo esa franja. El trabajo es proporcional
+    a las muestras nuevas, no a la ventana.
+
+    Guarda sus propias 'muestras' x 'canales' (agregar) y las líneas reciben
+    los datos con trazar(x, ventana), que pone la interfaz según la vista.
+    Con trazar = None se comporta como RenderBlit.
+    """
+
+    def __init__(self, canvas, lineas, muestras, canales=1, hueco=None, simplificacion=None):
+        super().__init__(canvas, lineas, simplificacion)
+        self.muestras = muestras
+        self.hueco = hueco if hueco is not None else max(1, muestras // 50)
+        self.trazar = None
+        self.escritas = 0
+        self._x = np.arange(muestras, dtype=float)
+        self._y = np.full((muestras, canales), np.nan)
+        self._pintadas = 0     # 'escritas' que ya están en el lienzo
+        self.cuadros_barrido = 0
+
+    def agregar(self, bloque):
+        """Escribe las muestras nuevas (n, canales) a partir de la columna del cursor."""
+        self.escritas += len(bloque)
+        bloque = bloque[-self.muestras:]
+        cursor = (self.escritas - len(bloque)) % self.muestras
+        k = min(len(bloque), self.muestras - cursor)
+        self._y[cursor:cursor + k] = bloque[:k]
+        self._y[:len(bloque) - k] = bloque[k:]
+
+    def _traza_completa(self):
+        """Pasa a las líneas la ventana entera, con el hueco delante del cursor."""
+        ventana = self._y.copy()
+        cursor = self.escritas % self.muestras
+        ventana[cursor:cursor + self.hueco] = np.nan
+        ventana[:max(0, cursor + self.hueco - self.muestras)] = np.nan
+        self.trazar(self._x, ventana)
+        self._pintadas = self.escritas
+
+    def _al_dibujar(self, evento):
+        if self.trazar is not None:
+            self._traza_completa()
+        super()._al_dibujar(evento)
+
+    def _borrar(self, inicio, fin):
+        """Restaura el fondo de las columnas [inicio, fin) y devuelve su caja en píxeles."""
+        ejes = [ax for ax in self.ejes if ax.get_visible()]
+        abajo = min(ax.bbox.y0 for ax in ejes)
+        arriba = max(ax.bbox.y1 for ax in ejes)
+        izquierda, derecha = ejes[0].transData.transform([(inicio, 0), (fin, 0)])[:, 0]
+        izquierda, derecha = np.floor(izquierda), np.ceil(derecha) + 1
+        # restore_region cuenta las filas desde ARRIBA del lienzo
+        alto = self.figura.bbox.height
+        self.canvas.restore_region(self._fondo, bbox=(izquierda, alto - arriba, derecha, alto - abajo),
+                                   xy=(0, 0))
+        return Bbox([[izquierda, abajo], [derecha, arriba]])
+
+    def _solape(self):
+        """Muestras que caben en ~2 píxeles del eje (al menos 1)."""
+        eje = self.ejes[0] if self.ejes[0].get_visible() else self.ejes[-1]
+        return 1 + int(np.ceil(2 * self.muestras / max(eje.bbox.width, 1)))
+
+    def dibujar(self):
+        if self.trazar is None:
+            return super().dibujar()
+        if self._fondo is None or self._estado_actual() != self._estado:
+            self._fondo = None
+            self.canvas.draw_idle()
+            return
+        nuevas = self.escritas - self._pintadas
+        if nuevas == 0:
+            return
+        if nuevas + self.hueco >= self.muestras:
+            # Casi una vuelta entera desde el último cuadro: se repinta la ventana
+            self.canvas.restore_region(self._fondo)
+            self._traza_completa()
+            self._dibujar_lineas()
+            self.canvas.blit(self.figura.bbox)
+            self.cuadros_blit += 1
+            return
+
+        cajas = []
+        inicio = self._pintadas % self.muestras
+        fin = inicio + nuevas
+        # Tramos [a, b) de columnas (el segundo solo si el cursor dio la vuelta)
+        for a, b in ((inicio, min(fin, self.muestras)), (0, fin - self.muestras)):
+            if b <= a:
+                continue
+            cajas.append(self._borrar(a, min(b + self.hueco, self.muestras)))
+            # Se repinta desde ~2 px antes: el trazo anterior pasaba del borde borrado
+            desde = max(a - self._solape(), 0)
+            self.trazar(self._x[desde:b], self._y[desde:b])
+            self._dibujar_lineas()
+        if fin + self.hueco > self.muestras >= fin:
+            # El hueco continúa al principio de la ventana
+            cajas.append(self._borrar(0, fin + self.hueco - self.muestras))
+        for caja in cajas:
+            self.canvas.blit(caja)
+        self._pintadas = self.escritas
+        self.cuadros_barrido += 1
@@ -0,0 +1,100 @@
+# tasa_muestreo.py - Frecuencia de muestreo REAL, jitter y muestras perdidas
+import time
+import numpy as np
+
+
+class MonitorTasa:
+    """
+    Mide la frecuencia de muestreo real a partir de la llegada de bloques.
+
+    Cada bloque se registra con la hora del host y el número acumulado de
+    muestras; la pendiente de la recta (mínimos cuadrados) sobre los últimos
+    'ventana_s' segundos es la fs real y la desviación de los residuos es el
+    jitter de llegada. Con el protocolo binario, los números de secuencia de
+    8 bits permiten además contar las muestras perdidas (huecos).
+    """
+
+    def __init__(self, fs_nominal, ventana_s=10.0, max_registros=1024, reloj=time.monotonic):
+        self.fs_nominal = fs_nominal
+        self.ventana_s = ventana_s
+        self.reloj = reloj
+        self._tiempos = np.zeros(max_registros)
+        self._cuentas = np.zeros(max_registros)
+        self._registros = 0
+        self._ultima_secuencia = None
+
+        self.muestras_recibidas = 0
+        self.muestras_perdidas = 0   # Según los saltos de secuencia
+        self.huecos = 0              # Número de saltos (eventos de pérdida)
+
+    def registrar(self, n, secuencias=None, t=None):
+        """Registra la llegada de n muestras (y sus secuencias, si el protocolo las trae)."""
+        if n == 0:
+            return
+        if t is None:
+            t = self.reloj()
+
+        perdidas = 0
+        if secuencias is not None and len(secuencias):
+            secuencias = np.asarray(secuencias, dtype=np.int64)
+            if self._ultima_secuencia is None:
+                saltos = np.diff(secuencias) % 256
+            else:
+                saltos = np.diff(secuencias, prepend=self._ultima_secuencia) % 256
+            perdidas = int(np.sum((saltos - 1) % 256))
+            self.huecos += int(np.count_nonzero(saltos != 1))
+            self._ultima_secuencia = int(secuencias[-1])
+
+        self.muestras_recibidas += n
+        self.muestras_perdidas += perdidas
+
+        i = self._registros % len(self._tiempos)
+        self._tiempos[i] = t
+        # Contamos también las perdidas: el ESP32 sí las muestreó
+        self._cuentas[i] = self.muestras_recibidas + self.muestras_perdidas
+        self._registros += 1
+
+    def _ventana(self):
+        n = min(self._registros, len(self._tiempos))
+        tiempos = self._tiempos[:n]
+        cuentas = self._cuentas[:n]
+        if n == 0:
+            return tiempos, cuentas
+        recientes = tiempos >= tiempos.max() - self.ventana_s
+        return tiempos[recientes], cuentas[recientes]
+
+    def tasa_real(self):
+        """fs real estimada (Hz) o None si aún no hay suficientes bloques."""
+        tiempos, cuentas = self._ventana()
+        if len(tiempos) < 3 or np.ptp(tiempos) == 0:
+            return None
+        pendiente, _ = np.polyfit(tiempos - tiempos.min(), cuentas, 1)
+        return pendiente
+
+    def jitter_ms(self):
+        """Desviación estándar (ms) de la llegada de bloques respecto a la recta ajustada."""
+        tiempos, cuentas = self._ventana()
+        if len(tiempos) < 3 or np.ptp(tiempos) == 0:
+            return None
+        t = tiempos - tiempos.min()
+        pendiente, ordenada = np.polyfit(t, cuentas, 1)
+        residuos_s = (cuentas - (pendiente * t + ordenada)) / pendiente
+        return 1000.0 * np.std(residuos_s)
+
+    def bordes_reales(self, lowcut, highcut):
+        """
+        Dónde quedan REALMENTE las frecuencias de corte de un filtro diseñado
+        con fs_nominal: los bordes escalan con fs_real / fs_nominal.
+        """
+        fs_real = self.tasa_real()
+        if fs_real is None:
+            return None
+        factor = fs_real / self.fs_nominal
+        return lowcut * factor, highcut * factor
+
+    def desviacion(self):
+        """Desviación relativa de la fs real respecto a la nominal (ej. -0.05 = 5 % más lenta)."""
+        fs_real = self.tasa_real()
+        if fs_real is None:
+            return None
+        return (fs_real - self.fs_nominal) / self.fs_nominal
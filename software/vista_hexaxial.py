@@ -0,0 +1,38 @@
+# vista_hexaxial.py - Sistema hexaxial en un tk.Canvas con la flecha del eje eléctrico
+import math
+import tkinter as tk
+
+# Ángulo de cada derivación en el plano frontal (+90° = aVF, hacia abajo como en la pantalla)
+ANGULOS_HEXAXIALES = (("I", 0), ("II", 60), ("III", 120), ("aVR", -150), ("aVL", -30), ("aVF", 90))
+
+
+class VistaHexaxial:
+    """
+    Las seis derivaciones se dibujan una sola vez; actualizar el eje solo
+    mueve la flecha con canvas.coords() (no se redibuja nada más ni se toca
+    la figura de Matplotlib).
+    """
+
+    def __init__(self, parent, tam=140, bg='white'):
+        self.canvas = tk.Canvas(parent, width=tam, height=tam, bg=bg, highlightthickness=0)
+        self._centro = tam / 2
+        self._radio = tam / 2 - 16
+        c, r = self._centro, self._radio
+        for nombre, grados in ANGULOS_HEXAXIALES:
+            dx = r * math.cos(math.radians(grados))
+            dy = r * math.sin(math.radians(grados))
+            self.canvas.create_line(c - dx, c - dy, c + dx, c + dy, fill='gray', dash=(2, 2))
+            self.canvas.create_text(c + dx * 1.18, c + dy * 1.18, text=nombre,
+                                    fill='gray25', font=("Arial", 7))
+        self._flecha = self.canvas.create_line(c, c, c, c, arrow=tk.LAST, width=3, fill='red')
+
+    def mostrar(self, grados):
+        """Apunta la flecha a 'grados' (None la oculta)."""
+        c = self._centro
+        if grados is None:
+            self.canvas.coords(self._flecha, c, c, c, c)
+            return
+        largo = self._radio * 0.9
+        self.canvas.coords(self._flecha, c, c,
+                           c + largo * math.cos(math.radians(grados)),
+                           c + largo * math.sin(math.radians(grados)))
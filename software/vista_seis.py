@@ -0,0 +1,74 @@
+# vista_seis.py - Las 6 derivaciones en paneles apilados, dibujadas con UNA sola línea
+import numpy as np
+
+from derivaciones import NOMBRES_DERIVACIONES
+
+
+class VistaSeisDerivaciones:
+    """
+    Un panel por derivación (rejilla, nombre y escala Y propios, como en
+    tests/DerivacionesSimuladas.py) y, encima, un eje transparente que los
+    cubre a todos con UNA línea para las 6 trazas: la derivación k se lleva
+    a la franja [fila, fila + 1] según los límites de su panel y las trazas
+    se encadenan separadas por NaN.
+
+    Con blitting los paneles quedan en el fondo y cada cuadro pinta una sola
+    línea: en paneles pequeños el trabajo fijo de Matplotlib por línea pesa
+    más que los vértices, así que una línea cuesta bastante menos que seis.
+    Al cambiar los límites de un panel hay que forzar un dibujo completo
+    (RenderBlit solo vigila el eje de la línea).
+    """
+
+    def __init__(self, fig, muestras, nombres=NOMBRES_DERIVACIONES, titulo=None, **estilo):
+        self.nombres = tuple(nombres)
+        filas = len(self.nombres)
+        self.ejes = list(fig.subplots(filas, 1, sharex=True, gridspec_kw={"hspace": 0}))
+        self.limites = np.tile([-1.0, 1.0], (filas, 1))
+        for eje, nombre, limites in zip(self.ejes, self.nombres, self.limites):
+            eje.set_facecolor('white')
+            eje.grid(True, color='gray', alpha=0.3)
+            eje.tick_params(labelsize=7)
+            eje.text(0.01, 0.85, nombre, transform=eje.transAxes, fontsize=8, fontweight='bold', va='top')
+            eje.set_ylim(*limites)
+        if titulo:
+            self.ejes[0].set_title(titulo)
+
+        # Eje de las trazas: mismo ancho que los paneles y alto de los 6 juntos
+        abajo, arriba = self.ejes[-1].get_position(), self.ejes[0].get_position()
+        self.eje_trazos = fig.add_axes([abajo.x0, abajo.y0, abajo.width, arriba.y1 - abajo.y0])
+        self.eje_trazos.set_axis_off()
+        self.eje_trazos.set_ylim(0, filas)
+        self.linea, = self.eje_trazos.plot([], [], **estilo)
+        self._filas = np.arange(filas - 1, -1, -1)[:, np.newaxis]   # El panel de arriba es la franja más alta
+        self.fijar_x(0, muestras, "Muestras")
+
+    def mostrar(self, visible):
+        for eje in self.ejes + [self.eje_trazos]:
+            eje.set_visible(visible)
+
+    def fijar_x(self, inferior, superior, etiqueta):
+        self.ejes[-1].set_xlim(inferior, superior)   # Compartido por los 6 paneles
+        self.eje_trazos.set_xlim(inferior, superior)
+        self.ejes[-1].set_xlabel(etiqueta)
+
+    def fijar_y(self, k, inferior, superior):
+        self.limites[k] = (inferior, superior)
+        self.ejes[k].set_ylim(inferior, superior)
+
+    def trazos(self, x, ventana):
+        """(x, y) de la línea para 'ventana' (muestras, 6) y el eje X 'x' (recorta cada traza a su panel)."""
+        n = len(x)
+        filas = len(self.nombres)
+        xs = np.empty((filas, n + 1))
+        xs[:, :n] = x
+        xs[:, n] = np.nan
+        ys = np.empty((filas, n + 1))
+        ys[:, n] = np.nan
+        inferior = self.limites[:, 0:1]
+        np.divide(ventana.T - inferior, self.limites[:, 1:2] - inferior, out=ys[:, :n])
+        np.clip(ys[:, :n], 0.0, 1.0, out=ys[:, :n])
+        ys[:, :n] += self._filas
+        return xs.ravel(), ys.ravel()
+
+    def actualizar(self, x, ventana):
+        self.linea.set_data(*self.trazos(x, ventana))
@@ -1,36 +1,52 @@
-import scipy.io
 import matplotlib.pyplot as plt
 import numpy as np
-from scipy.signal import butter, filtfilt
+from scipy.signal import butter
 
-# --- 1. Cargar el archivo .mat ---
-mat = scipy.io.loadmat('main.mat')
+import comun  # Ruta a los módulos compartidos con la interfaz (carpeta /software)
+from registros import abrir_registro, filtrar_por_bloques
 
-# --- 2. Acceder a los datos ---
-x = mat['val']
-print(f"La forma de los datos (shape) es: {x.shape}")
+# --- CONFIGURACIÓN ---
+ARCHIVO = 'main.mat'              # .mat v5 o v7.3 (HDF5), o sesión .ecg
+SALIDA = 'main_filtrado.npy'      # Registro filtrado completo (se escribe por bloques)
+DURACION_S = 10.0                 # Solo si el archivo no trae 'fs'
+SEGUNDOS_GRAFICA = 10.0           # Lo que se grafica (desde el inicio)
+TAM_BLOQUE = 2 ** 16              # Muestras por bloque: la memoria no depende de la duración
 
-# --- 3. Crear el vector de tiempo ---
-duracion_segundos = 10.0
-num_muestras = x.shape[1]
-Fs = num_muestras / duracion_segundos  # Frecuencia de muestreo
-t = np.arange(num_muestras) / Fs
-print(f"Frecuencia de muestreo (Fs) calculada: {Fs} Hz")
+# --- 1. Abrir el archivo (sin cargarlo entero) ---
+registro = abrir_registro(ARCHIVO)
+print(f"La forma de los datos (shape) es: {(registro.n_canales, registro.n_muestras)}")
 
-# --- 4. DISEÑAR Y APLICAR EL FILTRO ---
+# --- 2. Frecuencia de muestreo ---
+num_muestras = registro.n_muestras
+Fs = registro.fs or num_muestras / DURACION_S  # Frecuencia de muestreo
+print(f"Frecuencia de muestreo (Fs): {Fs} Hz")
+
+# --- 3. DISEÑAR EL FILTRO ---
 
 # Parámetros del filtro (Puedes ajustar 'cutoff_freq' si es necesario)
 fs = Fs
 cutoff_freq = 45.0  # Frecuencia de corte en Hz
 order = 5
 
-# Diseñar el filtro Butterworth
+# Diseñar el filtro Butterworth (en SOS, más estable para filtrar por bloques)
 nyquist_freq = 0.5 * fs
 normal_cutoff = cutoff_freq / nyquist_freq
-b, a = butter(order, normal_cutoff, btype='low', analog=False)
-
-# Aplicar el filtro a todas las señales
-x_filtrado = filtfilt(b, a, x, axis=1)
+sos = butter(order, normal_cutoff, btype='low', analog=False, output='sos')
+
+# --- 4. APLICAR EL FILTRO POR BLOQUES (fase cero, igual que filtfilt sobre todo el registro) ---
+muestras_grafica = min(num_muestras, int(SEGUNDOS_GRAFICA * Fs))
+x_filtrado = np.empty((registro.n_canales, muestras_grafica))
+salida = np.lib.format.open_memmap(SALIDA, mode='w+', dtype=np.float32,
+                                   shape=(registro.n_canales, num_muestras))
+for inicio, bloque in filtrar_por_bloques(registro, sos, tam_bloque=TAM_BLOQUE):
+    salida[:, inicio:inicio + bloque.shape[1]] = bloque
+    if inicio < muestras_grafica:
+        n = min(bloque.shape[1], muestras_grafica - inicio)
+        x_filtrado[:, inicio:inicio + n] = bloque[:, :n]
+salida.flush()
+registro.cerrar()
+t = np.arange(muestras_grafica) / Fs
+print(f"Registro filtrado guardado en '{SALIDA}'")
 
 # --- 5. Separar las 6 derivaciones (Datos FILTRADOS) ---
 derivI_f   = x_filtrado[0, :]
@@ -82,7 +98,7 @@ axs[5].set_title('aVF')
 axs[5].set_ylim(-500, 250)
 axs[5].set_ylabel('Amplitud')
 axs[5].set_xlabel('Tiempo (s)')
-axs[5].set_xlim(0, 10)
+axs[5].set_xlim(0, SEGUNDOS_GRAFICA)
 
 
 # --- 7. Mostrar y guardar la gráfica ---
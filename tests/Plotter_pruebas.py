@@ -4,9 +4,13 @@ import numpy as np
 from scipy import signal
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
-from collections import deque
 import time
 
+import comun  # Ruta a los módulos compartidos con la interfaz (carpeta /software)
+from adquisicion import leer_bloque
+from buffer_circular import BufferCircular
+from filtro_sos import FiltroSOS
+
 # --- CONFIGURACIÓN ---
 SERIAL_PORT = 'COM3' 
 BAUD_RATE = 115200
@@ -31,16 +35,14 @@ except serial.SerialException as e:
     print(f"Error al abrir el puerto serie {SERIAL_PORT}: {e}")
     exit()
 
-# ## <-- CAMBIO: 4 Deques para crudos y filtrados
-# Las de 'raw' guardan enteros, las de 'filt' guardan flotantes
-data_I_raw = deque([0] * MAX_DATA_POINTS, maxlen=MAX_DATA_POINTS)
-data_I_filt = deque([0.0] * MAX_DATA_POINTS, maxlen=MAX_DATA_POINTS)
-data_II_raw = deque([0] * MAX_DATA_POINTS, maxlen=MAX_DATA_POINTS)
-data_II_filt = deque([0.0] * MAX_DATA_POINTS, maxlen=MAX_DATA_POINTS)
+# ## <-- CAMBIO: 2 Buffers circulares [I, II] para crudos y filtrados
+# El de 'raw' guarda enteros, el de 'filt' guarda flotantes
+data_raw = BufferCircular(MAX_DATA_POINTS, 2, dtype=np.int32)
+data_filt = BufferCircular(MAX_DATA_POINTS, 2)
 
-# ## <-- CAMBIO: Estados del filtro (igual que antes)
-zi_I = signal.sosfilt_zi(sos)
-zi_II = signal.sosfilt_zi(sos)
+# ## <-- CAMBIO: Filtro por bloques (guarda el zi de I y II, igual que antes)
+filtro = FiltroSOS(sos, canales=2)
+residuo_serie = b""
 
 
 # ## <-- CAMBIO: CONFIGURACIÓN DE LA GRÁFICA (4 Subplots)
@@ -87,44 +89,39 @@ def init_plot():
         ax.set_xlim(0, MAX_DATA_POINTS)
 
     # Inicializamos las líneas con ceros
-    line_I_raw.set_data(x_axis_data, data_I_raw)
-    line_I_filt.set_data(x_axis_data, data_I_filt)
-    line_II_raw.set_data(x_axis_data, data_II_raw)
-    line_II_filt.set_data(x_axis_data, data_II_filt)
+    actualizar_lineas()
     
     return lines
 
+def actualizar_lineas():
+    # Vistas ordenadas (sin copia) de las últimas MAX_DATA_POINTS muestras
+    raw = data_raw.ultimos(MAX_DATA_POINTS)
+    filt = data_filt.ultimos(MAX_DATA_POINTS)
+    line_I_raw.set_data(x_axis_data, raw[:, 0])
+    line_I_filt.set_data(x_axis_data, filt[:, 0])
+    line_II_raw.set_data(x_axis_data, raw[:, 1])
+    line_II_filt.set_data(x_axis_data, filt[:, 1])
+
 # --- FUNCIÓN DE ANIMACIÓN MODIFICADA ---
 def update(frame):
-    global zi_I, zi_II 
+    global residuo_serie
     
     try:
-        line_data = ser.readline().decode('utf-8').strip()
+        valores_I, valores_II, residuo_serie = leer_bloque(ser, residuo_serie)
         
-        if ',' in line_data:
-            valor_I, valor_II = map(int, line_data.split(','))
-            
-            # --- 1. FILTRAR SOLO LA NUEVA MUESTRA ---
-            y_I, zi_I = signal.sosfilt(sos, [valor_I], zi=zi_I)
-            y_II, zi_II = signal.sosfilt(sos, [valor_II], zi=zi_II)
-            
-            y_I_sample = y_I[0]
-            y_II_sample = y_II[0]
-
-            # --- 2. AÑADIR DATOS CRUDOS Y FILTRADOS A LAS DEQUES ---
+        if len(valores_I) > 0:
+            # --- 1. FILTRAR TODO EL BLOQUE NUEVO (I y II en una llamada) ---
+            bloque = np.column_stack((valores_I, valores_II))
+            filtradas = filtro.filtrar(bloque)
+
+            # --- 2. AÑADIR DATOS CRUDOS Y FILTRADOS A LOS BUFFERS ---
             # ## <-- CAMBIO: Añadimos ambos tipos de datos
-            data_I_raw.append(valor_I)
-            data_I_filt.append(y_I_sample)
-            
-            data_II_raw.append(valor_II)
-            data_II_filt.append(y_II_sample)
+            data_raw.escribir(bloque)
+            data_filt.escribir(filtradas)
 
             # --- 3. ACTUALIZAR GRÁFICAS ---
             # ## <-- CAMBIO: Actualizamos las 4 líneas
-            line_I_raw.set_data(x_axis_data, data_I_raw)
-            line_I_filt.set_data(x_axis_data, data_I_filt)
-            line_II_raw.set_data(x_axis_data, data_II_raw)
-            line_II_filt.set_data(x_axis_data, data_II_filt)
+            actualizar_lineas()
 
     except (ValueError, UnicodeDecodeError, serial.SerialException):
         pass 
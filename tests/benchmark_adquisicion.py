@@ -0,0 +1,101 @@
+# benchmark_adquisicion.py - Muestras/s que sostiene la cadena del host para cada fs de adquisición
+#   parseo (ASCII o binario) -> decimación anti-alias -> pasa-banda SOS
+# y si el enlace serie da abasto a esa fs. No necesita el ESP32.
+import time
+import numpy as np
+from scipy import signal
+
+from comun import senales_sinteticas, codigos_adc
+from adquisicion import parsear_bloque
+from decimacion import Decimador
+from filtro_sos import FiltroSOS
+from protocolo import codificar_tramas, decodificar_tramas, TAM_TRAMA
+
+# --- CONFIGURACIÓN ---
+FS_DISPLAY = 333.33          # fs de visualización/análisis tras decimar
+FACTORES = [1, 2, 3, 4, 6]   # fs de adquisición = FS_DISPLAY * factor
+BAUDIOS = [115200, 921600]
+DURACION_S = 20.0            # Segundos de señal simulada por caso
+LECTURA_MS = 20              # Cada lectura del hilo junta ~20 ms (rebanada_s de leer_agrupado)
+LECTURAS_MS = [0, 3, 10, 20]  # Tamaños de lectura comparados a fs = FS_DISPLAY (0 = una muestra)
+lowcut, highcut, order = 0.5, 40.0, 4
+
+sos = signal.butter(order, [lowcut, highcut], btype='band', fs=FS_DISPLAY, output='sos')
+
+
+def generar_senales(fs_adq):
+    """ECG sintético de 12 bits (I y II) con ruido, como lo enviaría el ESP32."""
+    valores = codigos_adc(senales_sinteticas(fs_adq, DURACION_S)[0])
+    return valores[:, 0], valores[:, 1]
+
+
+def codificar(valores_I, valores_II, protocolo):
+    if protocolo == "binario":
+        return codificar_tramas(valores_I, valores_II)
+    lineas = [f"{a},{b}\r\n" for a, b in zip(valores_I.tolist(), valores_II.tolist())]
+    return "".join(lineas).encode()
+
+
+def medir(datos, fs_adq, factor, protocolo, lectura_ms=LECTURA_MS, cadena=True):
+    """
+    Pasa 'datos' por la cadena completa (o solo por el decodificador si
+    'cadena' es False) en trozos de 'lectura_ms'. Devuelve muestras/s.
+    """
+    bytes_por_muestra = len(datos) / (DURACION_S * fs_adq)
+    trozo = max(int(np.ceil(bytes_por_muestra)), int(bytes_por_muestra * fs_adq * lectura_ms / 1000))
+    decimador = Decimador(factor, canales=2)
+    filtro = FiltroSOS(sos, canales=2)
+    residuo = b""
+    muestras = 0
+
+    inicio = time.perf_counter()
+    for i in range(0, len(datos), trozo):
+        if protocolo == "binario":
+            valores_I, valores_II, _, residuo, _ = decodificar_tramas(datos[i:i + trozo], residuo)
+        else:
+            valores_I, valores_II, residuo = parsear_bloque(datos[i:i + trozo], residuo)
+        if len(valores_I) == 0:
+            continue
+        muestras += len(valores_I)
+        if not cadena:
+            continue
+        bloque = decimador.decimar(np.column_stack((valores_I, valores_II)))
+        if len(bloque):
+            filtro.filtrar(bloque)
+    return muestras / (time.perf_counter() - inicio)
+
+
+# --- Líneas mal formadas: se descartan enteras (no se parten en muestras falsas) ---
+for linea, esperado in ((b"1,2 3,4\n", []), (b"1,2,3\n4\n", []), (b"1 2,\n", []),
+                        (b"hola\n7,8\r\n", [(7, 8)])):
+    valores_I, valores_II, _ = parsear_bloque(linea)
+    assert list(zip(valores_I.tolist(), valores_II.tolist())) == esperado, linea
+
+# --- EJECUCIÓN ---
+print(f"{'fs adq':>9} {'factor':>6} {'protocolo':>9} {'B/muestra':>9} "
+      f"{'muestras/s host':>16} {'margen':>8}  " + "  ".join(f"{b:>7}" for b in BAUDIOS))
+for factor in FACTORES:
+    fs_adq = FS_DISPLAY * factor
+    valores_I, valores_II = generar_senales(fs_adq)
+    for protocolo in ("ascii", "binario"):
+        datos = codificar(valores_I, valores_II, protocolo)
+        bytes_por_muestra = TAM_TRAMA if protocolo == "binario" else len(datos) / len(valores_I)
+        tasa_host = medir(datos, fs_adq, factor, protocolo)
+        # 10 bits por byte en la línea serie (start + 8 datos + stop)
+        enlace = ["  OK   " if b / (10 * bytes_por_muestra) >= fs_adq else "  NO   " for b in BAUDIOS]
+        print(f"{fs_adq:9.1f} {factor:6d} {protocolo:>9} {bytes_por_muestra:9.1f} "
+              f"{tasa_host:16,.0f} {tasa_host / fs_adq:7.0f}x  " + "  ".join(enlace))
+
+print("\nmargen = muestras/s que procesa el host / fs de adquisición (>1: tiempo real).")
+print("Columnas de baudios: si el enlace serie sostiene esa fs con ese protocolo.")
+
+# --- Tamaño de lectura: con lecturas pequeñas domina el coste fijo por llamada ---
+valores_I, valores_II = generar_senales(FS_DISPLAY)
+print(f"\n{'':>10} {'solo decodificar (muestras/s)':>31} {'cadena completa (muestras/s)':>31}   (fs {FS_DISPLAY} Hz)")
+print(f"{'lectura':>10} {'ascii':>15} {'binario':>15} {'ascii':>15} {'binario':>15}")
+for lectura_ms in LECTURAS_MS:
+    tasas = [medir(codificar(valores_I, valores_II, protocolo), FS_DISPLAY, 1, protocolo, lectura_ms, cadena)
+             for cadena in (False, True) for protocolo in ("ascii", "binario")]
+    nombre = "1 muestra" if lectura_ms == 0 else f"{lectura_ms} ms"
+    print(f"{nombre:>10} " + " ".join(f"{tasa:15,.0f}" for tasa in tasas))
+print("El hilo de adquisición lee con leer_agrupado (rebanada de ~20 ms), no muestra a muestra.")
@@ -0,0 +1,60 @@
+# benchmark_eje.py - Coste por latido del eje eléctrico: latido a latido y en lote para N dispositivos
+import time
+import numpy as np
+from scipy import signal
+
+from comun import derivaciones_sinteticas
+from buffer_circular import BufferCircular
+from eje_electrico import EjeElectrico, eje_qrs
+
+# --- CONFIGURACIÓN ---
+fs = 333.33
+LATIDOS = 2000
+RR_S = 0.8
+N_DISPOSITIVOS = [1, 4, 16, 64]
+LPM_MAXIMA = 180          # Peor caso: latidos por segundo que llegan de cada placa
+PRESUPUESTO_CPU = 0.01    # Fracción de un núcleo reservada para el eje
+sos = signal.butter(4, [0.5, 40.0], btype='band', fs=fs, output='sos')
+
+
+def derivaciones_eje(grados, latidos, semilla=0):
+    """ECG sintético filtrado con eje 'grados': las 6 derivaciones (N, 6) y exactamente 'latidos' R."""
+    derivaciones, picos = derivaciones_sinteticas(fs, 1.1 * latidos * RR_S + 2.0, sos, bpm=60.0 / RR_S,
+                                                  eje_grados=grados, semilla=semilla)
+    return derivaciones, picos[:latidos]
+
+
+# --- 1. Latido a latido (como en la interfaz) ---
+derivaciones, picos = derivaciones_eje(30, LATIDOS)
+buffer = BufferCircular(len(derivaciones), 6)
+buffer.escribir(derivaciones)
+estimador = EjeElectrico(fs)
+inicio = time.perf_counter()
+for r in picos:
+    estimador.agregar([r])
+    estimador.actualizar(buffer)
+us_latido = 1e6 * (time.perf_counter() - inicio) / len(picos)
+print(f"Latido a latido: {us_latido:.1f} us/latido (eje estimado {estimador.eje:.1f}°, real 30°)")
+
+# --- 2. En lote: un eje_qrs para todos los latidos de N dispositivos ---
+print(f"\n{'N':>4} {'latidos':>8} {'us/latido lote':>15} {'placas en ' + str(int(100 * PRESUPUESTO_CPU)) + ' % CPU':>16}")
+for n in N_DISPOSITIVOS:
+    angulos = np.linspace(-90, 180, n)
+    segmentos_I, segmentos_aVF = [], []
+    for d, grados in enumerate(angulos):
+        derivaciones, picos = derivaciones_eje(grados, LATIDOS // n + 1, semilla=d)
+        ventanas = picos[:, np.newaxis] + np.arange(-estimador.antes, estimador.despues)
+        segmentos_I.append(derivaciones[ventanas, 0])
+        segmentos_aVF.append(derivaciones[ventanas, 5])
+    segmentos_I = np.stack(segmentos_I)      # (dispositivos, latidos, muestras)
+    segmentos_aVF = np.stack(segmentos_aVF)
+    inicio = time.perf_counter()
+    ejes = eje_qrs(segmentos_I, segmentos_aVF, estimador.n_base)
+    us = 1e6 * (time.perf_counter() - inicio) / ejes.size
+    medios = np.degrees(np.angle(np.exp(1j * np.radians(ejes)).mean(axis=1)))  # Media circular
+    error = np.max(np.abs((medios - angulos + 180) % 360 - 180))
+    placas = PRESUPUESTO_CPU * 1e6 / (us * LPM_MAXIMA / 60)
+    print(f"{n:4d} {ejes.size:8d} {us:15.2f} {placas:16,.0f}   (error medio máx. {error:.2f}°)")
+
+print(f"\nLatido a latido caben {PRESUPUESTO_CPU * 1e6 / (us_latido * LPM_MAXIMA / 60):,.0f} placas "
+      f"a {LPM_MAXIMA} lpm en el {int(100 * PRESUPUESTO_CPU)} % de un núcleo.")
@@ -0,0 +1,129 @@
+# benchmark_intervalos.py - Intervalos PR/QRS/QT medidos sobre un ECG sintético y coste por latido
+# Latido a latido (como en la interfaz) y en lote para N dispositivos a la vez.
+# Falla (assert) si el sesgo de las medianas o la tasa de detección se salen de lo admitido.
+import time
+import numpy as np
+from scipy import signal
+
+from comun import derivaciones_sinteticas, centro_t, ONDA_P, COMPLEJO_QRS, ANCHO_T
+from buffer_circular import BufferCircular
+from intervalos import DelineadorLatidos, delinear
+
+# --- CONFIGURACIÓN ---
+fs = 333.33
+N_DISPOSITIVOS = [1, 4, 16, 64]
+LATIDOS_LOTE = 4000
+MUESTRAS_TICK = int(0.05 * fs)   # Un tick de 50 ms de la interfaz
+LPM_MAXIMA = 180          # Peor caso: latidos por segundo que llegan de cada placa
+PRESUPUESTO_CPU = 0.01    # Fracción de un núcleo reservada para los intervalos
+SESGO_MAXIMO_MS = {"pr_ms": 15, "qrs_ms": 15, "qt_ms": 30}   # |mediana - referencia| con ruido <= 15
+DETECCION_MINIMA = {"pr_ms": 0.95, "qrs_ms": 0.99, "qt_ms": 0.95}
+DETECCION_MINIMA_130 = {"pr_ms": 0.6, "qrs_ms": 0.99, "qt_ms": 0.95}   # La P ya cae sobre la T anterior
+FALSAS_P_MAXIMAS = 0.1    # Latidos con PR medido sin onda P en la señal
+sos = signal.butter(4, [0.5, 40.0], btype='band', fs=fs, output='sos')
+
+
+def referencia(bpm):
+    """(PR, QRS, QT) en ms según los bordes de las gaussianas (centro -/+ 2.5 anchos)."""
+    inicio_qrs = COMPLEJO_QRS[0][0] - 2.5 * COMPLEJO_QRS[0][2]
+    pr = inicio_qrs - (ONDA_P[0] - 2.5 * ONDA_P[2])
+    qrs = (COMPLEJO_QRS[-1][0] + 2.5 * COMPLEJO_QRS[-1][2]) - inicio_qrs
+    qt = centro_t(60.0 / bpm) + 2.5 * ANCHO_T - inicio_qrs
+    return 1000 * pr, 1000 * qrs, 1000 * qt
+
+
+def delinear_todo(bpm, ruido, duracion_s=120.0, semilla=0, con_p=True, lote=1, espera_s=0.0,
+                  capacidad=None):
+    """Como en la interfaz: las derivaciones llegan por ticks y cada R se anota al llegar su muestra."""
+    derivaciones, picos = derivaciones_sinteticas(fs, duracion_s, sos, bpm=bpm, ruido=ruido,
+                                                  semilla=semilla, con_p=con_p)
+    buffer = BufferCircular(capacidad or len(derivaciones), 6)
+    delineador = DelineadorLatidos(fs, capacidad=len(picos), lote=lote, espera_s=espera_s)
+    siguiente = 2
+    segundos = 0.0
+    for i in range(0, len(derivaciones), MUESTRAS_TICK):
+        buffer.escribir(derivaciones[i:i + MUESTRAS_TICK])
+        inicio = time.perf_counter()
+        while siguiente < len(picos) and picos[siguiente] < buffer.escritas:
+            delineador.agregar([picos[siguiente]])
+            siguiente += 1
+        delineador.actualizar(buffer)
+        segundos += time.perf_counter() - inicio
+    delineador.actualizar(buffer, forzar=True)
+    return delineador, segundos
+
+
+# --- 1. Intervalos medidos frente a los de referencia ---
+print(f"{'lpm':>4} {'ruido':>6} {'PR ref/med':>12} {'QRS ref/med':>12} {'QT ref/med':>12} "
+      f"{'QTc med':>8} {'sin P':>6} {'sin T':>6} {'DE QT':>6}")
+fallos = []
+for bpm, ruido in ((50, 15), (72, 15), (100, 15), (130, 15), (72, 40)):
+    delineador, _ = delinear_todo(bpm, ruido)
+    registros = delineador.ultimos(delineador.latidos)
+    medianas = delineador.mediana(delineador.latidos)
+    pr, qrs, qt = referencia(bpm)
+    print(f"{bpm:4d} {ruido:6.0f} {pr:5.0f}/{medianas['pr_ms']:<6.0f} {qrs:5.0f}/{medianas['qrs_ms']:<6.0f} "
+          f"{qt:5.0f}/{medianas['qt_ms']:<6.0f} {medianas['qtc_ms']:8.0f} "
+          f"{100 * np.isnan(registros['pr_ms']).mean():5.0f}% {100 * np.isnan(registros['qt_ms']).mean():5.0f}% "
+          f"{np.nanstd(registros['qt_ms']):6.1f}")
+    minimos = DETECCION_MINIMA_130 if bpm >= 130 else DETECCION_MINIMA
+    for campo, valor_ref in (("pr_ms", pr), ("qrs_ms", qrs), ("qt_ms", qt)):
+        detectados = np.isfinite(registros[campo]).mean()
+        if detectados < minimos[campo]:
+            fallos.append(f"{bpm} lpm, ruido {ruido}: {campo} en el {100 * detectados:.0f} % de los latidos")
+        if ruido <= 15 and abs(medianas[campo] - valor_ref) > SESGO_MAXIMO_MS[campo]:
+            fallos.append(f"{bpm} lpm, ruido {ruido}: {campo} {medianas[campo]:.0f} ms frente a {valor_ref:.0f} ms")
+    if delineador.descartados:
+        fallos.append(f"{bpm} lpm, ruido {ruido}: {delineador.descartados} latidos descartados")
+
+# Sin onda P (ej. fibrilación auricular) no debe aparecer un PR
+for bpm in (72, 100):
+    delineador, _ = delinear_todo(bpm, 15, con_p=False)
+    falsas = np.isfinite(delineador.ultimos(delineador.latidos)["pr_ms"]).mean()
+    print(f"{bpm:4d} {15:6d}   sin onda P: PR medido en el {100 * falsas:.0f} % de los latidos")
+    if falsas > FALSAS_P_MAXIMAS:
+        fallos.append(f"{bpm} lpm sin onda P: PR en el {100 * falsas:.0f} % de los latidos")
+
+# Un buffer más corto que la espera + la ventana pierde latidos: deben contarse, no desaparecer
+delineador, _ = delinear_todo(72, 15, duracion_s=30.0, lote=8, espera_s=5.0, capacidad=int(2 * fs))
+print(f"Buffer de 2 s con lotes de 8: {delineador.latidos} latidos medidos, "
+      f"{delineador.descartados} descartados")
+if delineador.descartados == 0 or delineador.latidos + delineador.descartados < 30:
+    fallos.append("los latidos que no caben en el buffer no se cuentan en 'descartados'")
+assert not fallos, "Delineación fuera de tolerancia:\n  " + "\n  ".join(fallos)
+
+# --- 2. Como en la interfaz (cada latido en su tick) frente a juntarlos entre llamadas (offline) ---
+delineador, segundos = delinear_todo(72, 15, duracion_s=600.0)
+us_uno = 1e6 * segundos / delineador.latidos
+delineador, segundos = delinear_todo(72, 15, duracion_s=600.0, lote=8, espera_s=5.0)
+us_latido = 1e6 * segundos / delineador.latidos
+print(f"\nLatido a latido: {us_uno:.1f} us/latido; juntando {delineador.lote} entre llamadas: "
+      f"{us_latido:.1f} us/latido ({delineador.latidos} latidos, "
+      f"registros de {delineador.registros.itemsize} bytes)")
+
+# --- 3. En lote: una llamada a delinear() para los latidos de N dispositivos ---
+print(f"\n{'N':>4} {'latidos':>8} {'us/latido lote':>15} {'placas en ' + str(int(100 * PRESUPUESTO_CPU)) + ' % CPU':>16}")
+for n in N_DISPOSITIVOS:
+    segmentos_I, segmentos_aVF, rr = [], [], []
+    for d in range(n):
+        derivaciones, picos = derivaciones_sinteticas(fs, (LATIDOS_LOTE // n + 3) * 1.0, sos,
+                                                      bpm=60 + d % 60, semilla=d)
+        picos = picos[2:-1]
+        ventanas = picos[:, np.newaxis] + np.arange(-delineador.antes, delineador.despues)
+        segmentos_I.append(derivaciones[ventanas, 0])
+        segmentos_aVF.append(derivaciones[ventanas, 5])
+        rr.append(np.diff(picos, prepend=picos[0] - (picos[1] - picos[0])))
+    segmentos_I = np.concatenate(segmentos_I)      # (latidos de todos los dispositivos, muestras)
+    segmentos_aVF = np.concatenate(segmentos_aVF)
+    rr = np.concatenate(rr).astype(float)
+    inicio = time.perf_counter()
+    inicio_p, inicio_qrs, fin_qrs, fin_t = delinear(segmentos_I, segmentos_aVF, delineador.antes, fs, rr)
+    us = 1e6 * (time.perf_counter() - inicio) / len(rr)
+    placas = PRESUPUESTO_CPU * 1e6 / (us * LPM_MAXIMA / 60)
+    print(f"{n:4d} {len(rr):8d} {us:15.2f} {placas:16,.0f}   "
+          f"(QT mediana {np.nanmedian(fin_t - inicio_qrs) * 1000 / fs:.0f} ms)")
+
+print(f"\nOffline (lotes de {delineador.lote}) caben "
+      f"{PRESUPUESTO_CPU * 1e6 / (us_latido * LPM_MAXIMA / 60):,.0f} placas a {LPM_MAXIMA} lpm "
+      f"en el {int(100 * PRESUPUESTO_CPU)} % de un núcleo (en la interfaz, latido a latido: "
+      f"{PRESUPUESTO_CPU * 1e6 / (us_uno * LPM_MAXIMA / 60):,.0f}).")
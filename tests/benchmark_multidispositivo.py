@@ -0,0 +1,52 @@
+# benchmark_multidispositivo.py - Tasa sostenida por dispositivo al crecer N (sin ESP32)
+# Cada "placa" reproduce una captura binaria con FuenteArchivo lo más rápido
+# posible; se compara el filtrado en lote (un sosfilt para las N placas) con
+# un sosfilt por placa.
+import asyncio
+import os
+import tempfile
+import time
+from scipy import signal
+
+from comun import senales_sinteticas, codigos_adc
+from fuentes import FuenteArchivo
+from multidispositivo import AgregadorDispositivos
+from protocolo import codificar_tramas, TAM_TRAMA
+
+# --- CONFIGURACIÓN ---
+fs = 333.33
+DURACION_S = 60.0             # Segundos de señal por placa
+MUESTRAS_POR_LECTURA = 32     # Lo que trae cada lectura del puerto (~96 ms)
+N_DISPOSITIVOS = [1, 2, 4, 8, 16, 32]
+sos = signal.butter(4, [0.5, 40.0], btype='band', fs=fs, output='sos')
+
+# --- Captura simulada (la misma para todas las placas) ---
+valores = codigos_adc(senales_sinteticas(fs, DURACION_S)[0])
+with tempfile.NamedTemporaryFile(suffix='.bin', delete=False) as archivo:
+    archivo.write(codificar_tramas(valores[:, 0], valores[:, 1]))
+    ruta = archivo.name
+
+
+def medir(n, por_lotes):
+    fuentes = [FuenteArchivo(ruta, tam_lectura=MUESTRAS_POR_LECTURA * TAM_TRAMA) for _ in range(n)]
+    agregador = AgregadorDispositivos(fuentes, sos, protocolo="binario", periodo_s=0.002,
+                                      por_lotes=por_lotes)
+    inicio, cpu = time.perf_counter(), time.process_time()
+    asyncio.run(agregador.ejecutar())
+    pared, cpu = time.perf_counter() - inicio, time.process_time() - cpu
+    muestras = sum(buffer.escritas for buffer in agregador.filtrados)
+    return muestras / n / pared, 1e6 * cpu / muestras, agregador
+
+
+# --- EJECUCIÓN ---
+print(f"{len(valores)} muestras por placa ({DURACION_S:.0f} s a {fs} Hz)")
+print(f"{'N':>3} {'modo':>10} {'muestras/s por placa':>21} {'x tiempo real':>14} "
+      f"{'us CPU/muestra':>15} {'sosfilt lote/indiv.':>20}")
+try:
+    for n in N_DISPOSITIVOS:
+        for por_lotes in (True, False):
+            tasa, us_cpu, agregador = medir(n, por_lotes)
+            print(f"{n:3d} {'lote' if por_lotes else 'individual':>10} {tasa:21,.0f} {tasa / fs:14.0f} "
+                  f"{us_cpu:15.2f} {agregador.llamadas_lote:>9}/{agregador.llamadas_individuales:<10}")
+finally:
+    os.remove(ruta)
@@ -0,0 +1,59 @@
+# benchmark_planificador.py - fps lograda, cuadros saltados y lecturas por segundo según lo que cuesta dibujar
+# Sin ventana: una raíz falsa imita root.after / after_cancel con un bucle de eventos y time.sleep.
+import heapq
+import time
+
+import comun  # Ruta a los módulos compartidos con la interfaz (carpeta /software)
+from planificador import PlanificadorCuadros
+
+# --- CONFIGURACIÓN (como InterfazECG.py) ---
+FPS_OBJETIVO = 20
+SEGUNDOS = 3.0
+COSTES_MS = [2, 10, 30, 60, 120]   # Lo que tarda dibujar() en cada cuadro
+
+
+class RaizFalsa:
+    """Lo justo de tk.Tk para el planificador: after() y after_cancel() sobre una cola de eventos."""
+
+    def __init__(self):
+        self._cola = []
+        self._ids = 0
+
+    def after(self, ms, funcion):
+        self._ids += 1
+        heapq.heappush(self._cola, (time.perf_counter() + ms / 1000, self._ids, funcion))
+        return self._ids
+
+    def after_cancel(self, id_evento):
+        self._cola = [evento for evento in self._cola if evento[1] != id_evento]
+        heapq.heapify(self._cola)
+
+    def correr(self, segundos):
+        fin = time.perf_counter() + segundos
+        while self._cola and time.perf_counter() < fin:
+            instante, _, funcion = heapq.heappop(self._cola)
+            espera = instante - time.perf_counter()
+            if espera > 0:
+                time.sleep(espera)
+            funcion()
+
+
+print(f"{'dibujar ms':>10} {'lecturas/s':>11} {'fps':>6} {'saltados':>9} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7}"
+      f"   (objetivo {FPS_OBJETIVO} fps)")
+for coste_ms in COSTES_MS:
+    raiz = RaizFalsa()
+    lecturas = [0]
+
+    def leer():
+        lecturas[0] += 1
+
+    planificador = PlanificadorCuadros(raiz, leer, lambda: time.sleep(coste_ms / 1000), fps=FPS_OBJETIVO)
+    planificador.iniciar()
+    raiz.correr(SEGUNDOS)
+    planificador.detener()
+    p50, p95, p99 = planificador.percentiles()
+    print(f"{coste_ms:10d} {lecturas[0] / SEGUNDOS:11.1f} {planificador.fps():6.1f} {planificador.saltados:9d} "
+          f"{p50:7.1f} {p95:7.1f} {p99:7.1f}")
+print("\nCon el after(50) fijo de antes, leer y dibujar iban juntos: con dibujar = 60 ms se leía ~9 veces por segundo.\n"
+      "Si un cuadro dura más que un tick (120 ms) ese tiempo Tk no lee, pero el hilo de adquisición sí:\n"
+      "las muestras llegan en bloques más grandes y no se pierden.")
@@ -0,0 +1,76 @@
+# benchmark_qrs.py - Coste por muestra del detector de QRS y aciertos sobre un ECG sintético
+# Compara el coste con el presupuesto de tiempo de cada fs de adquisición (1 / fs por muestra).
+import time
+import numpy as np
+from scipy import signal
+
+from comun import senales_sinteticas
+from qrs import DetectorQRS
+
+# --- CONFIGURACIÓN ---
+fs = 333.33
+DURACION_S = 300.0
+TAMANOS_BLOQUE = [1, 4, 16, 64, 256, 1024]   # 16 ~ un tick de 50 ms de la interfaz
+FS_PRESUPUESTO = [333.33, 1000.0, 2000.0]
+TOLERANCIA_S = 0.05                           # Un R detectado a menos de 50 ms cuenta como acierto
+sos = signal.butter(4, [0.5, 40.0], btype='band', fs=fs, output='sos')
+
+
+def derivacion_ii(duracion_s, bpm, ruido):
+    """Derivación II filtrada (como la recibe el detector en la interfaz) y los R reales."""
+    senales, reales = senales_sinteticas(fs, duracion_s, bpm=bpm, ruido=ruido, sos=sos)
+    return senales[:, 1], reales
+
+
+def evaluar(detectados, reales):
+    """(sensibilidad, falsos positivos) tras la fase de aprendizaje."""
+    # Solo cuentan los R cuya detección (+/- tolerancia) cae entera después del aprendizaje
+    evaluados = reales > 2.5 * fs + TOLERANCIA_S * fs
+    detectados = np.asarray(detectados)
+    detectados = detectados[detectados > 2.5 * fs]
+    if len(detectados) == 0:
+        return 0.0, 0
+    distancia = np.abs(detectados[:, np.newaxis] - reales[np.newaxis, :])
+    aciertos = np.count_nonzero(distancia.min(axis=0)[evaluados] <= TOLERANCIA_S * fs)
+    falsos = np.count_nonzero(distancia.min(axis=1) > TOLERANCIA_S * fs)
+    return aciertos / np.count_nonzero(evaluados), falsos
+
+
+# --- 1. Aciertos con distintas frecuencias cardiacas y niveles de ruido ---
+print(f"{'lpm':>5} {'ruido':>6} {'sensibilidad':>13} {'falsos +':>9} {'FC estimada':>12}")
+for bpm, ruido in ((50, 15), (72, 15), (120, 15), (180, 15), (72, 60)):
+    ii, reales = derivacion_ii(60.0, bpm, ruido)
+    detector = DetectorQRS(fs)
+    detectados = []
+    for i in range(0, len(ii), 16):
+        detectados += detector.procesar(ii[i:i + 16])
+    sensibilidad, falsos = evaluar(detectados, reales)
+    fc = detector.frecuencia_cardiaca()
+    print(f"{bpm:5d} {ruido:6d} {sensibilidad:13.3f} {falsos:9d} {fc if fc else float('nan'):12.1f}")
+
+# --- 2. Los mismos R con cualquier tamaño de bloque (el aprendizaje acaba a mitad de bloque) ---
+ii, reales = derivacion_ii(60.0, 72, 15)
+referencia = None
+for tam in (1, 16, 700, 1024, len(ii)):
+    detector = DetectorQRS(fs)
+    detectados = []
+    for i in range(0, len(ii), tam):
+        detectados += detector.procesar(ii[i:i + tam])
+    if referencia is None:
+        referencia = detectados
+    assert detectados == referencia, f"Bloques de {tam}: R distintos que muestra a muestra"
+print(f"\nBloques de 1 a {len(ii)} muestras: los mismos {len(referencia)} R "
+      f"(primero a {referencia[0] / fs:.2f} s, aprendizaje {detector.aprendizaje / fs:.0f} s)")
+
+# --- 3. Coste por muestra según el tamaño de bloque ---
+ii, _ = derivacion_ii(DURACION_S, 72, 15)
+print(f"\n{len(ii)} muestras ({DURACION_S:.0f} s)")
+print(f"{'bloque':>7} {'us/muestra':>11}  " + "  ".join(f"{'% de 1/' + str(int(f)) + ' Hz':>14}" for f in FS_PRESUPUESTO))
+for tam in TAMANOS_BLOQUE:
+    detector = DetectorQRS(fs)
+    muestras = ii if tam >= 16 else ii[:int(30 * fs)]   # Los bloques diminutos son lentos: 30 s bastan
+    inicio = time.perf_counter()
+    for i in range(0, len(muestras), tam):
+        detector.procesar(muestras[i:i + tam])
+    us = 1e6 * (time.perf_counter() - inicio) / len(muestras)
+    print(f"{tam:7d} {us:11.2f}  " + "  ".join(f"{100 * us * f / 1e6:13.2f}%" for f in FS_PRESUPUESTO))
@@ -0,0 +1,179 @@
+# benchmark_render.py - Coste por cuadro del render con blitting: una derivación frente a las 6,
+# ventanas largas dibujadas completas o con la envolvente mín/máx, y el modo barrido
+# Usa RenderBlit sobre un lienzo Agg sin ventana (no incluye la copia final a Tk, igual en ambas vistas).
+import time
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from scipy import signal
+
+from comun import senales_sinteticas
+from derivaciones import ProyectorDerivaciones, NOMBRES_DERIVACIONES
+from envolvente import EnvolventeMinMax
+from render_blit import RenderBlit, RenderBarrido
+from vista_seis import VistaSeisDerivaciones
+
+# --- CONFIGURACIÓN (como InterfazECG.py) ---
+fs = 333.33
+MAX_POINTS = 500
+MUESTRAS_POR_CUADRO = 16    # ~50 ms de señal por cuadro
+CUADROS = 400
+COLUMNAS_VENTANA = 600
+SEGUNDOS_VENTANAS = [1.5, 10, 20, 30, 60]  # La interfaz usa la envolvente desde > 10 muestras por columna
+sos = signal.butter(4, [0.5, 40.0], btype='band', fs=fs, output='sos')
+
+
+def ecg_sintetico(n, semilla=0):
+    """n muestras de I y II filtradas (ECG sintético común a los benchmarks)."""
+    return senales_sinteticas(fs, n / fs, sos=sos, semilla=semilla)[0]
+
+
+def figura(vista, **estilo):
+    """Misma figura que la interfaz: 1 eje, 6 paneles con una línea cada uno, o VistaSeisDerivaciones."""
+    fig = plt.figure(figsize=(7, 4.5), dpi=100)
+    canvas = FigureCanvasAgg(fig)
+    if vista == "seis":
+        seis = VistaSeisDerivaciones(fig, MAX_POINTS, color='red', **estilo)
+        for k in range(len(NOMBRES_DERIVACIONES)):
+            seis.fijar_y(k, -900, 1500)
+        return RenderBlit(canvas, [seis.linea]), seis.actualizar
+    if vista == "seis_lineas":
+        ejes = fig.subplots(len(NOMBRES_DERIVACIONES), 1, sharex=True, gridspec_kw={"hspace": 0})
+    else:
+        ejes = [fig.add_subplot(111)]
+    lineas = []
+    for eje in ejes:
+        eje.grid(True, color='gray', alpha=0.3)
+        linea, = eje.plot([], [], color='red', **estilo)
+        eje.set_xlim(0, MAX_POINTS)
+        eje.set_ylim(-900, 1500)
+        lineas.append(linea)
+
+    def actualizar(x, ventana):
+        for k, linea in enumerate(lineas):
+            linea.set_data(x, ventana[:, k if len(lineas) > 1 else 1])
+    return RenderBlit(canvas, lineas), actualizar
+
+
+def medir(vista, **estilo):
+    """ms por cuadro: proyectar las muestras nuevas, actualizar las líneas y blit."""
+    render, actualizar = figura(vista, **estilo)
+    proyector = ProyectorDerivaciones(8192)
+    senal = ecg_sintetico(MAX_POINTS + MUESTRAS_POR_CUADRO * (CUADROS + 10))
+    proyector.proyectar(senal[:MAX_POINTS])
+    x = np.arange(MAX_POINTS)
+    render.dibujar()   # Primer cuadro: dibujo completo y captura del fondo
+    tiempos = []
+    for c in range(CUADROS):
+        inicio = time.perf_counter()
+        i = MAX_POINTS + c * MUESTRAS_POR_CUADRO
+        proyector.proyectar(senal[i:i + MUESTRAS_POR_CUADRO])
+        actualizar(x, proyector.derivaciones.ultimos(MAX_POINTS))
+        render.dibujar()
+        tiempos.append(time.perf_counter() - inicio)
+    plt.close(render.figura)
+    return 1000 * np.median(tiempos), 1000 * np.percentile(tiempos, 95), render.redibujados_completos
+
+
+# (nombre, vista, tolerancia de simplificación en px, estilo de las líneas)
+vistas = [
+    ("1 derivación (antes)", "una", 1 / 9, {}),
+    ("1 derivación (bisel, simplificación 1 px)", "una", 1.0, {"solid_joinstyle": "bevel"}),
+    ("6 paneles, una línea por panel", "seis_lineas", 1.0, {"solid_joinstyle": "bevel", "linewidth": 0.8}),
+    ("6 paneles, VistaSeisDerivaciones", "seis", 1.0, {"solid_joinstyle": "bevel", "linewidth": 0.8}),
+]
+print(f"{'vista':<44} {'mediana ms':>11} {'p95 ms':>8} {'x antes':>8}")
+referencia = None
+for nombre, vista, tolerancia, estilo in vistas:
+    # El Path de cada línea lee la tolerancia al rehacerse en cada cuadro
+    with plt.rc_context({"path.simplify_threshold": tolerancia}):
+        mediana, p95, completos = medir(vista, **estilo)
+    referencia = referencia or mediana
+    print(f"{nombre:<44} {mediana:11.3f} {p95:8.3f} {mediana / referencia:8.2f}   "
+          f"(dibujos completos: {completos})")
+
+
+def medir_ventana(muestras, con_envolvente):
+    """ms por cuadro de la vista de 1 derivación con una ventana de 'muestras' (completa o reducida)."""
+    render, actualizar = figura("una", solid_joinstyle="bevel")
+    eje = render.figura.axes[0]
+    proyector = ProyectorDerivaciones(muestras + 1024)
+    envolvente = EnvolventeMinMax(muestras, COLUMNAS_VENTANA, canales=6)
+    senal = ecg_sintetico(muestras + MUESTRAS_POR_CUADRO * (CUADROS + 10))
+    envolvente.agregar(proyector.proyectar(senal[:muestras]))
+    eje.set_xlim(0, envolvente.ventana)
+    x = np.arange(muestras)
+    render.dibujar()
+    tiempos = []
+    for c in range(CUADROS):
+        inicio = time.perf_counter()
+        i = muestras + c * MUESTRAS_POR_CUADRO
+        envolvente.agregar(proyector.proyectar(senal[i:i + MUESTRAS_POR_CUADRO]))
+        if con_envolvente:
+            actualizar(*envolvente.trazo())
+        else:
+            actualizar(x, proyector.derivaciones.ultimos(muestras))
+        render.dibujar()
+        tiempos.append(time.perf_counter() - inicio)
+    plt.close(render.figura)
+    # Altura media de los R dibujados (% de la real): envolvente frente a diezmar sin más
+    ventana = proyector.derivaciones.ultimos(muestras)[:, 1]
+    _, y = envolvente.trazo()
+    picos = signal.find_peaks(ventana, height=500, distance=int(0.4 * fs))[0]
+    r_reales = ventana[picos].mean()
+    diezmada = ventana[::envolvente.paso]
+    columnas = picos // envolvente.paso
+    r_diezmados = np.mean([diezmada[max(0, c - 1):c + 2].max() for c in columnas])
+    r_envolvente = y[signal.find_peaks(y[:, 1], height=500)[0], 1].mean()
+    return 1000 * np.median(tiempos), 100 * r_envolvente / r_reales, 100 * r_diezmados / r_reales
+
+
+print(f"\n{'ventana':<10} {'muestras':>9} {'completa ms':>12} {'envolvente ms':>14} "
+      f"{'R envolvente':>13} {'R diezmando':>12}   (1 derivación, {COLUMNAS_VENTANA} columnas)")
+with plt.rc_context({"path.simplify_threshold": 1.0}):
+    for segundos in SEGUNDOS_VENTANAS:
+        muestras = int(segundos * fs)
+        completa, _, _ = medir_ventana(muestras, False)
+        reducida, r_envolvente, r_diezmados = medir_ventana(muestras, True)
+        print(f"{segundos:<8.1f} s {muestras:9d} {completa:12.3f} {reducida:14.3f} "
+              f"{r_envolvente:12.0f}% {r_diezmados:11.0f}%")
+
+
+def medir_barrido(muestras):
+    """ms por cuadro y píxeles copiados a Tk del modo barrido (1 derivación, ventana de 'muestras')."""
+    fig = plt.figure(figsize=(7, 4.5), dpi=100)
+    canvas = FigureCanvasAgg(fig)
+    eje = fig.add_subplot(111)
+    eje.grid(True, color='gray', alpha=0.3)
+    eje.set_xlim(0, muestras)
+    eje.set_ylim(-900, 1500)
+    linea, = eje.plot([], [], color='red', solid_joinstyle='bevel')
+    render = RenderBarrido(canvas, [linea], muestras, canales=6, hueco=int(0.25 * fs))
+    render.trazar = lambda x, ventana: linea.set_data(x, ventana[:, 1])
+    copiados = []
+    canvas.blit = lambda caja=None: copiados.append(caja.width * caja.height)   # Agg no copia nada
+    proyector = ProyectorDerivaciones(8192)
+    senal = ecg_sintetico(muestras + MUESTRAS_POR_CUADRO * (CUADROS + 10))
+    for i in range(0, muestras, 4096):
+        render.agregar(proyector.proyectar(senal[i:min(i + 4096, muestras)]))
+    canvas.draw()
+    tiempos = []
+    for c in range(CUADROS):
+        inicio = time.perf_counter()
+        i = muestras + c * MUESTRAS_POR_CUADRO
+        render.agregar(proyector.proyectar(senal[i:i + MUESTRAS_POR_CUADRO]))
+        render.dibujar()
+        tiempos.append(time.perf_counter() - inicio)
+    plt.close(fig)
+    return 1000 * np.median(tiempos), np.median(copiados) / fig.bbox.width / fig.bbox.height
+
+
+print(f"\n{'ventana':<10} {'barrido ms':>11} {'lienzo copiado a Tk':>20}   (1 derivación; desplazando: todo el lienzo)")
+with plt.rc_context({"path.simplify_threshold": 1.0}):
+    for segundos in SEGUNDOS_VENTANAS:
+        barrido, copiado = medir_barrido(int(segundos * fs))
+        print(f"{segundos:<8.1f} s {barrido:11.3f} {100 * copiado:19.1f}%")
+print("\nLa copia del lienzo a Tk (canvas.blit) no se incluye en los ms: desplazando se copia el lienzo\n"
+      "entero en cada cuadro, en barrido solo la franja nueva (columna de la derecha).")
@@ -1,41 +1,60 @@
-import scipy.io
 import matplotlib.pyplot as plt
 import numpy as np
-from scipy.signal import butter, filtfilt
+from scipy.signal import butter
 
-# --- 1. Cargar el archivo .mat ---
+import comun  # Ruta a los módulos compartidos con la interfaz (carpeta /software)
+from registros import abrir_registro, filtrar_por_bloques
+from derivaciones import calcular_derivaciones
+
+# --- CONFIGURACIÓN ---
+ARCHIVO = 'main.mat'              # .mat v5 o v7.3 (HDF5)
+DURACION_S = 10.0                 # Solo si el archivo no trae 'fs'
+SEGUNDOS_GRAFICA = 10.0           # Lo que se grafica (desde el inicio)
+TAM_BLOQUE = 2 ** 16              # Muestras por bloque: la memoria no depende de la duración
+
+# --- 1. Abrir el archivo .mat (sin cargarlo entero) ---
 try:
-    mat = scipy.io.loadmat('main.mat')
+    registro = abrir_registro(ARCHIVO)
 except FileNotFoundError:
-    print("Error: No se encontró 'main.mat'.")
+    print(f"Error: No se encontró '{ARCHIVO}'.")
     exit()
 
-# --- 2. Acceder a los datos ---
-x = mat['val']
+# --- 2. Frecuencia de muestreo ---
+num_muestras = registro.n_muestras
+Fs = registro.fs or num_muestras / DURACION_S
 
-# --- 3. Crear el vector de tiempo ---
-duracion_segundos = 10.0
-num_muestras = x.shape[1]
-Fs = num_muestras / duracion_segundos
-t = np.arange(num_muestras) / Fs
-
-# --- 4. DISEÑAR Y APLICAR EL FILTRO ---
+# --- 3. DISEÑAR EL FILTRO ---
 fs = Fs
 cutoff_freq = 45.0
 order = 5
 nyquist_freq = 0.5 * fs
 normal_cutoff = cutoff_freq / nyquist_freq
-b, a = butter(order, normal_cutoff, btype='low', analog=False)
-
-x_filtrado = filtfilt(b, a, x, axis=1)
-print(f"Datos cargados y filtrados (Fs={Fs} Hz, Corte={cutoff_freq} Hz).")
+sos = butter(order, normal_cutoff, btype='low', analog=False, output='sos')
+
+# --- 4. FILTRAR POR BLOQUES Y ACUMULAR EL ERROR DE TODO EL REGISTRO ---
+# Filas de errores: III, aVR, aVL, aVF (calculadas con derivaciones.py, como en la interfaz,
+# vs. registradas)
+muestras_grafica = min(num_muestras, int(SEGUNDOS_GRAFICA * Fs))
+x_filtrado = np.empty((registro.n_canales, muestras_grafica))
+suma_cuadrados = np.zeros(4)
+error_maximo = np.zeros(4)
+for inicio, bloque in filtrar_por_bloques(registro, sos, tam_bloque=TAM_BLOQUE):
+    calculadas = calcular_derivaciones(bloque[:2].T)
+    errores = bloque[2:6] - calculadas[2:]
+    suma_cuadrados += np.sum(errores ** 2, axis=1)
+    error_maximo = np.maximum(error_maximo, np.max(np.abs(errores), axis=1))
+    if inicio < muestras_grafica:
+        n = min(bloque.shape[1], muestras_grafica - inicio)
+        x_filtrado[:, inicio:inicio + n] = bloque[:, :n]
+registro.cerrar()
+t = np.arange(muestras_grafica) / Fs
+print(f"Datos filtrados por bloques (Fs={Fs} Hz, Corte={cutoff_freq} Hz, {num_muestras} muestras).")
+print(f"{'Derivación':>10} {'RMSE':>10} {'Error máx.':>11}")
+for nombre, sc, maximo in zip(("III", "aVR", "aVL", "aVF"), suma_cuadrados, error_maximo):
+    print(f"{nombre:>10} {np.sqrt(sc / num_muestras):10.3f} {maximo:11.3f}")
 
 # --- 5. Separar las derivaciones RELEVANTES (Filtradas) ---
 
-# --- Bases para el cálculo ---
-derivI_f   = x_filtrado[0, :]
-derivII_f  = x_filtrado[1, :]
-
 # --- Originales (para comparar) ---
 derivIII_original = x_filtrado[2, :]
 aVR_original      = x_filtrado[3, :]
@@ -44,15 +63,10 @@ aVF_original      = x_filtrado[5, :]
 
 
 # --- 6. CÁLCULO DE LAS 4 DERIVACIONES ---
+# Einthoven (III) y Goldberger (aVR, aVL, aVF) con la misma matriz que la interfaz
 print("Calculando las 4 derivaciones...")
-
-# Ley de Einthoven
-derivIII_calculada = derivII_f - derivI_f
-
-# Ecuaciones de Goldberger
-aVR_calculada = -(derivI_f + derivII_f) / 2
-aVL_calculada = derivI_f - (derivII_f / 2)
-aVF_calculada = derivII_f - (derivI_f / 2)
+_, _, derivIII_calculada, aVR_calculada, aVL_calculada, aVF_calculada = \
+    calcular_derivaciones(x_filtrado[:2].T)
 
 
 # --- 7. Graficar las Comparaciones (Cuadrícula 4x2) ---
@@ -117,7 +131,7 @@ axs[3, 1].set_ylabel('Amplitud Error')
 
 # Aplicar a todos los ejes X y poner rejilla
 for ax in axs.flat:
-    ax.set_xlim(0, 10)
+    ax.set_xlim(0, SEGUNDOS_GRAFICA)
     ax.grid(True, linestyle=':', alpha=0.7)
 
 # --- 8. Mostrar y guardar la gráfica ---
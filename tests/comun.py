@@ -0,0 +1,80 @@
+# comun.py - Lo común a los scripts de tests: ruta a /software y el ECG sintético de los benchmarks
+# Se importa ANTES que los módulos de la interfaz:
+#   from comun import senales_sinteticas   (o solo "import comun" para la ruta)
+# Todos los benchmarks generan la señal aquí, con los mismos parámetros por
+# defecto, para que sus resultados se puedan comparar.
+import os
+import sys
+import numpy as np
+
+# Módulos compartidos con la interfaz (carpeta /software)
+CARPETA_SOFTWARE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'software')
+if CARPETA_SOFTWARE not in sys.path:
+    sys.path.insert(0, CARPETA_SOFTWARE)
+
+from derivaciones import calcular_derivaciones
+from filtro_sos import FiltroSOS
+
+# Ondas gaussianas (centro respecto al R en s, amplitud, ancho); la T se acerca al QRS
+# cuando sube la FC (QT ~ raíz del RR). Bordes de referencia: centro -/+ 2.5 anchos.
+ONDA_P = (-0.2, 80, 0.025)
+COMPLEJO_QRS = ((-0.03, -60, 0.008), (0.0, 1000, 0.01), (0.03, -150, 0.01))
+AMPLITUD_T = 250
+ANCHO_T = 0.05
+EJE_GRADOS = 50           # Eje eléctrico por defecto al proyectar sobre I y II
+VARIABILIDAD_RR = 0.02    # Desviación relativa del RR de un latido al siguiente
+DERIVA = 100              # Amplitud de la deriva de línea base (respiración, 0.2 Hz)
+
+
+def centro_t(rr_s):
+    return 0.3 * np.sqrt(rr_s)
+
+
+def ecg_sintetico(fs, duracion_s, bpm=72, variabilidad=VARIABILIDAD_RR, con_p=True, semilla=0):
+    """
+    Latidos P-QRS-T sin ruido ni deriva. Devuelve (x, picos): x de
+    round(duracion_s * fs) muestras y los índices de los R.
+    """
+    rng = np.random.default_rng(semilla)
+    t = np.arange(int(round(duracion_s * fs))) / fs
+    x = np.zeros(len(t))
+    picos = []
+    t_r = 0.5
+    while t_r < duracion_s - 1.0:
+        picos.append(t_r)
+        rr_s = 60.0 / bpm
+        ondas = ((ONDA_P,) if con_p else ()) + COMPLEJO_QRS + ((centro_t(rr_s), AMPLITUD_T, ANCHO_T),)
+        for centro, amplitud, ancho in ondas:
+            cerca = slice(max(0, int((t_r + centro - 5 * ancho) * fs)), int((t_r + centro + 5 * ancho) * fs) + 1)
+            x[cerca] += amplitud * np.exp(-0.5 * ((t[cerca] - t_r - centro) / ancho) ** 2)
+        t_r += rr_s * (1 + variabilidad * rng.normal())
+    return x, np.round(np.array(picos) * fs).astype(int)
+
+
+def senales_sinteticas(fs, duracion_s, bpm=72, ruido=15, eje_grados=EJE_GRADOS, deriva=DERIVA,
+                       variabilidad=VARIABILIDAD_RR, con_p=True, semilla=0, sos=None):
+    """
+    I y II (N, 2): el ECG sintético proyectado con 'eje_grados', más deriva de
+    línea base y ruido gaussiano. Con 'sos' salen filtradas como en la interfaz
+    (FiltroSOS por bloques). Devuelve (senales, picos).
+    """
+    rng = np.random.default_rng(semilla + 1)
+    x, picos = ecg_sintetico(fs, duracion_s, bpm, variabilidad, con_p, semilla)
+    x = x + deriva * np.sin(2 * np.pi * 0.2 * np.arange(len(x)) / fs)
+    theta = np.radians(eje_grados)
+    senales = np.column_stack((x * np.cos(theta), x * np.cos(theta - np.radians(60))))
+    senales += rng.normal(0, ruido, senales.shape)
+    if sos is not None:
+        senales = FiltroSOS(sos, canales=2).filtrar(senales)
+    return senales, picos
+
+
+def derivaciones_sinteticas(fs, duracion_s, sos=None, **opciones):
+    """Las 6 derivaciones (N, 6) de senales_sinteticas (mismas opciones) y los R."""
+    senales, picos = senales_sinteticas(fs, duracion_s, sos=sos, **opciones)
+    return calcular_derivaciones(senales).T, picos
+
+
+def codigos_adc(senales, ganancia=1.0):
+    """Cuentas de 12 bits (centradas en 2048) como las enviaría el ESP32."""
+    return np.clip(np.round(2048 + ganancia * np.asarray(senales)), 0, 4095).astype(np.int32)
@@ -0,0 +1,73 @@
+# latencia_loopback.py - Latencia extremo a extremo del lector asíncrono SIN ESP32
+# Un "ESP32 simulado" envía tramas binarias por FuenteLoopback al ritmo real
+# y varios consumidores comparten el mismo LectorAsincrono.
+import asyncio
+import time
+import numpy as np
+from scipy import signal
+
+import comun  # Ruta a los módulos compartidos con la interfaz (carpeta /software)
+from fuentes import FuenteLoopback, LectorAsincrono
+from filtro_sos import FiltroSOS
+from protocolo import codificar_tramas
+
+# --- CONFIGURACIÓN ---
+fs = 333.33
+MUESTRAS_POR_BLOQUE = 32     # Como MUESTRAS_POR_BLOQUE del firmware en MODO_TIMER
+DURACION_S = 5.0
+sos = signal.butter(4, [0.5, 40.0], btype='band', fs=fs, output='sos')
+
+
+async def esp32_simulado(fuente, envios):
+    """Envía bloques de tramas cada MUESTRAS_POR_BLOQUE / fs segundos y anota la hora de envío."""
+    periodo = MUESTRAS_POR_BLOQUE / fs
+    n_bloques = int(DURACION_S / periodo)
+    t = np.arange(n_bloques * MUESTRAS_POR_BLOQUE) / fs
+    valores = (2048 + 500 * np.sin(2 * np.pi * 1.2 * t)).astype(np.int32)
+    inicio = time.perf_counter()
+    for k in range(n_bloques):
+        await asyncio.sleep(max(0.0, inicio + k * periodo - time.perf_counter()))
+        i = k * MUESTRAS_POR_BLOQUE
+        datos = codificar_tramas(valores[i:i + MUESTRAS_POR_BLOQUE],
+                                 valores[i:i + MUESTRAS_POR_BLOQUE], secuencia_inicial=i)
+        # Clave: secuencia de la ÚLTIMA muestra del bloque
+        envios[(i + MUESTRAS_POR_BLOQUE - 1) & 0xFF] = time.perf_counter()
+        fuente.enviar(datos)
+    fuente.terminar()
+
+
+async def consumidor(nombre, suscripcion, envios, resultados, trabajo=None, retardo_s=0.0):
+    latencias = []
+    async for bloque in suscripcion:
+        if trabajo is not None:
+            trabajo(bloque.muestras)
+        if retardo_s:
+            await asyncio.sleep(retardo_s)  # Consumidor lento (ej. disco)
+        t_envio = envios.get(int(bloque.secuencias[-1]))
+        if t_envio is not None:
+            latencias.append(time.perf_counter() - t_envio)
+    resultados[nombre] = (np.array(latencias) * 1000, suscripcion.bloques_descartados)
+
+
+async def main():
+    fuente = FuenteLoopback()
+    lector = LectorAsincrono(fuente, protocolo="binario")
+    envios = {}
+    resultados = {}
+    filtro = FiltroSOS(sos, canales=2)
+
+    tareas = [
+        consumidor("filtro SOS", lector.suscribir(), envios, resultados, trabajo=filtro.filtrar),
+        consumidor("sin trabajo", lector.suscribir(), envios, resultados),
+        consumidor("lento (150 ms)", lector.suscribir(maximo=4), envios, resultados, retardo_s=0.15),
+    ]
+    await asyncio.gather(lector.ejecutar(), esp32_simulado(fuente, envios), *tareas)
+
+    print(f"fs={fs} Hz, {MUESTRAS_POR_BLOQUE} muestras por bloque, {lector.muestras_leidas} muestras leídas")
+    print(f"{'consumidor':>16} {'bloques':>8} {'mediana ms':>11} {'p99 ms':>8} {'máx ms':>8} {'descartados':>12}")
+    for nombre, (latencias, descartados) in resultados.items():
+        print(f"{nombre:>16} {len(latencias):8d} {np.median(latencias):11.3f} "
+              f"{np.percentile(latencias, 99):8.3f} {latencias.max():8.3f} {descartados:12d}")
+
+
+asyncio.run(main())
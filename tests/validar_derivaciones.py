@@ -0,0 +1,143 @@
+# validar_derivaciones.py - Validación en lote de Einthoven/Goldberger sobre una carpeta de registros
+# Para cada archivo (.mat v5/v7.3 o sesión .ecg con 6 derivaciones [I, II, III, aVR, aVL, aVF])
+# compara III, aVR, aVL y aVF registradas con las calculadas a partir de I y II,
+# y escribe una tabla CSV con RMSE, correlación y error máximo por derivación.
+#
+# Uso: python validar_derivaciones.py CARPETA [--salida tabla.csv] [--corte 45] [--procesos 4]
+#                                     [--fs 500] [--tolerancia 1.0]
+import argparse
+import csv
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from scipy.signal import butter
+
+import comun  # Ruta a los módulos compartidos con la interfaz (carpeta /software)
+from derivaciones import MATRIZ_DERIVACIONES, NOMBRES_DERIVACIONES
+from registros import abrir_registro, bloques, filtrar_por_bloques
+
+DURACION_S = 10.0   # Si el archivo no trae 'fs' ni se da --fs: fs = muestras / DURACION_S (como antes)
+TAM_BLOQUE = 2 ** 16
+EXTENSIONES = ("*.mat", "*.ecg")
+COLUMNAS = ["archivo", "derivacion", "muestras", "fs", "rmse", "correlacion", "error_max", "error"]
+
+
+def validar_archivo(ruta, corte=45.0, fs=None, order=5):
+    """Filas de la tabla para un archivo. Todo el cálculo va por bloques y vectorizado en las 6 derivaciones."""
+    try:
+        registro = abrir_registro(ruta)
+    except Exception as e:
+        return [dict(archivo=ruta, error=f"{type(e).__name__}: {e}")]
+    try:
+        if registro.n_canales < len(NOMBRES_DERIVACIONES):
+            return [dict(archivo=ruta, error=f"solo {registro.n_canales} derivaciones")]
+        fs = registro.fs or fs or registro.n_muestras / DURACION_S
+        if corte:
+            sos = butter(order, corte, btype='low', fs=fs, output='sos')
+            recorrido = filtrar_por_bloques(registro, sos, tam_bloque=TAM_BLOQUE)
+        else:
+            recorrido = bloques(registro, tam_bloque=TAM_BLOQUE)
+
+        # Sumas por derivación (6,) para RMSE y correlación de Pearson en una pasada
+        n = 0
+        referencia = None
+        suma_e2 = np.zeros(6)
+        error_max = np.zeros(6)
+        sx, sy, sxx, syy, sxy = (np.zeros(6) for _ in range(5))
+        for _, bloque in recorrido:
+            registradas = bloque[:6]
+            calculadas = MATRIZ_DERIVACIONES @ bloque[:2]
+            errores = registradas - calculadas
+            suma_e2 += np.einsum('ij,ij->i', errores, errores)
+            error_max = np.maximum(error_max, np.max(np.abs(errores), axis=1))
+            if referencia is None:
+                referencia = registradas.mean(axis=1, keepdims=True)  # Centrado: sumas más estables
+            x = registradas - referencia
+            y = calculadas - referencia
+            sx += x.sum(axis=1)
+            sy += y.sum(axis=1)
+            sxx += np.einsum('ij,ij->i', x, x)
+            syy += np.einsum('ij,ij->i', y, y)
+            sxy += np.einsum('ij,ij->i', x, y)
+            n += bloque.shape[1]
+    except Exception as e:
+        return [dict(archivo=ruta, error=f"{type(e).__name__}: {e}")]
+    finally:
+        registro.cerrar()
+
+    covarianza = sxy - sx * sy / n
+    varianzas = (sxx - sx ** 2 / n) * (syy - sy ** 2 / n)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        correlacion = covarianza / np.sqrt(varianzas)
+    rmse = np.sqrt(suma_e2 / n)
+    # I y II son las entradas: se informa solo de las 4 derivadas
+    return [dict(archivo=ruta, derivacion=NOMBRES_DERIVACIONES[i], muestras=n, fs=round(fs, 3),
+                 rmse=f"{rmse[i]:.6g}", correlacion=f"{correlacion[i]:.6f}",
+                 error_max=f"{error_max[i]:.6g}", error="")
+            for i in range(2, 6)]
+
+
+def _validar(argumentos):
+    return validar_archivo(*argumentos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validación en lote de las derivaciones calculadas")
+    parser.add_argument("carpeta")
+    parser.add_argument("--salida", default="validacion_derivaciones.csv")
+    parser.add_argument("--corte", type=float, default=45.0, help="Pasa-bajos en Hz (0 = sin filtro)")
+    parser.add_argument("--fs", type=float, default=None, help="fs si el archivo no la trae")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos (por defecto, uno por núcleo)")
+    parser.add_argument("--tolerancia", type=float, default=None,
+                        help="RMSE máximo admitido: sale con código 1 si alguna derivación lo supera")
+    args = parser.parse_args()
+
+    rutas = sorted(ruta for patron in EXTENSIONES
+                   for ruta in glob.glob(os.path.join(args.carpeta, "**", patron), recursive=True))
+    if not rutas:
+        print(f"No hay registros ({', '.join(EXTENSIONES)}) en '{args.carpeta}'")
+        return 1
+
+    inicio = time.perf_counter()
+    filas = []
+    with ProcessPoolExecutor(max_workers=args.procesos) as procesos:
+        trabajos = [(ruta, args.corte, args.fs) for ruta in rutas]
+        for resultado in procesos.map(_validar, trabajos, chunksize=max(1, len(rutas) // 64)):
+            filas.extend(resultado)
+    duracion = time.perf_counter() - inicio
+
+    with open(args.salida, "w", newline="") as archivo:
+        escritor = csv.DictWriter(archivo, fieldnames=COLUMNAS)
+        escritor.writeheader()
+        escritor.writerows(filas)
+
+    validas = [f for f in filas if not f["error"]]
+    fallidos = sorted({f["archivo"] for f in filas if f["error"]})
+    print(f"{len(rutas)} archivos en {duracion:.1f} s -> '{args.salida}' ({len(fallidos)} con error)")
+    print(f"{'Derivación':>10} {'RMSE medio':>11} {'RMSE máx.':>10} {'corr. mín.':>11} {'error máx.':>11}")
+    for nombre in NOMBRES_DERIVACIONES[2:]:
+        de_esta = [f for f in validas if f["derivacion"] == nombre]
+        if not de_esta:
+            continue
+        rmse = np.array([float(f["rmse"]) for f in de_esta])
+        correlacion = np.array([float(f["correlacion"]) for f in de_esta])
+        error_max = np.array([float(f["error_max"]) for f in de_esta])
+        print(f"{nombre:>10} {rmse.mean():11.4g} {rmse.max():10.4g} "
+              f"{np.nanmin(correlacion):11.6f} {error_max.max():11.4g}")
+    for ruta in fallidos[:10]:
+        print(f"  Error en {ruta}")
+
+    if args.tolerancia is not None:
+        fuera = [f for f in validas if float(f["rmse"]) > args.tolerancia]
+        for f in fuera[:10]:
+            print(f"  RMSE {f['rmse']} > {args.tolerancia} en {f['archivo']} ({f['derivacion']})")
+        if fuera or fallidos:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())